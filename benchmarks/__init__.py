@@ -0,0 +1,87 @@
+"""
+Benchmarks package.
+
+This package contains performance benchmarks of HERMES. They run against simulated boards (see
+`hermes.protocols.simulated`) so that no physical hardware is needed.
+
+Each benchmark is a runnable module (ex: `python -m benchmarks.mutation`). Results are appended to a JSON history file
+in `benchmarks/results`, keyed by the current git commit, so that regressions show up between commits.
+"""
+from __future__ import annotations
+
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+RESULTS_DIR = Path(__file__).parent / 'results'
+
+
+def isolate_cli() -> list[str]:
+    """
+    Detach the benchmark commandline arguments from the HERMES ones.
+
+    `hermes.core.cli` parses `sys.argv` when first imported: benchmarks must call this before importing any
+    HERMES module.
+
+    :return list[str]: the benchmark arguments.
+    """
+    arguments = sys.argv[1:]
+    del sys.argv[1:]
+    return arguments
+
+
+def percentile(values: list[float], percent: float) -> float:
+    """Return the given percentile (0-100) of a list of values, or 0 if there is none."""
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[min(98, max(0, round(percent) - 1))]
+
+
+def _commit() -> str:
+    """Return the current git commit hash (or 'unknown')."""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],  # noqa: S603, S607
+            cwd=Path(__file__).parent, text=True, stderr=subprocess.DEVNULL,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def record(name: str, results: dict[str, dict[str, float]]) -> None:
+    """
+    Print the results of a benchmark, compared with the previous run, and store them.
+
+    :param str name: the benchmark name (used as the history filename).
+    :param dict results: the results as a `{scenario: {metric: value}}` dictionary.
+    """
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    history_file = RESULTS_DIR / f'{name}.json'
+    history: list[dict[str, Any]] = json.loads(history_file.read_text()) if history_file.exists() else []
+    previous = history[-1]['results'] if history else {}
+
+    print(f'\n == Benchmark: {name} ==')
+    for scenario, metrics in results.items():
+        print(f' > {scenario}')
+        for metric, value in metrics.items():
+            delta = ''
+            before = previous.get(scenario, {}).get(metric)
+            if before:
+                delta = f'  ({(value - before) / before * 100:+.1f}% vs {history[-1]["commit"]})'
+            print(f'     {metric:<24} {value:>14.3f}{delta}')
+
+    history.append({
+        'commit': _commit(),
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results,
+    })
+    history_file.write_text(json.dumps(history, indent=2))
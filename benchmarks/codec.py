@@ -0,0 +1,91 @@
+"""
+Benchmark of the realtime API encodings (@see hermes.core.codec).
+
+Compares the JSON and MessagePack encodings of the realtime API messages built from the InMoov profile:
+    - handshake:    the whole configuration (global, profile, boards, groups), sent to each new client.
+    - action:       a single [board_id, device_id, value] change.
+    - pose:         the changes of all the servos of the profile at once (ex: a pose, a broadcast flush).
+
+Reported per message and encoding: payload size (bytes), encoding and decoding time (us).
+
+Usage: python -m benchmarks.codec [--profile inmoov] [--repeat 2000]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from collections.abc import Callable
+from typing import Any
+
+from benchmarks import isolate_cli, record
+
+_ARGS = isolate_cli()
+
+# ruff: noqa: E402
+from hermes.core import codec, plugins, storage
+
+_ENCODINGS: dict[str, tuple[Callable[[Any], Any], Callable[[Any], Any]]] = {
+    # Socket.io JSON-encodes the arguments of each message.
+    'json': (lambda payload: json.dumps(payload, separators=(',', ':')).encode('utf-8'), json.loads),
+    'msgpack': (codec.packb, codec.unpackb),
+}
+
+
+def _messages(profile: str) -> dict[str, Any]:
+    """Build the realtime API messages of a profile, as emitted by the API."""
+    config = storage.load_profile(profile)
+    boards = {board_id: board.serialize() for board_id, board in config.get('boards', {}).items()}
+    servos = [
+        [board_id, device_id, device['default']]
+        for board_id, board in boards.items()
+        for device_id, device in board['actions'].items()
+    ]
+    return {
+        'handshake': [config.get('global', {}), config.get('profile', {}), boards, config.get('groups', {}), '0.0'],
+        'action': servos[:1],
+        f'pose ({len(servos)} servos)': servos,
+    }
+
+
+def _timed(function: Callable[[Any], Any], payload: Any, repeat: int) -> float:
+    """Return the mean duration (us) of a call."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function(payload)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def run(profile: str, repeat: int) -> dict[str, dict[str, float]]:
+    """Measure the size and encoding/decoding times of each message in each encoding."""
+    results = {}
+    for name, payload in _messages(profile).items():
+        for encoding, (encode, decode) in _ENCODINGS.items():
+            data = encode(payload)
+            results[f'{name} - {encoding}'] = {
+                'bytes': len(data),
+                'encode_us': _timed(encode, payload, repeat),
+                'decode_us': _timed(decode, data, repeat),
+            }
+    return results
+
+
+def main() -> None:
+    """Run the benchmark and record the results."""
+    parser = argparse.ArgumentParser(description='HERMES realtime API encodings benchmark.')
+    parser.add_argument('--profile', default='inmoov', help='The profile to build the messages from.')
+    parser.add_argument('--repeat', type=int, default=2000, help='Number of encodings/decodings per measure.')
+    parser.add_argument('--no-record', action='store_true', help='Do not store the results in the history.')
+    options = parser.parse_args(_ARGS)
+
+    plugins.init()
+    storage.init()
+    results = run(options.profile, options.repeat)
+    if options.no_record:
+        print(results)
+    else:
+        record('codec', results)
+
+
+if __name__ == '__main__':
+    main()
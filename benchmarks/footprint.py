@@ -0,0 +1,67 @@
+"""
+Benchmark of the memory footprint of the server (@see hermes.core.server, `--headless`).
+
+Starts a new process per mode, which loads the configuration and builds the server application, as at startup:
+    - full:         the API and the GUI (NiceGUI pages, mutating the devices through the API).
+    - headless:     the API only: the GUI stack is never imported.
+
+Reported per mode: peak resident memory (MiB), number of imported modules, and how many of them are NiceGUI ones.
+
+Usage: python -m benchmarks.footprint
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+
+from benchmarks import isolate_cli, record
+
+_ARGS = isolate_cli()
+
+# ruff: noqa: E402
+from hermes.core.helpers import ROOT_DIR
+
+# Startup of a new process (the CLI arguments of the benchmark are not for the application).
+_PROCESS = """
+import json, resource, sys
+sys.argv = sys.argv[:1] + %r
+from hermes.core import logger, plugins, server, storage
+from hermes.core.config import settings
+logger.init()
+plugins.init()
+storage.init()
+settings.init()
+server.factory()
+print(json.dumps({
+    'peak_rss_mib': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'modules': len(sys.modules),
+    'nicegui_modules': sum(module.split('.')[0] == 'nicegui' for module in sys.modules),
+}))
+"""
+
+
+def _process(headless: bool) -> dict[str, float]:
+    """Start a new process building the server application: returns its memory footprint."""
+    command = [sys.executable, '-c', _PROCESS % (['--headless'] if headless else [])]
+    output = subprocess.run(command, capture_output=True, check=True, cwd=ROOT_DIR, text=True).stdout  # noqa: S603
+    result: dict[str, float] = json.loads(output.splitlines()[-1])
+    return result
+
+
+def main() -> None:
+    """Run the benchmark and record the results."""
+    parser = argparse.ArgumentParser(description='HERMES memory footprint benchmark.')
+    parser.add_argument('--no-record', action='store_true', help='Do not store the results in the history.')
+    options = parser.parse_args(_ARGS)
+
+    results = {mode: _process(mode == 'headless') for mode in ('full', 'headless')}
+    if options.no_record:
+        print(results)
+    else:
+        record('footprint', results)
+
+
+if __name__ == '__main__':
+    main()
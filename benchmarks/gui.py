@@ -0,0 +1,135 @@
+"""
+Benchmark of the GUI mutations (`hermes.gui.mutator()`, called on each slider change of the board page).
+
+Simulates a burst of slider changes on simulated boards and reports, per scenario: handler calls per second (time
+spent in the UI handler itself), mutations per second (until all of them went through `api.action`), CPU time per
+mutation and threads started per mutation.
+
+Scenarios:
+    - func_timeout: the former handler (`AbstractBoard.gui_mutator`), decorated with `func_timeout.func_set_timeout`:
+                    a watchdog thread runs each call, the caller joins it with a timeout. Only run if the
+                    `func-timeout` package (no longer a requirement) is installed.
+    - direct:       the handler as it is: the mutation is scheduled as a task of the event loop.
+
+Usage: python -m benchmarks.gui [--boards 1] [--mutations 2000]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, cast
+
+from benchmarks import isolate_cli, record
+
+_ARGS = isolate_cli()
+
+# ruff: noqa: E402
+from fastapi import FastAPI
+from nicegui import background_tasks
+from nicegui import globals as nicegui_globals
+
+from benchmarks.mutation import _DEVICES_PER_BOARD, _create_board
+from hermes import gui
+from hermes.boards import AbstractBoard
+from hermes.core import api
+from hermes.core.config import settings
+
+try:
+    from func_timeout import func_set_timeout
+except ImportError:
+    func_set_timeout = None
+
+# The timeout of the former watchdog (@see hermes.gui.mutator()).
+_WATCHDOG_TIMEOUT = 5
+
+
+def _former_mutator(board: AbstractBoard) -> Callable[[int, Any], None]:
+    """Return the former GUI handler of a board: `AbstractBoard.gui_mutator`, as it was before `gui.mutator()`."""
+
+    @func_set_timeout(_WATCHDOG_TIMEOUT)  # type: ignore[misc]
+    def gui_mutator(device_id: int, state: Any) -> None:
+        background_tasks.create(api.action(gui.CLIENT_ID, board.id, device_id, state))
+
+    return cast(Callable[[int, Any], None], gui_mutator)
+
+
+async def _drive(mutators: list[Callable[[int, Any], None]], mutations: int) -> float:
+    """Call the mutators as the slider handlers would: return the time spent in the handlers."""
+    handler_time = 0.0
+    for index in range(mutations):
+        mutator = mutators[index % len(mutators)]
+        start = time.perf_counter()
+        mutator((index // len(mutators)) % _DEVICES_PER_BOARD + 1, index % 180)
+        handler_time += time.perf_counter() - start
+        # Let the event loop run, as it does between two UI events.
+        await asyncio.sleep(0)
+    while background_tasks.running_tasks:
+        await asyncio.sleep(0.001)
+    return handler_time
+
+
+def run(n_boards: int, mutations: int, former: bool) -> dict[str, float]:
+    """Run a scenario for a given number of boards."""
+    boards = [_create_board(board_id, 0.001, 115200, 0) for board_id in range(1, n_boards + 1)]
+    settings.set('boards', {board.id: board for board in boards})
+    with ThreadPoolExecutor(max_workers=n_boards) as executor:
+        if not all(executor.map(lambda board: board.open(), boards)):
+            raise RuntimeError('Some simulated boards could not be opened.')
+
+    started = 0
+    original_start = threading.Thread.start
+
+    def counting_start(self: threading.Thread) -> None:
+        nonlocal started
+        started += 1
+        original_start(self)
+
+    async def scenario() -> float:
+        loop = asyncio.get_running_loop()
+        nicegui_globals.loop = loop
+        mutators = [(_former_mutator if former else gui.mutator)(board) for board in boards]
+        return await _drive(mutators, mutations)
+
+    threading.Thread.start = counting_start  # type: ignore[method-assign]
+    try:
+        cpu_before = time.process_time()
+        start = time.perf_counter()
+        handler_time = asyncio.run(scenario())
+        elapsed = time.perf_counter() - start
+        cpu = time.process_time() - cpu_before
+    finally:
+        threading.Thread.start = original_start  # type: ignore[method-assign]
+        for board in boards:
+            board.close()
+
+    return {
+        'handler_calls_per_sec': mutations / handler_time,
+        'mutations_per_sec': mutations / elapsed,
+        'cpu_per_mutation_us': cpu / mutations * 1e6,
+        'threads_per_mutation': started / mutations,
+    }
+
+
+def main() -> None:
+    """Run both scenarios and record the results."""
+    parser = argparse.ArgumentParser(description='HERMES GUI mutations benchmark.')
+    parser.add_argument('--boards', type=int, default=1, help='Number of boards.')
+    parser.add_argument('--mutations', type=int, default=2000, help='Number of mutations per scenario.')
+    parser.add_argument('--no-record', action='store_true', help='Do not store the results in the history.')
+    options = parser.parse_args(_ARGS)
+
+    api.init(FastAPI())
+    scenarios = ('func_timeout', 'direct') if func_set_timeout else ('direct',)
+    results = {scenario: run(options.boards, options.mutations, scenario == 'func_timeout') for scenario in scenarios}
+    if options.no_record:
+        print(results)
+    else:
+        record('gui', results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark of the device lookup of the mutation path (@see hermes.core.index).
+
+Compares the two ways of reaching a device from a (board_id, device_id) pair, for all the devices of a profile:
+    - settings:     the configuration tree walks of `settings.get(['boards', board_id, 'actions', device_id])`,
+                    three of them per action before the device index (action, device, board).
+    - index:        a single lookup in the device index (`index.get(board_id, device_id)`).
+
+Reported per lookup: mean duration (ns).
+
+Usage: python -m benchmarks.lookup [--profile inmoov] [--repeat 2000]
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from collections.abc import Callable
+from typing import Any
+
+from benchmarks import isolate_cli, record
+
+_ARGS = isolate_cli()
+
+# ruff: noqa: E402
+from hermes.core import index, plugins, storage
+from hermes.core.config import settings
+
+
+def _settings_lookup(board_id: int, device_id: int) -> None:
+    """Walk the configuration tree as the mutation path did before the index."""
+    settings.get(['boards', board_id, 'actions', device_id])
+    settings.get(['boards', board_id, 'actions', device_id])
+    settings.get(['boards', board_id])
+
+
+def _timed(function: Callable[[int, int], Any], keys: list[tuple[int, int]], repeat: int) -> float:
+    """Return the mean duration (ns) of a lookup."""
+    start = time.perf_counter_ns()
+    for _ in range(repeat):
+        for board_id, device_id in keys:
+            function(board_id, device_id)
+    return (time.perf_counter_ns() - start) / (repeat * len(keys))
+
+
+def run(profile: str, repeat: int) -> dict[str, dict[str, float]]:
+    """Measure the lookup duration of each way, over all the devices of the profile."""
+    settings.data.update(storage.load_profile(profile))
+    keys = [(board_id, device_id) for board_id, board in settings.get('boards', {}).items() for device_id in board.actions]
+    index.rebuild()
+    return {
+        f'settings ({len(keys)} devices)': {'lookup_ns': _timed(_settings_lookup, keys, repeat)},
+        f'index ({len(keys)} devices)': {'lookup_ns': _timed(index.get, keys, repeat)},
+    }
+
+
+def main() -> None:
+    """Run the benchmark and record the results."""
+    parser = argparse.ArgumentParser(description='HERMES device lookup benchmark.')
+    parser.add_argument('--profile', default='inmoov', help='The profile to look the devices up in.')
+    parser.add_argument('--repeat', type=int, default=2000, help='Number of lookups of each device per measure.')
+    parser.add_argument('--no-record', action='store_true', help='Do not store the results in the history.')
+    options = parser.parse_args(_ARGS)
+
+    plugins.init()
+    storage.init()
+    results = run(options.profile, options.repeat)
+    if options.no_record:
+        print(results)
+    else:
+        record('lookup', results)
+
+
+if __name__ == '__main__':
+    main()
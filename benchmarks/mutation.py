@@ -0,0 +1,202 @@
+"""
+End-to-end benchmark of the mutation path.
+
+Measures how fast a socket.io `action` turns into bytes on the wire and an ACK back. Each action runs through:
+    `api.action` > `index.DeviceHandle.send` > `BoardSenderThread` > protocol > virtual board
+        > `BoardListenerThread` > `AckCommand`.
+
+Reported per number of boards:
+    - acked_per_sec:        the end-to-end throughput: frames written and acknowledged per second.
+    - submitted_per_sec:    the actions submitted per second, including the coalesced ones (which send no frame).
+    - latency_p50/p99_ms:   the end-to-end latency, from the `api.action` call to the reception of the corresponding ACK.
+    - cpu_per_ack_us:       the CPU time per acknowledged frame.
+
+Actions never block: an action on a device with a command still queued replaces it (coalesced, no frame sent for
+it), and an action on a busy board is rejected, then retried by the benchmark after a short pause, as a client would.
+
+Usage: python -m benchmarks.mutation [--boards 1 10 50] [--actions 2000] [--latency 0.001] [--baudrate 115200]
+       [--batch-delay 0] [--pose 0] [--trace trace.json]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from benchmarks import isolate_cli, percentile, record
+
+_ARGS = isolate_cli()
+
+# ruff: noqa: E402
+from fastapi import FastAPI
+
+from hermes.boards.arduino import ArduinoBoard
+from hermes.commands import ack  # noqa: F401 - registers the ACK command.
+from hermes.core import api, tracing
+from hermes.core.config import settings
+from hermes.core.dictionary import MessageCode
+from hermes.core.struct import EnqueueResult
+from hermes.protocols.simulated import SimulatedProtocol, simulated_board
+
+_DEVICES_PER_BOARD = 5
+# Pause (in seconds) before retrying a rejected action.
+_RETRY_DELAY = 0.001
+
+
+class _ProbedProtocol(SimulatedProtocol):
+    """A simulated protocol matching each received ACK with the start time of the action it acknowledges."""
+
+    def __init__(self, latency: float = 0, jitter: float = 0, baudrate: int = 0) -> None:
+        super().__init__(latency, jitter, baudrate)
+        self.pending: deque[int] = deque()
+        self.latencies: list[int] = []
+
+    def read_byte(self) -> int:
+        byte = super().read_byte()
+        if byte == MessageCode.ACK and self.pending:
+            self.latencies.append(time.perf_counter_ns() - self.pending.popleft())
+        return byte
+
+
+def _create_board(board_id: int, latency: float, baudrate: int, batch_delay: float) -> ArduinoBoard:
+    board = simulated_board(board_id, _DEVICES_PER_BOARD, _ProbedProtocol(latency=latency, baudrate=baudrate))
+    board.batch_delay = batch_delay
+    return board
+
+
+async def _drive(boards: list[ArduinoBoard], actions: int, pose: int) -> Counter[str]:
+    """
+    Send the given number of actions, round-robin over the boards and their devices.
+    With a pose size, actions are sent by batches of that size (@see api.actions), otherwise one by one.
+
+    :return Counter: the number of actions per outcome (accepted, coalesced, rejected).
+    """
+    outcomes: Counter[str] = Counter()
+    batch: list[tuple[int, int, int]] = []
+    for index in range(actions):
+        board = boards[index % len(boards)]
+        device_id = (index // len(boards)) % _DEVICES_PER_BOARD + 1
+        if not pose:
+            await _action(board, device_id, index % 180, outcomes)
+            continue
+        batch.append((board.id, device_id, index % 180))
+        if len(batch) == pose or index == actions - 1:
+            await _actions(boards, batch, outcomes)
+            batch = []
+    return outcomes
+
+
+async def _action(board: ArduinoBoard, device_id: int, value: int, outcomes: Counter[str]) -> None:
+    """Send an action, retried until it is not rejected."""
+    protocol: Any = board.protocol
+    while True:
+        # Registered before the call: the ACK may be read before the call returns.
+        protocol.pending.append(time.perf_counter_ns())
+        result = await api.action('benchmark', board.id, device_id, value)
+        outcomes[result.value if result else 'error'] += 1
+        if result is not EnqueueResult.ACCEPTED:
+            protocol.pending.pop()
+        if result is not EnqueueResult.REJECTED:
+            return
+        await asyncio.sleep(_RETRY_DELAY)
+
+
+async def _actions(boards: list[ArduinoBoard], batch: list[tuple[int, int, int]], outcomes: Counter[str]) -> None:
+    """Send a batch of actions, retried until it is not rejected."""
+    protocols: list[Any] = [boards[board_id - 1].protocol for board_id, _, _ in batch]
+    while True:
+        now = time.perf_counter_ns()
+        for protocol in protocols:
+            protocol.pending.append(now)
+        if not await api.actions('benchmark', batch):
+            outcomes[EnqueueResult.ACCEPTED.value] += len(batch)
+            return
+        outcomes[EnqueueResult.REJECTED.value] += len(batch)
+        for protocol in protocols:
+            protocol.pending.pop()
+        await asyncio.sleep(_RETRY_DELAY)
+
+
+def run(
+        n_boards: int,
+        actions: int,
+        latency: float,
+        baudrate: int,
+        batch_delay: float,
+        pose: int = 0,
+) -> dict[str, float]:
+    """Run the benchmark for a given number of boards."""
+    boards = [_create_board(board_id, latency, baudrate, batch_delay) for board_id in range(1, n_boards + 1)]
+    settings.set('boards', {board.id: board for board in boards})
+    with ThreadPoolExecutor(max_workers=n_boards) as executor:
+        if not all(executor.map(lambda board: board.open(), boards)):
+            raise RuntimeError('Some simulated boards could not be opened.')
+
+    cpu_before = time.process_time()
+    start = time.perf_counter()
+    outcomes = asyncio.run(_drive(boards, actions, pose))
+    protocols: list[Any] = [board.protocol for board in boards]
+    deadline = time.monotonic() + 10
+    while any(protocol.pending for protocol in protocols) and time.monotonic() < deadline:
+        time.sleep(1e-4)
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu_before
+
+    latencies = [value / 1e6 for protocol in protocols for value in protocol.latencies]
+    for board in boards:
+        board.close()
+
+    return {
+        'acked_per_sec': len(latencies) / elapsed,
+        'submitted_per_sec': actions / elapsed,
+        'latency_p50_ms': percentile(latencies, 50),
+        'latency_p99_ms': percentile(latencies, 99),
+        'cpu_per_ack_us': cpu / max(len(latencies), 1) * 1e6,
+        'acked': len(latencies),
+        'coalesced': outcomes[EnqueueResult.COALESCED.value],
+        'rejected': outcomes[EnqueueResult.REJECTED.value],
+    }
+
+
+def main() -> None:
+    """Run the benchmark for each requested number of boards and record the results."""
+    parser = argparse.ArgumentParser(description='HERMES mutation path benchmark.')
+    parser.add_argument('--boards', type=int, nargs='+', default=[1, 10, 50], help='Numbers of boards to benchmark.')
+    parser.add_argument('--actions', type=int, default=2000, help='Number of actions per scenario.')
+    parser.add_argument('--latency', type=float, default=0.001, help='Simulated one-way wire latency (s).')
+    parser.add_argument('--baudrate', type=int, default=115200, help='Simulated wire baudrate (0 for unlimited).')
+    parser.add_argument('--batch-delay', type=float, default=0, help='Board sender batching delay (s).')
+    parser.add_argument('--pose', type=int, default=0, help='Send the actions by batches of this size (0: one by one).')
+    parser.add_argument('--no-record', action='store_true', help='Do not store the results in the history.')
+    parser.add_argument('--trace', help='Trace the actions: print the per-stage breakdown and export it to this file.')
+    options = parser.parse_args(_ARGS)
+
+    api.init(FastAPI())
+    if options.trace:
+        tracing.enable(min(options.actions * len(options.boards), tracing.MAX_CAPACITY))
+    results = {
+        f'{n_boards} boards' + (f' pose {options.pose}' if options.pose else ''): run(
+            n_boards, options.actions, options.latency, options.baudrate, options.batch_delay, options.pose,
+        )
+        for n_boards in options.boards
+    }
+    if options.no_record:
+        print(results)
+    else:
+        record('mutation', results)
+
+    if options.trace:
+        print('\n == Per-stage latency (ms) ==')
+        for interval, stats in tracing.summary().items():
+            print(f'     {interval:<8} ' + '  '.join(f'{key} {value:>9.3f}' for key, value in stats.items()))
+        with Path(options.trace).open('w') as file:
+            json.dump(tracing.export(), file)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark of the configuration loading at startup (@see hermes.core.storage).
+
+Loads the configuration files of a profile, as `settings.init()` does at startup:
+    - cold:     no configuration cache, every file is parsed (first start, or all the files changed).
+    - warm:     the configuration cache is up-to-date, no file is parsed (restart).
+    - process:  a new process discovers the plugins and loads the configuration: the plugin modules are only
+                imported then, for the plugins the profile uses (@see plugins).
+
+Reported per start: mean duration (ms), and for the process: the import duration of each plugin module (ms).
+
+Usage: python -m benchmarks.startup [--profile inmoov] [--repeat 50]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks import isolate_cli, record
+
+_ARGS = isolate_cli()
+
+# ruff: noqa: E402
+from hermes.core import plugins, storage
+from hermes.core.helpers import ROOT_DIR
+
+# Startup of a new process (the CLI arguments of the benchmark are not for the application).
+_PROCESS = """
+import json, sys, time
+sys.argv = sys.argv[:1]
+start = time.perf_counter()
+from hermes.core import plugins, storage
+plugins.init()
+storage.init()
+storage.load_profile(%r)
+print(json.dumps({'startup_ms': (time.perf_counter() - start) * 1e3, **{
+    f'import {module} ms': duration * 1e3 for module, duration in plugins.imports().items()
+}}))
+"""
+
+
+def _timed(profile: str, repeat: int, cold: bool) -> float:
+    """Return the mean duration (ms) of a configuration loading by a newly started process."""
+    total = 0.0
+    for _ in range(repeat):
+        if cold:
+            storage.CACHE_FILE.unlink(missing_ok=True)
+        # A new process starts with no cache in memory.
+        storage._cache = None
+        start = time.perf_counter()
+        storage.load_profile(profile)
+        total += time.perf_counter() - start
+    return total / repeat * 1e3
+
+
+def _process(profile: str) -> dict[str, float]:
+    """Start a new process loading the configuration of a profile: returns its startup and plugin import durations."""
+    command = [sys.executable, '-c', _PROCESS % profile]
+    output = subprocess.run(command, capture_output=True, check=True, cwd=ROOT_DIR, text=True).stdout  # noqa: S603
+    result: dict[str, float] = json.loads(output.splitlines()[-1])
+    return result
+
+
+def run(profile: str, repeat: int) -> dict[str, dict[str, float]]:
+    """Measure the configuration loading with and without an up-to-date cache, and the startup of a new process."""
+    with tempfile.TemporaryDirectory() as directory:
+        storage.CACHE_FILE = Path(directory, 'config.pickle')
+        return {
+            'cold': {'load_ms': _timed(profile, repeat, cold=True)},
+            'warm': {'load_ms': _timed(profile, repeat, cold=False)},
+            'process': _process(profile),
+        }
+
+
+def main() -> None:
+    """Run the benchmark and record the results."""
+    parser = argparse.ArgumentParser(description='HERMES startup benchmark.')
+    parser.add_argument('--profile', default='inmoov', help='The profile to load the configuration of.')
+    parser.add_argument('--repeat', type=int, default=50, help='Number of loadings per measure.')
+    parser.add_argument('--no-record', action='store_true', help='Do not store the results in the history.')
+    options = parser.parse_args(_ARGS)
+
+    plugins.init()
+    storage.init()
+    results = run(options.profile, options.repeat)
+    if options.no_record:
+        print(results)
+    else:
+        record('startup', results)
+
+
+if __name__ == '__main__':
+    main()
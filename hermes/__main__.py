@@ -7,9 +7,11 @@ HERMES application entry point.
     https://github.com/ott-jax/ott/pull/269.
 """
 import webbrowser
+from typing import Any
 
-from hermes.core import logger, plugins, server, storage
+from hermes.core import hardware, logger, persistence, plugins, server, statetable, storage, watcher
 from hermes.core.config import settings
+from hermes.core.logger import HermesError
 
 
 def main() -> None:
@@ -20,6 +22,12 @@ def main() -> None:
     plugins.init()
     storage.init()
     settings.init()
+    _start_services()
+
+    if settings.get(['hardware', 'daemon']):
+        _run_daemon()
+        return
+
     server.init()
 
     try:
@@ -37,9 +45,10 @@ def main() -> None:
             if settings.get(['server', 'open']):
                 webbrowser.open(addr)
 
-            # Start boards.
-            for (_, board) in settings.get('boards').items():
-                board.open()
+            # Start boards (unless owned by a hardware daemon).
+            if not settings.get(['hardware', 'ipc'], None):
+                for (_, board) in settings.get('boards').items():
+                    board.open()
 
             # Main loop.
             while True:
@@ -47,8 +56,49 @@ def main() -> None:
 
     except KeyboardInterrupt:
         logger.info('\033[96m == Stopping HERMES == \033[0m')
-        for (_, board) in settings.get('boards').items():
-            board.close()
+        if not settings.get(['hardware', 'ipc'], None):
+            for (_, board) in settings.get('boards').items():
+                board.close()
+        _stop_services()
+
+
+def _start_services() -> None:
+    """Start the background services: the process owning the boards restores their states and publishes them."""
+    owner = settings.get(['hardware', 'daemon']) or not settings.get(['hardware', 'ipc'], None)
+    state_file: Any = settings.get(['hardware', 'state_file'], None)
+    if state_file and owner:
+        persistence.init(state_file)
+    state_table: Any = settings.get(['hardware', 'state_table'], None)
+    if state_table and owner:
+        statetable.init(state_table)
+    if settings.get('watch', False):
+        watcher.start()
+
+
+def _stop_services() -> None:
+    """Stop the background services (@see _start_services())."""
+    watcher.stop()
+    persistence.close()
+    statetable.close()
+
+
+def _run_daemon() -> None:
+    """Run the hardware daemon (@see hardware.serve())."""
+    ipc: Any = settings.get(['hardware', 'ipc'], [])
+    if len(ipc) != 1:
+        logger.error('The hardware daemon needs the one address it listens on (--ipc).')
+        _stop_services()
+        return
+    logger.info('\033[96m == Starting HERMES hardware daemon == \033[0m')
+    own: Any = settings.get(['hardware', 'own'], None)
+    token: Any = settings.get(['hardware', 'token'], None)
+    try:
+        hardware.serve(ipc[0], own, token)
+    except HermesError:
+        pass
+    except KeyboardInterrupt:
+        logger.info('\033[96m == Stopping HERMES hardware daemon == \033[0m')
+    _stop_services()
 
 
 if __name__ == '__main__':
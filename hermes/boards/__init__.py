@@ -17,29 +17,60 @@ from __future__ import annotations
 
 import threading
 import time
+from collections import deque
+from collections.abc import Callable
 from queue import Empty
-from typing import Any, cast
+from typing import Any, NamedTuple, cast
 
-from func_timeout import FunctionTimedOut, func_set_timeout
-from nicegui import background_tasks
-from ruamel.yaml.constructor import BaseConstructor
-
-from hermes import gui
-from hermes.commands import CommandFactory
-from hermes.core import api, logger
+from hermes.commands import CommandError, CommandFactory
+from hermes.core import logger, metrics, snapshot, statetable, tracing
 from hermes.core.dictionary import MessageCode
-from hermes.core.logger import HermesError
+from hermes.core.logger import HermesError, TraceChannel
 from hermes.core.plugins import AbstractPlugin
-from hermes.core.struct import ClearableQueue, MetaPluginType
+from hermes.core.struct import ClearableQueue, CoalescingQueue, EnqueueResult, MetaPluginType
 from hermes.devices import AbstractDevice
 from hermes.protocols import AbstractProtocol, ProtocolError
 
+# Number of commands that can be sent to a board without receiving their acknowledgment.
+_WINDOW_SIZE = 5
+# Number of entries (single commands or batches) of the command queue: beyond, new commands are rejected.
+_QUEUE_SIZE = 16
+# Maximum duration (in seconds) of a board handshake.
+_HANDSHAKE_TIMEOUT = 10
+
+# A command to send: its data, and its span if traced (@see tracing). The command queue holds lists of commands.
+_Command = tuple[bytearray, tracing.Span | None]
+
+# The boards with an open connexion: @see metrics callbacks.
+_CONNECTED: list[AbstractBoard] = []
+# Lock for starting the background connexions (@see AbstractBoard.connect()).
+_CONNECT_LOCK = threading.Lock()
+
+_FRAMES = metrics.counter(
+    'hermes_board_frames_total', 'Number of frames sent to (tx) and commands received from (rx) the boards.',
+    ['board', 'direction'],
+)
+_BYTES = metrics.counter(
+    'hermes_board_bytes_total', 'Number of bytes sent to (tx) and read from (rx) the boards.', ['board', 'direction'],
+    callback=lambda: {(board.id, 'rx'): board.protocol.stats().get('bytes_read', 0) for board in _CONNECTED},
+)
+_QUEUE_DEPTH = metrics.gauge(
+    'hermes_board_queue_depth', 'Number of frames waiting to be sent to the boards.', ['board'],
+    callback=lambda: {(board.id,): board.queue_depth() for board in _CONNECTED},
+)
+_ACK_WINDOW = metrics.gauge(
+    'hermes_board_ack_window', 'Number of frames sent to the boards and not acknowledged yet.', ['board'],
+    callback=lambda: {(board.id,): board.inflight() for board in _CONNECTED},
+)
+_RTT = metrics.histogram('hermes_board_rtt_seconds', 'Time from a frame write to its acknowledgment.', ['board'])
+_HANDSHAKE = metrics.histogram('hermes_board_handshake_seconds', 'Duration of the board handshakes.', ['board'])
+
 
 class BoardError(HermesError):
     """Base class for board related exceptions."""
 
     def __init__(self, board: AbstractBoard, message: str | None = None) -> None:
-        super().__init__(f'Board `{board.name}`: {message}')
+        super().__init__(f'Board `{board.name}`: {message}', key=f'{type(self).__name__} board {board.id}')
 
 
 class AbstractBoard(AbstractPlugin, metaclass=MetaPluginType):
@@ -63,38 +94,51 @@ class AbstractBoard(AbstractPlugin, metaclass=MetaPluginType):
 
         self.connected: bool = False
         self.protocol: AbstractProtocol = protocol
-
-        # Create Command queue for sending orders
-        self._command_queue = ClearableQueue(4)
+        # Time (in seconds) the sender waits for more frames to combine them in a single write.
+        # @see BoardSenderThread.
+        self.batch_delay: float = 0
+
+        # Create Command queue for sending orders (@see send()).
+        self._command_queue = CoalescingQueue(_QUEUE_SIZE)
+        # Thread opening the connexion in the background (@see connect()).
+        self._connector: threading.Thread | None = None
+        # Lock for opening the connexion once, whoever opens it (@see open()).
+        self._open_lock = threading.Lock()
         # Event to notify threads that they should terminate
         self._exit_event = threading.Event()
         # Number of messages we can send to the board without receiving an acknowledgment
-        self._n_received_semaphore = threading.Semaphore(5)
-        # Lock for accessing protocol (to avoid reading and writing at the same time)
-        protocol_lock = threading.Lock()
-        # Threads for arduino communication
-        self._threads = [
-            BoardSenderThread(
-                self.protocol,
-                self._command_queue,
-                self._exit_event,
-                self._n_received_semaphore,
-                protocol_lock,
-            ),
-            BoardListenerThread(
-                self.protocol,
-                self._exit_event,
-                self._n_received_semaphore,
-                protocol_lock,
-            ),
-        ]
+        self._n_received_semaphore = threading.Semaphore(_WINDOW_SIZE)
+        # Threads for arduino communication (created when the connexion opens).
+        self._threads: list[threading.Thread] = []
+        # Write times (perf_counter_ns) and spans of the frames waiting for an ACK, oldest first.
+        self._inflight: deque[tuple[int, tracing.Span | None]] = deque()
+
+    def _create_threads(self) -> list[threading.Thread]:
+        """Create the send/receive threads for the board."""
+        self._exit_event.clear()
+        self._n_received_semaphore = threading.Semaphore(_WINDOW_SIZE)
+        self._inflight = deque()
+        # The protocol lock avoids reading and writing at the same time.
+        link = BoardLink(
+            self.protocol, self._exit_event, self._n_received_semaphore, threading.Lock(), self._inflight, self.id,
+            self._lost,
+        )
+        return [BoardSenderThread(link, self._command_queue, self.batch_delay), BoardListenerThread(link)]
 
     def open(self) -> bool:
         """
-        Open the connexion from board to backend using the internal protocol.
+        Open the connexion from board to backend using the internal protocol: a connexion already open (or being
+        opened by another thread, ex: @see connect()) is not opened again.
         :return bool:
         :raise ProtocolError: Raised if the connexion could not be opened.
         """
+        with self._open_lock:
+            if self.connected:
+                return True
+            return self._open()
+
+    def _open(self) -> bool:
+        """Open the connexion: protocol, handshake, then the send/receive threads (@see open())."""
 
         # Open protocol (for communication with the board)
         try:
@@ -111,37 +155,63 @@ class AbstractBoard(AbstractPlugin, metaclass=MetaPluginType):
         # Run the Handshake process.
         try:
             logger.debug(f'Board {self.name} - Try handshake')
+            start = time.perf_counter()
             self.handshake()
-        except FunctionTimedOut as error:
-            BoardError(self, f'Handshake error: {error}')
+            _HANDSHAKE.labels(self.id).observe(time.perf_counter() - start)
+        except BoardError:
             return not self.close()
 
         # Starts the send/receive threads.
+        self._threads = self._create_threads()
         for thread in self._threads:
             thread.start()
 
         self.connected = True
+        snapshot.invalidate(self.id)
+        _CONNECTED.append(self)
         logger.info(f' > Board {self.name} - CONNECTED')
         return self.connected
 
+    def connect(self) -> None:
+        """Open the connexion in a background thread, unless it is open or being opened already."""
+        with _CONNECT_LOCK:
+            if self.connected or (self._connector and self._connector.is_alive()):
+                return
+            self._connector = threading.Thread(target=self.open, name=f'BoardConnector-{self.id}', daemon=True)
+            self._connector.start()
+
+    def _lost(self) -> None:
+        """Close the connexion the listener cannot read anymore (ex: unplugged): the next command reopens it."""
+        BoardError(self, 'Connexion lost.')
+        self.close()
+
     def close(self) -> bool:
-        """Close the connexion."""
+        """Close the connexion: the commands not sent yet are dropped."""
+        if self in _CONNECTED:
+            _CONNECTED.remove(self)
         self.protocol.close()
+        self._command_queue.clear()
 
         # Ends the multithreading.
         self._exit_event.set()
         self._n_received_semaphore.release()
         for thread in self._threads:
-            if thread.is_alive():
+            # The listener closes the connexion it lost itself (@see _lost()).
+            if thread.is_alive() and thread is not threading.current_thread():
                 thread.join()
 
         self.connected = False
+        snapshot.invalidate(self.id)
         logger.info(f' > Board {self.name} - DISCONNECTED')
         return not self.connected
 
-    @func_set_timeout(10)  # type: ignore[misc]
-    def handshake(self) -> None:
-        """Perform handshake between the board and the application."""
+    def handshake(self, timeout: float = _HANDSHAKE_TIMEOUT) -> None:
+        """
+        Perform handshake between the board and the application.
+
+        :param float timeout: The maximum duration of the handshake (in seconds).
+        :raise BoardError: the board did not acknowledge the handshake in time.
+        """
         # @todo move this to a command
 
         # Handshake: send all devices to board via PATCH.
@@ -160,12 +230,18 @@ class AbstractBoard(AbstractPlugin, metaclass=MetaPluginType):
         for (_, device) in devices.items():
             data: bytearray = device.as_playload()
             data = bytearray([MessageCode.PATCH]) + data
-            logger.debug(f'Handshake PATCH: {data} - {list(data)}')
+            logger.trace(TraceChannel.PROTOCOL, 'Handshake PATCH: %s - %s', data, logger.lazy(list, data))
             self.protocol.send(data)
 
-        # Blocking wait ACK.
+        # Wait ACK, up to the deadline: the protocol is polled so that a silent board cannot block past it.
+        deadline = time.monotonic() + timeout
         command_code = None
         while command_code is not MessageCode.ACK:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise BoardError(self, f'Handshake error: no acknowledgment after {timeout} seconds.')
+            if not self.protocol.poll(min(remaining, _IDLE_TIMEOUT)):
+                continue
             try:
                 command_code = MessageCode(self.protocol.read_byte())
                 command = CommandFactory().get_by_code(command_code)
@@ -174,87 +250,200 @@ class AbstractBoard(AbstractPlugin, metaclass=MetaPluginType):
             except HermesError:
                 continue
 
-    def send(self, data: bytearray) -> None:
+    def send(self, data: bytearray, span: tracing.Span | None = None, key: Any = None) -> EnqueueResult:
         """
         Send the given data (via the internal protocol).
 
+        This never blocks: the data is queued for the sender thread, and the connexion is opened in the background if
+        needed (@see connect()). Data with the key of data still queued replaces it (ex: the successive positions of
+        a servo, only the latest one being sent).
+
         :param bytearray data: An array of byte to transfer.
+        :param Span span: The trace of the action this data belongs to, if traced (@see tracing).
+        :param any key: The key of the data (ex: a device id), None if it cannot be replaced.
+
+        :return EnqueueResult: accepted, coalesced, or rejected if the command queue is full.
         """
-        self._command_queue.put(data)
+        return self.send_batch([(data, span)], key)
 
-    @func_set_timeout(5)  # type: ignore[misc]
-    def gui_mutator(self, device_id: int, state: Any) -> None:
+    def send_batch(self, commands: list[_Command], key: Any = None) -> EnqueueResult:
         """
-        GUI Helper:  For board's devices to mutate their state via UI inputs.
+        Send several commands at once: they take a single slot of the command queue, and are written together as far
+        as the ACK window allows (@see BoardSenderThread). Like `send()`, this never blocks.
+
+        :param list commands: The commands to send, as (data, span) pairs (@see send()).
+        :param any key: The key of the batch, None if it cannot be replaced.
 
-        @see hermes.gui.pages.BoardPage.
+        :return EnqueueResult: accepted, coalesced, or rejected if the command queue is full.
+        """
+        result = self._command_queue.offer(commands, key)
+        if result is not EnqueueResult.REJECTED:
+            for _, span in commands:
+                if span:
+                    span.stamp(tracing.ENQUEUED)
+        if not self.connected:
+            self.connect()
+        return result
+
+    def ingest(self, device_id: int, value: Any) -> None:
+        """
+        Record the value of an input read from the board (ex: by the command receiving it), and publish it to the
+        state table (@see statetable).
 
-        :param device_id: device ID
-        :param state: new state value.
+        :param int device_id: The input ID.
+        :param any value: The value read.
         """
-        background_tasks.create(api.action(gui.CLIENT_ID, self.id, device_id, state))
+        device = self.inputs.get(device_id)
+        if device is None:
+            BoardError(self, f'Input {device_id} does not exist.')
+            return
+        device.state = value
+        statetable.publish([[self.id, device_id, value]])
+
+    def busy(self) -> bool:
+        """Return whether the command queue is full: new commands are rejected until the board catches up."""
+        return self._command_queue.full()
+
+    def queue_depth(self) -> int:
+        """Return the number of entries (single commands or batches) waiting in the command queue."""
+        return self._command_queue.qsize()
+
+    def inflight(self) -> int:
+        """Return the number of frames sent to the board and not acknowledged yet."""
+        return len(self._inflight)
 
     @classmethod
-    def from_yaml(cls, constructor: BaseConstructor, node: Any) -> AbstractBoard:  # noqa: D102 # type: ignore[override]
-        board: Any = super().from_yaml(constructor, node)
+    def from_mapping(cls, mapping: dict[str, Any]) -> AbstractBoard:  # noqa: D102
+        board: Any = super().from_mapping(mapping)
         board.actions = {actionPlugin.id: actionPlugin for actionPlugin in board.actions}
         board.inputs = {inputPlugin.id: inputPlugin for inputPlugin in board.inputs}
         return cast(AbstractBoard, board)
 
 
 _RATE = 0
+# Maximum time (in seconds) the sender waits for a frame before checking if it should stop.
+_IDLE_TIMEOUT = 0.1
+# Number of consecutive failed reads after which the listener considers the connexion lost.
+_MAX_READ_FAILURES = 10
+
+
+class BoardLink(NamedTuple):
+    """
+    The connexion state shared by the communication threads of a board (@see AbstractBoard._create_threads()).
+
+    :param AbstractProtocol protocol:               the protocol of the board.
+    :param threading.Event exit_event:              set for the threads to terminate.
+    :param threading.Semaphore n_received_semaphore: the send tokens: one per command not acknowledged yet.
+    :param threading.Lock protocol_lock:            lock for accessing the protocol.
+    :param deque inflight:                          write times and spans of the frames waiting for an ACK.
+    :param int board_id:                            id of the board, for metrics.
+    :param Callable lost:                           called by the listener when the connexion is lost.
+    """
+
+    protocol: AbstractProtocol
+    exit_event: threading.Event
+    n_received_semaphore: threading.Semaphore
+    protocol_lock: threading.Lock
+    inflight: deque[tuple[int, tracing.Span | None]]
+    board_id: int = 0
+    lost: Callable[[], None] | None = None
 
 
 class BoardSenderThread(threading.Thread):
     """
     Thread that send orders to the arduino.
 
-    Note: it blocks if there is no more send_token left (here it is the n_received_semaphore).
+    Note: it blocks if there is no more send_token left (here it is the n_received_semaphore). Each command takes a
+    send token, including the commands of a batch (@see AbstractBoard.send_batch()).
+
+    On each wakeup, the thread drains all the frames ready to be sent within the ACK window (ie. as many as there are
+    send tokens left) and writes them to the protocol at once: several small frames then cost a single write call
+    (and a single USB transfer) instead of one each.
+    The `batch_delay` lets the thread wait for more frames before writing:
+     - 0 (default) gives the lowest latency: only the frames already queued are combined.
+     - a few milliseconds give the highest throughput under load: more frames are combined per write, hence more
+       frames per second can be sent, at the cost of up to `batch_delay` of added latency per frame.
+       (@see benchmarks.mutation --batch-delay)
 
-    :param protocol: (Protocol object)
+    :param link: (BoardLink) the connexion state shared with the listener.
     :param command_queue: (Queue)
-    :param exit_event: (Threading.Event object)
-    :param n_received_semaphore: (threading.Semaphore)
-    :param protocol_lock: (threading.Lock).
+    :param batch_delay: (float) time in seconds to wait for more frames before writing.
     """
 
-    def __init__(
-            self,
-            protocol: AbstractProtocol,
-            command_queue: ClearableQueue,
-            exit_event: threading.Event,
-            n_received_semaphore: threading.Semaphore,
-            protocol_lock: threading.Lock,
-    ) -> None:
+    def __init__(self, link: BoardLink, command_queue: ClearableQueue, batch_delay: float = 0) -> None:
         threading.Thread.__init__(self)
         self.deamon = True
-        self.protocol = protocol
+        self.protocol = link.protocol
         self.command_queue = command_queue
-        self.exit_event = exit_event
-        self.n_received_semaphore = n_received_semaphore
-        self.protocol_lock = protocol_lock
+        self.exit_event = link.exit_event
+        self.n_received_semaphore = link.n_received_semaphore
+        self.protocol_lock = link.protocol_lock
+        self.batch_delay = batch_delay
+        self.inflight = link.inflight
+        self._frames = _FRAMES.labels(link.board_id, 'tx')
+        self._bytes = _BYTES.labels(link.board_id, 'tx')
 
     def run(self) -> None:  # noqa: D102
+        pending: deque[_Command] = deque()
         while not self.exit_event.is_set():
-            self.n_received_semaphore.acquire()
+            if not pending:
+                try:
+                    pending.extend(self.command_queue.get(timeout=_IDLE_TIMEOUT))
+                except Empty:
+                    continue
 
-            if self.exit_event.is_set():
+            if not self._acquire():
                 break
+            commands = [self._dequeued(pending.popleft())]
+            self._drain(commands, pending)
 
-            try:
-                data = self.command_queue.get_nowait()
-            except Empty:
-                time.sleep(_RATE)
-                self.n_received_semaphore.release()
-                continue
-
+            data = bytearray().join(command for command, _ in commands)
             with self.protocol_lock:
+                # Stamped before the write, under the lock: the listener cannot process their ACK before.
+                now = time.perf_counter_ns()
+                self.inflight.extend((now, span) for _, span in commands)
                 # @todo should be close connexion on the board if this fails ?
                 self.protocol.send(data)
-
-            time.sleep(_RATE)
+            for _, span in commands:
+                if span:
+                    span.stamp(tracing.WRITTEN)
+            self._frames.inc(len(commands))
+            self._bytes.inc(len(data))
         logger.debug('BoardSenderThread: thread stops.')
 
+    def _acquire(self) -> bool:
+        """Wait for a send token: False if the thread has been asked to stop meanwhile."""
+        while not self.exit_event.is_set():
+            if self.n_received_semaphore.acquire(timeout=_IDLE_TIMEOUT):
+                return not self.exit_event.is_set()
+        return False
+
+    @staticmethod
+    def _dequeued(command: _Command) -> _Command:
+        """Stamp the span of a command about to be sent (@see tracing)."""
+        if command[1]:
+            command[1].stamp(tracing.DEQUEUED)
+        return command
+
+    def _drain(self, commands: list[_Command], pending: deque[_Command]) -> None:
+        """
+        Append to the given commands all the commands ready to be sent within the ACK window and the batch delay.
+
+        :param list commands: The commands to send.
+        :param deque pending: The commands taken from the queue but not sent yet (some are left when the window is full).
+        """
+        deadline = time.monotonic() + self.batch_delay
+        while self.n_received_semaphore.acquire(blocking=False):
+            if not pending:
+                remaining = deadline - time.monotonic()
+                try:
+                    queued = self.command_queue.get(timeout=remaining) if remaining > 0 else self.command_queue.get_nowait()
+                except Empty:
+                    self.n_received_semaphore.release()
+                    return
+                pending.extend(queued)
+            commands.append(self._dequeued(pending.popleft()))
+
 
 class BoardListenerThread(threading.Thread):
     """
@@ -263,45 +452,63 @@ class BoardListenerThread(threading.Thread):
     The thread reads a MessageCode from the communication protocol, turns it to an actual command and processes it.
     If the MessageCode is an ACK, the thread releases one lock to the n_received_semaphore semaphore to clear the way
     for the CommandSenderThread.
+    A failed read (ex: closed port) is retried after `_IDLE_TIMEOUT`: after `_MAX_READ_FAILURES` in a row, the
+    connexion is considered lost and the thread stops (@see BoardLink.lost).
 
-    :param AbstractProtocol protocol:
-    :param threading.Event object exit_event:
-    :param threading.Semaphore n_received_semaphore:
-    :param threading.Lock protocol_lock:
+    :param BoardLink link: the connexion state shared with the sender.
     """
 
-    def __init__(
-            self,
-            protocol: AbstractProtocol,
-            exit_event: threading.Event,
-            n_received_semaphore: threading.Semaphore,
-            protocol_lock: threading.Lock,
-    ):
+    def __init__(self, link: BoardLink):
         threading.Thread.__init__(self)
         self.deamon = True
-        self.protocol = protocol
-        self.exit_event = exit_event
-        self.n_received_semaphore = n_received_semaphore
-        self.protocol_lock = protocol_lock
+        self.protocol = link.protocol
+        self.exit_event = link.exit_event
+        self.n_received_semaphore = link.n_received_semaphore
+        self.protocol_lock = link.protocol_lock
+        self.inflight = link.inflight
+        self.lost = link.lost
+        self._frames = _FRAMES.labels(link.board_id, 'rx')
+        self._rtt = _RTT.labels(link.board_id)
 
     def run(self) -> None:  # noqa: D102
         logger.debug('BoardListenerThread: thread started.')
 
+        failures = 0
         while not self.exit_event.is_set():
             try:
-                command_code: MessageCode = MessageCode(self.protocol.read_byte())
-                logger.debug(f'BoardListenerThread: receive command code {command_code}')
+                byte = self.protocol.read_byte()
+                failures = 0
+                command_code: MessageCode = MessageCode(byte)
+                logger.trace(TraceChannel.COMMAND, 'BoardListenerThread: receive command code %s', command_code)
+            except ValueError:
+                # Noise on the line: rate-limited, so a noisy connexion does not flood the logs.
+                logger.report('UnknownCode', 'BoardListenerThread: unknown code %s received.', byte)
+                continue
             except HermesError:
-                time.sleep(_RATE)
+                failures += 1
+                if failures >= _MAX_READ_FAILURES:
+                    if self.lost:
+                        self.lost()
+                    break
+                self.exit_event.wait(_IDLE_TIMEOUT)
                 continue
 
             with self.protocol_lock:
-                command = CommandFactory().get_by_code(command_code)
-                logger.debug(command)
+                try:
+                    command = CommandFactory().get_by_code(command_code)
+                except CommandError:
+                    continue
+                logger.trace(TraceChannel.COMMAND, 'BoardListenerThread: process %s', command)
                 command.receive(self.protocol)
                 command.process()
+                self._frames.inc()
 
                 if command_code == MessageCode.ACK:
+                    if self.inflight:
+                        written, span = self.inflight.popleft()
+                        self._rtt.observe((time.perf_counter_ns() - written) / 1e9)
+                        if span:
+                            span.stamp(tracing.ACKED)
                     self.n_received_semaphore.release()
             time.sleep(_RATE)
         logger.debug('BoardListenerThread: thread stops.')
@@ -14,9 +14,9 @@ A command is represented by a unique 8bit identifier. Those are defined via the
 Commands are detected when the package is imported for the first time and globally available via the commandFactory.
 """
 from abc import abstractmethod
-from typing import Any
+from typing import Any, cast
 
-from hermes.core import logger
+from hermes.core import plugins
 from hermes.core.dictionary import MessageCode
 from hermes.core.logger import HermesError
 from hermes.core.plugins import AbstractPlugin
@@ -55,12 +55,9 @@ class CommandFactory(metaclass=MetaSingleton):
     """Command factory class: instantiates a Command of a given type."""
 
     def __init__(self) -> None:
+        # The commands by code, instantiated on first use: their plugin module is only imported then (@see plugins).
         self.__commands: dict[MessageCode, AbstractCommand] = {}
 
-        # Self registers all AbstractCommand defined plugins.
-        for command in AbstractCommand.plugins:
-            self.__commands[command().code] = command()
-
     def get_by_code(self, code: MessageCode) -> AbstractCommand:
         """
         Instantiate a AbstractCommand based on a given MessageCode.
@@ -73,11 +70,12 @@ class CommandFactory(metaclass=MetaSingleton):
 
         **See Also:**  :class:`MessageCode`
         """
-        command = self.__commands.get(code)
-        if command is None:
-            logger.error(f'Command {code} do not exists.')
-            raise CommandError(f'Command with code `{code}` do not exists.')
-        return command
+        if code not in self.__commands:
+            plugin = plugins.by_code('commands', code)
+            if plugin is None:
+                raise CommandError(f'Command with code `{code}` do not exists.')
+            self.__commands[code] = cast(AbstractCommand, plugin())
+        return self.__commands[code]
 
     def get_by_name(self, name: str) -> AbstractCommand:
         """
@@ -91,9 +89,11 @@ class CommandFactory(metaclass=MetaSingleton):
 
         **See Also:** :class:`MessageCode`
         """
+        for entry in plugins.entries('commands'):
+            if entry.code is not None:
+                self.get_by_code(MessageCode(entry.code))
         command = next((command for command in self.__commands.values() if command.name == name), None)
         if command is None:
-            logger.error(f'Command {name} do not exists.')
             raise CommandError(f'Command with name `{name}` do not exists.')
         return command
 
@@ -0,0 +1,122 @@
+"""
+Admin module.
+This module contains the administration routes of the server: runtime switches and introspection of the application
+while it is running.
+"""
+from typing import Annotated, Any
+
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import PlainTextResponse, Response
+
+from hermes.core import logger, profiling, tracing
+from hermes.core.logger import HermesError
+
+
+def init(app: FastAPI) -> None:
+    """Define and attach the admin routes associated with a fastAPI server."""
+    _init_logs(app)
+    _init_tracing(app)
+    _init_profiling(app)
+    _init_profiles(app)
+
+
+def _init_logs(app: FastAPI) -> None:
+    """Define the routes of the logs: trace switches and error counters."""
+
+    @app.get('/admin/traces')
+    def get_traces() -> dict[str, bool]:
+        """Return the trace switches per subsystem."""
+        return logger.traces()
+
+    @app.put('/admin/traces/{channel}')
+    def set_trace(channel: str, enabled: bool = True) -> dict[str, bool]:
+        """Switch on/off the traces of a subsystem (ex: PUT /admin/traces/protocol?enabled=false)."""
+        try:
+            logger.set_trace(channel, enabled)
+        except HermesError as error:
+            raise HTTPException(status_code=404, detail=str(error)) from error
+        return logger.traces()
+
+    @app.get('/admin/errors')
+    def get_errors() -> dict[str, dict[str, int]]:
+        """Return the error event counters per key: total count and number of logged ones."""
+        return logger.errors()
+
+
+def _init_tracing(app: FastAPI) -> None:
+    """Define the routes of the action tracing (@see tracing)."""
+
+    @app.get('/admin/tracing')
+    def get_tracing() -> dict[str, Any]:
+        """Return whether the actions are traced, and the latency breakdown (in ms) per stage of the traced ones."""
+        return {'enabled': tracing.enabled(), 'summary': tracing.summary()}
+
+    @app.put('/admin/tracing')
+    def set_tracing(
+            enabled: bool = True, capacity: Annotated[int, Query(gt=0, le=tracing.MAX_CAPACITY)] = 10000,
+    ) -> dict[str, Any]:
+        """Switch on/off the tracing of the actions (ex: PUT /admin/tracing?enabled=true&capacity=1000)."""
+        if enabled:
+            tracing.enable(capacity)
+        else:
+            tracing.disable()
+        return get_tracing()
+
+    @app.get('/admin/tracing/export')
+    def export_tracing() -> dict[str, Any]:
+        """Return the traced actions in the Chrome trace format (to be loaded in https://ui.perfetto.dev)."""
+        return tracing.export()
+
+
+def _init_profiling(app: FastAPI) -> None:
+    """Define the routes of the profiling sessions (@see profiling)."""
+
+    @app.get('/admin/profiling')
+    def get_profiling() -> dict[str, Any]:
+        """Return whether a profiling session is running, and a summary of the last one."""
+        return profiling.status()
+
+    @app.post('/admin/profiling/start')
+    def start_profiling(interval: float = 0.005) -> dict[str, Any]:
+        """Start a sampling profiling session of all the threads (ex: POST /admin/profiling/start?interval=0.001)."""
+        try:
+            profiling.start(interval)
+        except ValueError as error:
+            raise HTTPException(status_code=400, detail=str(error)) from error
+        except HermesError as error:
+            raise HTTPException(status_code=409, detail=str(error)) from error
+        return profiling.status()
+
+    @app.post('/admin/profiling/stop')
+    def stop_profiling() -> dict[str, Any]:
+        """Stop the running profiling session and return its summary."""
+        try:
+            return profiling.stop()
+        except HermesError as error:
+            raise HTTPException(status_code=409, detail=str(error)) from error
+
+
+def _init_profiles(app: FastAPI) -> None:
+    """Define the download routes of the last profiling session, per format."""
+
+    @app.get('/admin/profiling/folded', response_class=PlainTextResponse)
+    def download_folded() -> str:
+        """Return the last profiling session as folded stacks (for flamegraph.pl, speedscope, etc.)."""
+        try:
+            return profiling.folded()
+        except HermesError as error:
+            raise HTTPException(status_code=404, detail=str(error)) from error
+
+    @app.get('/admin/profiling/pstats')
+    def download_pstats() -> Response:
+        """Return the last profiling session as a pstats file (for pstats, snakeviz, etc.)."""
+        try:
+            content = profiling.pstats()
+        except HermesError as error:
+            raise HTTPException(status_code=404, detail=str(error)) from error
+        return Response(content, media_type='application/octet-stream', headers={
+            'Content-Disposition': 'attachment; filename="hermes.pstats"',
+        })
+
+
+__ALL__ = ['init']
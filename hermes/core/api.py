@@ -1,41 +1,291 @@
 """
 API package.
 This package contains all definition and API specific implementation.
+
+The API does not depend on any presentation layer: the GUI (if any) follows the device state changes by registering an
+observer (@see observe()), so the engine can run headless.
 """
+import time
+from collections.abc import Callable
 from typing import Any
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi_socketio import SocketManager
-from nicegui import ui
+from pydantic import BaseModel
 
-from hermes.core import logger
+from hermes.core import (
+    broadcast,
+    codec,
+    hardware,
+    index,
+    logger,
+    metrics,
+    persistence,
+    profiling,
+    snapshot,
+    statetable,
+    tracing,
+)
 from hermes.core.config import settings
-from hermes.core.logger import HermesError
+from hermes.core.logger import HermesError, TraceChannel
+from hermes.core.struct import EnqueueResult
 
 _SOCKET: SocketManager
 
+_ACTIONS = metrics.counter('hermes_api_actions_total', 'Number of actions requested by the clients.', ['status'])
+_ACTION_LATENCY = metrics.histogram('hermes_api_action_seconds', 'Time to process an action, up to its broadcast.')
+_CLIENTS = metrics.gauge('hermes_api_clients', 'Number of connected socket.io clients.')
+
+# The functions called with the devices whose state changed (@see observe()).
+_OBSERVERS: list[Callable[[list[Any]], None]] = []
+
+
+def observe(observer: Callable[[list[Any]], None]) -> None:
+    """
+    Register a function to be called with the devices whose state changed (ex: the GUI refreshing their widgets).
+
+    :param callable observer: the function, called from the event loop with the list of the changed devices.
+    """
+    if observer not in _OBSERVERS:
+        _OBSERVERS.append(observer)
+
+
+def _notify(devices: list[Any]) -> None:
+    """Notify the observers of the devices whose state changed."""
+    for observer in _OBSERVERS:
+        observer(devices)
 
-async def action(cid: str, board_id: int, device_id: int, value: Any) -> None:
+
+async def _emit(event: str, payload: Any, skip_sid: str | None = None) -> None:
+    """
+    Emit a message to all the clients (but the one given), each in the encoding it negotiated (@see codec).
+
+    :param str event:       the event name.
+    :param any payload:     the message payload, as given to `emit()` (a tuple for several arguments).
+    :param str skip_sid:    the client not to send the message to (ex: the one it originates from).
+    """
+    binary = [cid for cid in codec.clients() if cid != skip_sid]
+    if not binary:
+        await _SOCKET.emit(event, payload, skip_sid=skip_sid)
+        return
+    await _SOCKET.emit(event, payload, skip_sid=[skip_sid, *binary])
+    packed = codec.packb(payload)
+    for cid in binary:
+        await _SOCKET.emit(event, packed, to=cid)
+
+
+async def _mutate(
+        board_id: int, device_id: int, value: Any, span: tracing.Span | None,
+) -> tuple[index.DeviceHandle, EnqueueResult]:
+    """
+    Send a mutation to its board, or to the hardware daemon owning the board: returns the device and the outcome.
+
+    :raise HermesError: there is no such device, or the mutation could not be performed.
+    """
+    handle = index.get(board_id, device_id)
+    if handle is None:
+        raise HermesError(f'Board {board_id}: no device {device_id}.')
+    if not hardware.remote():
+        return handle, handle.send(value, span)
+    result = await hardware.action(board_id, device_id, value)
+    if result is None:
+        raise HermesError(f'Board {board_id}: the hardware daemon could not perform the mutation.')
+    return handle, result
+
+
+async def action(cid: str, board_id: int, device_id: int, value: Any) -> EnqueueResult | None:
     """
     Perform an action on the given board.
 
+    This never blocks the event loop: the command is queued for the board (its connexion being opened in the
+    background if needed), or rejected if the board cannot keep up (@see AbstractBoard.send()). In a web worker, the
+    command is performed by the hardware daemon owning the board (@see hardware).
+
     :param str cid:         the client id requesting the action.
     :param int board_id:    the board id to perform the action on.
     :param int device_id:   the device id to perform the action on.
     :param any value:       the value to change to.
+
+    :return EnqueueResult: accepted, coalesced (replaces a command of the device not sent yet) or rejected (the
+        board queue is full: the state is unchanged), None if the action is invalid.
     """
-    logger.debug(f'Client {cid}: Mutation with parameter: {board_id} {device_id} {value}')
+    logger.trace(TraceChannel.API, 'Client %s: Mutation with parameter: %s %s %s', cid, board_id, device_id, value)
+    start = time.perf_counter()
+    span = tracing.start(board_id, device_id)
     try:
-        device: Any = settings.get(['boards', board_id, 'actions', device_id])
-        device.set_value(board_id, value)
-        # @todo implement and use set()
-        settings.get('boards')[board_id].actions[device_id].state = value
-        ui.update(device.gui_actions)
-        await _SOCKET.emit('action', (board_id, device_id, value), skip_sid=cid)
-    except HermesError as error:
+        handle, result = await _mutate(board_id, device_id, value, span)
+    except (AttributeError, TypeError, ValueError, OverflowError, HermesError) as error:
+        _ACTIONS.labels('error').inc()
         HermesError(f'API ERROR: Client {cid}: Mutation error: "{error}".')
-        pass
+        return None
+    if result is EnqueueResult.REJECTED:
+        _ACTIONS.labels(result.value).inc()
+        logger.report('BoardBusy', 'API: Client %s: board %s is busy, mutation rejected.', cid, board_id)
+        return result
+    device = handle.device
+    device.state = value
+    snapshot.record(board_id, device_id, value)
+    statetable.publish([[board_id, device_id, value]])
+    persistence.record([[board_id, device_id, value]])
+    if _OBSERVERS:
+        _notify([device])
+    if broadcast.enabled():
+        broadcast.publish(board_id, device_id, value, cid)
+    else:
+        await _emit('action', (board_id, device_id, value), cid)
+    _ACTION_LATENCY.observe(time.perf_counter() - start)
+    _ACTIONS.labels(result.value).inc()
+    return result
+
+
+class Mutation(BaseModel):
+    """A mutation of a device, as accepted by the `/actions` REST endpoint."""
+
+    board_id: int
+    device_id: int
+    value: Any
+
+
+# A validated mutation: board_id, device_id, device, value.
+_Mutation = tuple[int, int, Any, Any]
+# The commands of a batch, per board id (@see AbstractBoard.send_batch()).
+_Commands = dict[int, list[tuple[bytearray, tracing.Span | None]]]
+
+
+def _validate(mutations: Any) -> tuple[list[_Mutation], _Commands, list[str]]:
+    """
+    Validate a batch of mutations, and encode their commands.
+
+    :return tuple: the validated mutations, their commands per board, and the validation errors.
+    """
+    if not isinstance(mutations, list | tuple):
+        return [], {}, [f'Expected a list of [board_id, device_id, value] mutations, got {type(mutations).__name__}.']
+    valid: list[_Mutation] = []
+    commands: _Commands = {}
+    errors = []
+    for position, mutation in enumerate(mutations):
+        if not isinstance(mutation, list | tuple) or len(mutation) != 3:  # noqa: PLR2004 (a triple)
+            errors.append(f'Mutation #{position}: expected [board_id, device_id, value], got {mutation!r}.')
+            continue
+        board_id, device_id, value = mutation
+        handle = index.get(board_id, device_id) if isinstance(board_id, int) and isinstance(device_id, int) else None
+        if handle is None:
+            errors.append(f'Mutation #{position}: no device {device_id!r} on board {board_id!r}.')
+            continue
+        try:
+            command = handle.encode(value)
+        except (AttributeError, TypeError, ValueError, OverflowError) as error:
+            errors.append(f'Mutation #{position}: invalid value {value!r} for device {device_id}: {error}.')
+            continue
+        commands.setdefault(board_id, []).append((command, tracing.start(board_id, device_id)))
+        valid.append((board_id, device_id, handle.device, value))
+    return valid, commands, errors
+
+
+async def _dispatch(cid: str, mutations: list[_Mutation], commands: _Commands) -> tuple[list[_Mutation], list[str]]:
+    """
+    Send the commands of a validated batch to their boards, or to the hardware daemon owning them: all or none, as
+    far as possible.
+
+    No command is sent if a board is busy. A board can still get busy meanwhile (its queue is also filled by other
+    threads, ex: @see watcher): its commands are then rejected, while the ones accepted by the other boards are kept.
+    In a web worker, the mutations performed by the daemons are pushed back as changes (@see hardware.batch()).
+
+    :return tuple: the mutations sent, and the errors (ex: busy boards).
+    """
+    if hardware.remote():
+        remote_mutations: dict[int, list[list[Any]]] = {}
+        for board_id, device_id, _, value in mutations:
+            remote_mutations.setdefault(board_id, []).append([device_id, value])
+        errors = await hardware.batch(remote_mutations)
+        return ([], errors) if errors else (mutations, [])
+
+    boards: Any = settings.get('boards')
+    busy = [board_id for board_id in commands if boards[board_id].busy()]
+    if busy:
+        logger.report('BoardBusy', 'API: Client %s: boards %s are busy, batch mutation rejected.', cid, busy)
+        return [], [f'Board {board_id} is busy.' for board_id in busy]
+    rejected = [
+        board_id for board_id, board_commands in commands.items()
+        if boards[board_id].send_batch(board_commands) is EnqueueResult.REJECTED
+    ]
+    if rejected:
+        logger.report('BoardBusy', 'API: Client %s: boards %s got busy, batch mutation rejected.', cid, rejected)
+    return [mutation for mutation in mutations if mutation[0] not in rejected], [
+        f'Board {board_id} is busy.' for board_id in rejected
+    ]
+
+
+async def actions(cid: str, mutations: list[tuple[int, int, Any]]) -> list[str]:
+    """
+    Perform several actions at once (ex: all the servos of a pose).
+
+    The mutations are validated together: if any of them is invalid, none is performed. Likewise, none is performed
+    if one of the boards is busy (its command queue is full), but for a board getting busy meanwhile (@see _dispatch()):
+    only its mutations are rejected then. Valid mutations are sent per board in as few frames as
+    possible, without blocking (@see AbstractBoard.send_batch()), and broadcast to the other clients at once
+    (@see broadcast).
+
+    :param str cid:                 the client id requesting the actions.
+    :param list mutations:          the mutations, as (board_id, device_id, value) triples.
+
+    :return list[str]: the validation errors, or the busy boards (empty if the actions were performed).
+    """
+    start = time.perf_counter()
+    valid, commands, errors = _validate(mutations)
+    if errors:
+        _ACTIONS.labels('error').inc(len(valid) + len(errors))
+        HermesError(f'API ERROR: Client {cid}: Batch mutation rejected: {errors}')
+        return errors
+    logger.trace(TraceChannel.API, 'Client %s: Batch of %s mutations.', cid, len(valid))
+
+    sent, errors = await _dispatch(cid, valid, commands)
+    if errors:
+        _ACTIONS.labels(EnqueueResult.REJECTED.value).inc(len(valid) - len(sent))
+    if not sent:
+        return errors
+
+    for board_id, device_id, device, value in sent:
+        device.state = value
+        snapshot.record(board_id, device_id, value)
+    changes = [[board_id, device_id, value] for board_id, device_id, _, value in sent]
+    statetable.publish(changes)
+    persistence.record(changes)
+    if _OBSERVERS:
+        _notify([device for _, _, device, _ in sent])
+    if broadcast.enabled():
+        for board_id, device_id, value in changes:
+            broadcast.publish(board_id, device_id, value, cid)
+    else:
+        await _emit('actions', changes, cid)
+    _ACTION_LATENCY.observe(time.perf_counter() - start)
+    _ACTIONS.labels(EnqueueResult.ACCEPTED.value).inc(len(sent))
+    return errors
+
+
+async def changed(changes: list[list[Any]]) -> None:
+    """
+    Apply the device state changes made outside of this process (ex: by another web worker, @see hardware), and
+    broadcast them to the clients.
+
+    :param list changes: the changes, as [board_id, device_id, value] triples.
+    """
+    changed_devices = []
+    for board_id, device_id, value in changes:
+        handle = index.get(board_id, device_id)
+        if handle is None:
+            continue
+        device = handle.device
+        device.state = value
+        snapshot.record(board_id, device_id, value)
+        changed_devices.append(device)
+        if broadcast.enabled():
+            broadcast.publish(board_id, device_id, value, '')
+    if _OBSERVERS:
+        _notify(changed_devices)
+    if not broadcast.enabled():
+        await _emit('actions', changes)
 
 
 def init(app: FastAPI) -> None:
@@ -43,6 +293,9 @@ def init(app: FastAPI) -> None:
     global _SOCKET  # noqa: PLW0603
 
     _SOCKET = SocketManager(app=app, mount_location='/api', cors_allowed_origins=[])
+    rate: Any = settings.get(['global', 'api', 'broadcast_rate'], 30)
+    broadcast.init(_SOCKET, float(rate))
+    _init_hardware(app)
     app.add_middleware(
         CORSMiddleware,
         allow_origins=['*'],
@@ -50,15 +303,51 @@ def init(app: FastAPI) -> None:
         allow_credentials=True,
         allow_headers=['*'],
     )
+    _init_socket()
+    _init_mutations(app)
+
+
+def _init_hardware(app: FastAPI) -> None:
+    """Connect to the hardware daemon(s) owning the boards, if any, on startup."""
+    ipc = settings.get(['hardware', 'ipc'], [])
+    token: Any = settings.get(['hardware', 'token'], None)
+    if ipc:
+        @app.on_event('startup')
+        async def connect_hardware() -> None:
+            """Run as a web worker of the hardware daemon(s)."""
+            for address in ipc:
+                hardware.connect(address, changed, token)
+
+
+def _init_socket() -> None:
+    """Define the socket.io events of the client sessions: connexion, encoding, handshake."""
 
     @_SOCKET.on('connect')  # type: ignore[misc]
-    async def connect(cid: str, *args: Any, **kwargs: Any) -> None:
-        logger.debug(f'Socket client {cid}: new client connected.')
-        await handshake(cid)
+    async def connect(cid: str, environ: Any = None, auth: Any = None, *args: Any, **kwargs: Any) -> None:
+        """
+        Handshake with the new client.
+        A reconnecting client can give the last snapshot version it knows in its auth data: `{version: ...}`, and the
+        encoding of the messages it wants: `{encoding: 'msgpack'}` (@see codec).
+        """
+        logger.trace(TraceChannel.API, 'Socket client %s: new client connected.', cid)
+        _CLIENTS.inc()
+        auth = auth if isinstance(auth, dict) else {}
+        codec.negotiate(cid, auth.get('encoding'))
+        broadcast.connect(cid)
+        await handshake(cid, auth.get('version'))
 
     @_SOCKET.on('disconnect')  # type: ignore[misc]
     def disconnect(cid: str, *args: Any, **kwargs: Any) -> None:
-        logger.debug(f'Socket client {cid}: client disconnected.')
+        logger.trace(TraceChannel.API, 'Socket client %s: client disconnected.', cid)
+        _CLIENTS.dec()
+        broadcast.disconnect(cid)
+        codec.forget(cid)
+
+    @_SOCKET.on('encoding')  # type: ignore[misc]
+    def encoding(cid: str, name: str, *args: Any, **kwargs: Any) -> str:
+        """Switch the encoding of the messages exchanged with the client: answers with the encoding in use."""
+        logger.trace(TraceChannel.API, 'Socket client %s: asks for encoding %s.', cid, name)
+        return codec.negotiate(cid, name).value
 
     @_SOCKET.on('ping')  # type: ignore[misc]
     def ping(cid: str) -> None:
@@ -69,19 +358,65 @@ def init(app: FastAPI) -> None:
         _SOCKET.emit('pong', to=cid)
 
     @_SOCKET.on('handshake')  # type: ignore[misc]
-    async def handshake(cid: str, *args: Any, **kwargs: Any) -> None:
-        """Pushes all current config to the client."""
-        logger.debug(f'Socket client {cid}: ask for handshake.')
-        await _SOCKET.emit('handshake', (
-            settings.get('global'),
-            settings.get('profile'),
-            {key: board.serialize() for key, board in settings.get('boards').items()},
-            settings.get('groups'),
-        ))
+    async def handshake(cid: str, version: str | None = None, *args: Any, **kwargs: Any) -> None:
+        """
+        Pushes all current config to the client, along with the snapshot version (@see snapshot).
+
+        A client giving the last snapshot version it knows only receives the device changes since that version, via a
+        `handshake_delta` event (version, [[board_id, device_id, value], ...]), when those are still known.
+        """
+        logger.trace(TraceChannel.API, 'Socket client %s: ask for handshake (version %s).', cid, version)
+        changes = snapshot.delta(version) if version is not None else None
+        if changes is not None:
+            await _SOCKET.emit('handshake_delta', codec.encode(cid, (snapshot.version(), changes)), to=cid)
+            return
+        with profiling.timed('api_handshake'):
+            payload = codec.encode(cid, (
+                settings.get('global'),
+                settings.get('profile'),
+                snapshot.boards(),
+                settings.get('groups'),
+                snapshot.version(),
+            ))
+        await _SOCKET.emit('handshake', payload, to=cid)
+
+
+def _init_mutations(app: FastAPI) -> None:
+    """Define the mutation events (socket.io) and routes (REST)."""
 
     @_SOCKET.on('action')  # type: ignore[misc]
-    async def _action(cid: str, board_id: int, command_id: int, value: Any, *args: Any, **kwargs: Any) -> None:
-        await action(cid, board_id, command_id, value)
+    async def _action(cid: str, board_id: Any, command_id: int = 0, value: Any = None, *args: Any, **kwargs: Any) -> str:
+        """
+        Perform a mutation: (board_id, device_id, value), or a binary [board_id, device_id, value] (@see codec).
+        Answers with the outcome: accepted, coalesced, rejected or error (@see action()).
+        """
+        try:
+            if isinstance(board_id, bytes | bytearray):
+                board_id, command_id, value = codec.decode(board_id)
+            else:
+                codec.validate(value)
+        except (HermesError, TypeError, ValueError):
+            _ACTIONS.labels('error').inc()
+            HermesError(f'API ERROR: Client {cid}: Malformed action.')
+            return 'error'
+        result = await action(cid, board_id, command_id, value)
+        return result.value if result else 'error'
+
+    @_SOCKET.on('actions')  # type: ignore[misc]
+    async def _actions(cid: str, mutations: list[tuple[int, int, Any]], *args: Any, **kwargs: Any) -> list[str]:
+        """Perform a batch of [board_id, device_id, value] mutations: answers with the validation errors, if any."""
+        try:
+            return await actions(cid, codec.decode(mutations))
+        except codec.CodecError as error:
+            return [str(error)]
+
+    @app.post('/actions')
+    async def post_actions(mutations: list[Mutation]) -> dict[str, int]:
+        """Perform a batch of mutations (REST equivalent of the socket.io `actions` event)."""
+        errors = await actions('rest', [(item.board_id, item.device_id, item.value) for item in mutations])
+        if errors:
+            raise HTTPException(status_code=422, detail=errors)
+        return {'performed': len(mutations)}
 
 
-__ALL__ = ['init', 'action']
+__ALL__ = ['init', 'observe', 'action', 'actions', 'changed']
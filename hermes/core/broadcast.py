@@ -0,0 +1,162 @@
+"""
+Broadcast module.
+
+Schedules the broadcast of the device state changes to the socket.io clients.
+
+Rather than emitting one message per mutation to every client, state changes are collected in a dirty set and
+flushed at a fixed rate (the `api.broadcast_rate` global setting, in Hz): each flush sends to each client a single
+`actions` event holding the latest value of each device changed since its previous message (ex: a slider drag only
+sends the value reached at each tick).
+
+Clients are sent their changes independently: a client still busy with its previous messages (slow network, slow
+device, etc.) is skipped on that tick and its changes keep being coalesced. It then receives only the latest values
+once it catches up, instead of building up a send buffer of stale intermediate values.
+
+A client is busy while more than `_MAX_BACKLOG` of its messages are not acknowledged: each `actions` broadcast asks
+for a socket.io acknowledgement (the client handler calls the ack function once applied). An acknowledgement that does
+not come within `_ACK_TIMEOUT` seconds is given up on, so a client that never acknowledges is only slowed down.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from typing import Any
+
+from fastapi_socketio import SocketManager
+
+from hermes.core import codec, logger, metrics
+from hermes.core.logger import TraceChannel
+
+# Maximum number of messages not acknowledged by a client before it is considered busy.
+_MAX_BACKLOG = 1
+# Time (in seconds) after which an acknowledgement is not waited for anymore.
+_ACK_TIMEOUT = 5
+
+# A device key: (board_id, device_id).
+_Key = tuple[int, int]
+
+_SOCKET: SocketManager | None = None
+_RATE: float = 0
+# The changes since the last flush: latest value and client at the origin of the change, per device.
+_DIRTY: dict[_Key, tuple[Any, str]] = {}
+# The changes not sent yet, per connected client.
+_PENDING: dict[str, dict[_Key, Any]] = {}
+# The clients with a message being sent.
+_BUSY: set[str] = set()
+# The send times of the messages not acknowledged yet, per connected client (oldest first).
+_UNACKED: dict[str, deque[float]] = {}
+_TASK: asyncio.Task[None] | None = None
+
+_MESSAGES = metrics.counter('hermes_api_broadcast_messages_total', 'Number of state messages sent to the clients.')
+_SKIPPED = metrics.counter(
+    'hermes_api_broadcast_skipped_total', 'Number of times a busy client was skipped by a broadcast flush.',
+)
+
+
+def init(socket: SocketManager, rate: float) -> None:
+    """
+    Initialize the broadcast scheduler.
+
+    :param SocketManager socket: The socket.io server.
+    :param float rate: The flush rate (in Hz): 0 disables the scheduler (@see enabled()).
+    """
+    global _SOCKET, _RATE  # noqa: PLW0603
+    _SOCKET = socket
+    _RATE = rate
+
+
+def enabled() -> bool:
+    """Return whether the state changes are broadcast by the scheduler (otherwise, each change is sent right away)."""
+    return _RATE > 0
+
+
+def connect(cid: str) -> None:
+    """Register a client to the broadcasts: starts the scheduler on the first one."""
+    global _TASK  # noqa: PLW0603
+    _PENDING[cid] = {}
+    _UNACKED[cid] = deque()
+    if _TASK is None or _TASK.done():
+        _TASK = asyncio.get_running_loop().create_task(_run())
+
+
+def disconnect(cid: str) -> None:
+    """Unregister a client from the broadcasts."""
+    _PENDING.pop(cid, None)
+    _UNACKED.pop(cid, None)
+    _BUSY.discard(cid)
+
+
+def publish(board_id: int, device_id: int, value: Any, origin: str) -> None:
+    """
+    Mark a device as changed: its value will be sent to all the clients but the origin one on the next flush.
+
+    :param int board_id:    the board id of the device.
+    :param int device_id:   the device id.
+    :param any value:       the new value.
+    :param str origin:      the client id at the origin of the change.
+    """
+    if _PENDING:
+        _DIRTY[(board_id, device_id)] = (value, origin)
+
+
+async def _run() -> None:
+    """Flush the changes at the configured rate, as long as there are clients."""
+    while _PENDING:
+        await asyncio.sleep(1 / _RATE)
+        flush()
+
+
+def flush() -> None:
+    """Send its pending changes to each client that is not busy."""
+    global _DIRTY
+    dirty, _DIRTY = _DIRTY, {}
+    for cid, pending in _PENDING.items():
+        for key, (value, origin) in dirty.items():
+            if origin != cid:
+                pending[key] = value
+        if not pending:
+            continue
+        if cid in _BUSY or _backlog(cid) > _MAX_BACKLOG:
+            _SKIPPED.inc()
+            continue
+        changes = [[board_id, device_id, value] for (board_id, device_id), value in pending.items()]
+        pending.clear()
+        _BUSY.add(cid)
+        asyncio.get_running_loop().create_task(_send(cid, changes))
+
+
+async def _send(cid: str, changes: list[list[Any]]) -> None:
+    """Send changes to a client."""
+    try:
+        logger.trace(TraceChannel.API, 'Socket client %s: broadcast %s changes.', cid, len(changes))
+        unacked = _UNACKED.get(cid)
+        if unacked is not None:
+            unacked.append(time.monotonic())
+        await _SOCKET.emit(  # type: ignore[union-attr]
+            'actions', codec.encode(cid, changes), to=cid, callback=lambda *_: _acknowledge(cid),
+        )
+        _MESSAGES.inc()
+    finally:
+        _BUSY.discard(cid)
+
+
+def _acknowledge(cid: str) -> None:
+    """Record that a client acknowledged its oldest message (@see _send())."""
+    unacked = _UNACKED.get(cid)
+    if unacked:
+        unacked.popleft()
+
+
+def _backlog(cid: str) -> int:
+    """Return the number of messages not acknowledged by a client: the timed out ones are given up on."""
+    unacked = _UNACKED.get(cid)
+    if unacked is None:
+        return 0
+    expired = time.monotonic() - _ACK_TIMEOUT
+    while unacked and unacked[0] < expired:
+        unacked.popleft()
+    return len(unacked)
+
+
+__ALL__ = ['init', 'enabled', 'connect', 'disconnect', 'publish', 'flush']
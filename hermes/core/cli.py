@@ -1,9 +1,11 @@
 """Get cli arguments used when starting the project."""
 import argparse
+import os
 from pathlib import Path
 from typing import Any
 
 from hermes import __version__
+from hermes.core.helpers import ROOT_DIR
 
 
 def _get_cli_args() -> dict[str, Any]:
@@ -26,7 +28,31 @@ def _get_cli_args() -> dict[str, Any]:
                         help='A list of trusted hosts')
     parser.add_argument('--dev', action='store_true', dest='dev', help='Server development mode')
     parser.add_argument('--open', action='store_true', dest='open', help='Open the GUI in browser on startup')
+    parser.add_argument('--headless', action='store_true', dest='headless',
+                        help='Run without the GUI: only the realtime API is served (smaller memory footprint)')
     parser.add_argument('--debug', action='store_true', dest='debug')
+    parser.add_argument('--async-log', action='store_true', dest='async_log',
+                        help='Write logs from a background thread (log I/O never delays the application)')
+    parser.add_argument('--daemon', action='store_true', dest='daemon',
+                        help='Run the hardware daemon only: owns the boards and serves the web workers (needs --ipc)')
+    parser.add_argument('--ipc', action='append', dest='ipc', default=[],
+                        help='Unix socket or TCP address (host:port) of a hardware daemon: where it listens with '
+                             '--daemon, otherwise run as a web worker of that daemon (repeat it to coordinate several '
+                             'agents)')
+    parser.add_argument('--ipc-token', action='store', dest='ipc_token', default=os.environ.get('HERMES_IPC_TOKEN'),
+                        help='Shared token between the hardware daemons and their web workers (default: the '
+                             'HERMES_IPC_TOKEN environment variable); required for a daemon listening on a '
+                             'non-loopback TCP address')
+    parser.add_argument('--own', action='store', dest='own', nargs='*', type=int, default=None,
+                        help='With --daemon, the ids of the boards owned by the daemon (default: all of them)')
+    parser.add_argument('--state-table', action='store', dest='state_table', default=None,
+                        help='Publish the device states in the shared memory segment of that name (for other '
+                             'processes to read them, @see core.statetable)')
+    parser.add_argument('--state-file', action='store', dest='state_file', default=f'{ROOT_DIR}/.cache/states.json',
+                        help='File the device states are persisted in, to restore them on restart (an empty value '
+                             'disables the persistence)')
+    parser.add_argument('--watch', action='store_true', dest='watch',
+                        help='Watch the configuration files and apply their changes without a restart')
     parser.add_argument('--help', action='help', default=argparse.SUPPRESS, help='Show this help message and exit')
 
     parser.add_argument('--version',
@@ -45,10 +71,21 @@ def _get_cli_args() -> dict[str, Any]:
 
     return {
         'debug': _args['debug'],
+        'async_log': _args['async_log'],
+        'watch': _args['watch'],
+        'hardware': {
+            'daemon': _args['daemon'],
+            'ipc': _args['ipc'],
+            'own': _args['own'],
+            'token': _args['ipc_token'],
+            'state_table': _args['state_table'],
+            'state_file': _args['state_file'],
+        },
         'server': {
             'host': _args['host'],
             'port': _args['port'],
-            'open': _args['open'],
+            'open': _args['open'] and not _args['headless'],
+            'headless': _args['headless'],
             'reload': _args['dev'],
             'trusted': _args['trusted'],
             'ssl': _args['ssl'],
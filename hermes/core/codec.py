@@ -0,0 +1,170 @@
+"""
+Codec module.
+
+Binary encoding of the realtime API messages, as an alternative to the default JSON encoding of socket.io.
+
+The encoding is negotiated per client (@see negotiate()): a client asking for the `msgpack` encoding receives each
+message of the realtime API (`handshake`, `handshake_delta`, `action`, `actions`) as a single binary MessagePack payload
+(https://msgpack.org) instead of JSON arguments, and may send its `action` / `actions` events the same way.
+
+MessagePack is provided by the `msgpack` package (with its compiled extension where available): the output is standard
+MessagePack, hence decoded by any client library (ex: @msgpack/msgpack).
+
+Values received from the clients are rejected when nested deeper than `MAX_DEPTH` (@see validate()).
+
+Compared to JSON, device changes ([board_id, device_id, value] triples) shrink to 4-6 bytes each instead of 10-15,
+and the handshake loses its quotes and separators (@see benchmarks.codec).
+"""
+from __future__ import annotations
+
+from typing import Any
+
+import msgpack
+
+from hermes.core.logger import HermesError
+from hermes.core.struct import StringEnum
+
+
+class Encoding(StringEnum):
+    """The encodings of the realtime API messages."""
+
+    JSON = 'json'
+    MSGPACK = 'msgpack'
+
+
+class CodecError(HermesError):
+    """Error raised when a payload cannot be encoded or decoded."""
+
+
+# The encoding of each client that negotiated a binary one.
+_ENCODINGS: dict[str, Encoding] = {}
+
+# Maximum nesting of the values received from the clients.
+MAX_DEPTH = 16
+
+
+def negotiate(cid: str, encoding: Any) -> Encoding:
+    """
+    Set the encoding of the messages exchanged with a client: unknown encodings fall back to JSON.
+
+    :param str cid:         the client id.
+    :param any encoding:    the encoding asked for by the client.
+
+    :return Encoding: the encoding used for the client.
+    """
+    try:
+        selected = Encoding(encoding)
+    except ValueError:
+        selected = Encoding.JSON
+    if selected is Encoding.JSON:
+        _ENCODINGS.pop(cid, None)
+    else:
+        _ENCODINGS[cid] = selected
+    return selected
+
+
+def forget(cid: str) -> None:
+    """Drop the negotiated encoding of a disconnected client."""
+    _ENCODINGS.pop(cid, None)
+
+
+def encoding(cid: str) -> Encoding:
+    """Return the encoding of the messages exchanged with a client."""
+    return _ENCODINGS.get(cid, Encoding.JSON)
+
+
+def encode(cid: str, payload: Any) -> Any:
+    """
+    Encode the payload of a message to a client, according to its encoding.
+
+    :param str cid:         the client id.
+    :param any payload:     the message payload, as given to `emit()` (a tuple for several arguments).
+
+    :return any: the payload unchanged for JSON clients, a single binary MessagePack value for the others (several
+        arguments being packed as an array).
+    """
+    if cid in _ENCODINGS:
+        return packb(payload)
+    return payload
+
+
+def clients() -> list[str]:
+    """Return the clients that negotiated a binary encoding."""
+    return list(_ENCODINGS)
+
+
+def decode(payload: Any) -> Any:
+    """
+    Decode the payload of a message from a client: binary payloads are MessagePack, others are left as is.
+
+    :raise CodecError: the payload is malformed or too deeply nested (@see validate()).
+    """
+    if isinstance(payload, bytes | bytearray):
+        payload = unpackb(payload)
+    return validate(payload)
+
+
+def validate(value: Any) -> Any:
+    """
+    Check that a value received from a client is not nested deeper than `MAX_DEPTH` (without recursion): deeper values
+    would exhaust the stack of the (recursive) encoders of the messages they are sent back in. MessagePack timestamps
+    are rejected as well (@see unpackb()).
+
+    :raise CodecError: the value is too deeply nested, or holds a timestamp.
+    """
+    pending = [(value, 1)]
+    while pending:
+        item, depth = pending.pop()
+        if isinstance(item, dict):
+            children = [*item.keys(), *item.values()]
+        elif isinstance(item, list | tuple):
+            children = list(item)
+        elif isinstance(item, msgpack.Timestamp):
+            raise CodecError('Codec: unsupported MessagePack timestamp.')
+        else:
+            continue
+        if depth > MAX_DEPTH:
+            raise CodecError(f'Codec: payload nested deeper than {MAX_DEPTH} levels.')
+        pending.extend((child, depth + 1) for child in children)
+    return value
+
+
+def packb(value: Any) -> bytes:
+    """
+    Serialize a value to MessagePack.
+
+    :raise CodecError: the value (or one of its items) cannot be serialized.
+    """
+    try:
+        return msgpack.packb(value, use_bin_type=True)  # type: ignore[no-any-return]
+    except (TypeError, ValueError, OverflowError) as error:
+        raise CodecError(f'Codec: cannot encode the value to MessagePack ({error}).') from error
+
+
+def unpackb(data: bytes | bytearray) -> Any:
+    """
+    Deserialize a MessagePack payload.
+
+    The extension types are rejected at any depth, but the timestamps: msgpack decodes them itself (without calling
+    the extension hook), they are hence rejected at the top level only here, and at any depth by `validate()`.
+
+    :raise CodecError: the payload is malformed, or uses an unsupported type.
+    """
+    try:
+        value = msgpack.unpackb(data, raw=False, strict_map_key=False, ext_hook=_reject_extension)
+    except (TypeError, ValueError) as error:
+        raise CodecError(f'Codec: malformed MessagePack payload ({error}).') from error
+    if isinstance(value, msgpack.Timestamp):
+        raise CodecError('Codec: unsupported MessagePack timestamp.')
+    return value
+
+
+def _reject_extension(code: int, _: bytes) -> Any:
+    """Reject the MessagePack extension types (@see unpackb())."""
+    raise CodecError(f'Codec: unsupported MessagePack extension type {code}.')
+
+
+__ALL__ = [
+    'Encoding', 'CodecError', 'MAX_DEPTH', 'negotiate', 'forget', 'encoding', 'clients', 'encode', 'decode', 'validate',
+    'packb', 'unpackb',
+]
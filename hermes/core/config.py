@@ -8,7 +8,7 @@ given "space".
  - Finally the upmost specific configuration is the one given as parameters of the commandline when starting the
   application.
 """
-from typing import Any
+from typing import Any, cast
 
 from mergedeep import merge
 
@@ -35,6 +35,10 @@ class ConfigOverrideError(ConfigKeyError):
         super().__init__('Path cannot be empty: no settings override.')
 
 
+# Marker for settings.get() calls without default value.
+_NO_DEFAULT: Any = object()
+
+
 class _Settings(metaclass=MetaSingleton):
     """Global config object."""
 
@@ -59,8 +63,13 @@ class _Settings(metaclass=MetaSingleton):
         logger.debug(_Settings.data)
 
     @staticmethod
-    def get(path: str | list[Any] | None = None) -> dict[Any, Any]:
-        """Get a configuration value following the given path."""
+    def get(path: str | list[Any] | None = None, default: Any = _NO_DEFAULT) -> dict[Any, Any]:
+        """
+        Get a configuration value following the given path.
+
+        :param str | list path: The path to the value.
+        :param any default: The value returned if the path does not exist. If none is given, a ConfigError is raised.
+        """
 
         if path is None:
             return _Settings.data
@@ -70,6 +79,8 @@ class _Settings(metaclass=MetaSingleton):
         current = _Settings.data
         for key in path:
             if key not in current:
+                if default is not _NO_DEFAULT:
+                    return cast(dict[Any, Any], default)
                 raise ConfigError(f'No settings for key {key}.')
             current = current[key]
         return current
@@ -0,0 +1,478 @@
+"""
+Hardware module.
+
+Split deployment: a hardware daemon process owns the boards, while one or more web worker processes serve the API
+and the GUI. Serial timing then never competes for the GIL with the web tier (HTTP, socket.io fan-out, GUI
+rendering), and the web tier can run on several cores.
+
+    hardware daemon:    `python -m hermes --daemon --ipc /run/hermes.sock`
+                        Opens the boards and performs the mutations requested by the workers.
+    web worker(s):      `python -m hermes --ipc /run/hermes.sock --port 8080`
+                        Loads the same configuration but never opens the boards: mutations are forwarded to the
+                        daemon (@see api), and the state changes made by the other workers are pushed back.
+
+The same goes for robots whose boards are wired to several hosts: each host runs a daemon (an agent) listening on a
+TCP address and owning its local boards only, and the web process (the coordinator) links to all the agents:
+
+    agents:             `python -m hermes --daemon --ipc 0.0.0.0:7000 --ipc-token SECRET --own 1 2` (on each host,
+                        with its boards)
+    coordinator:        `python -m hermes --ipc host1:7000 --ipc host2:7000 --ipc-token SECRET`
+                        Routes the mutations of each board to the agent owning it (as announced by the agents when
+                        the coordinator links to them, @see _Daemon._hello()).
+
+A TCP daemon listens on the loopback interface unless given a host (`:7000` is `127.0.0.1:7000`), and refuses to
+listen on another interface without a shared token: the workers then give it in their first request (`hello`), and
+connexions failing to do so are closed before any other request is served.
+
+Workers talk to the daemons over a Unix socket or a TCP connexion. Each message is a MessagePack array
+(@see codec), prefixed by its length (4 bytes, big-endian):
+    - ['call', id, method, args]:   a request from a worker (@see _Daemon.methods).
+    - ['reply', id, result]:        the answer of the daemon to a request.
+    - ['push', event, args]:        a notification of the daemon (ex: the state changes made by another worker).
+"""
+from __future__ import annotations
+
+import asyncio
+import hmac
+import ipaddress
+import itertools
+import struct
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any
+
+from hermes.core import codec, index, logger, metrics, persistence, snapshot, statetable, watcher
+from hermes.core.config import settings
+from hermes.core.logger import HermesError
+from hermes.core.struct import EnqueueResult
+
+# Maximum duration (in seconds) of a request to a daemon.
+_CALL_TIMEOUT = 5.0
+# Time (in seconds) between two attempts to reach a daemon.
+_RETRY_DELAY = 1.0
+# Maximum size of a message (in bytes).
+_MAX_MESSAGE = 16 * 1024 * 1024
+
+_HEADER = struct.Struct('>I')
+
+# A state change: [board_id, device_id, value].
+_Change = list[Any]
+
+_CALLS = metrics.counter('hermes_hardware_calls_total', 'Number of requests to the hardware daemon.', ['method'])
+_LINK_LATENCY = metrics.histogram(
+    'hermes_hardware_link_seconds', 'Round-trip time of the requests to the hardware daemons.', ['link'],
+)
+_LINK_UP = metrics.gauge('hermes_hardware_link_up', 'Whether the link to a hardware daemon is up.', ['link'])
+
+
+class HardwareError(HermesError):
+    """Error raised when a hardware daemon cannot be reached."""
+
+
+def _tcp(address: str) -> tuple[str, int] | None:
+    """
+    Return the (host, port) of a TCP address (`host:port`, the host being loopback if omitted): None for a Unix
+    socket path.
+    """
+    host, separator, port = address.rpartition(':')
+    if '/' in address or not separator or not port.isdigit():
+        return None
+    return host.strip('[]') or '127.0.0.1', int(port)
+
+
+def _loopback(host: str) -> bool:
+    """Return whether a host only accepts local connexions."""
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+async def _read(reader: asyncio.StreamReader) -> list[Any]:
+    """Read a message: raises IncompleteReadError when the connexion is closed."""
+    (size,) = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+    if size > _MAX_MESSAGE:
+        raise HardwareError(f'Hardware: message of {size} bytes exceeds the maximum size.')
+    message = codec.unpackb(await reader.readexactly(size))
+    if not isinstance(message, list) or not message:
+        raise HardwareError(f'Hardware: malformed message {message!r}.')
+    return message
+
+
+def _write(writer: asyncio.StreamWriter, message: list[Any]) -> None:
+    """Write a message (buffered: the event loop sends it)."""
+    data = codec.packb(message)
+    writer.write(_HEADER.pack(len(data)) + data)
+
+
+class _Daemon:
+    """The daemon side: performs the requests of its workers on the boards it owns."""
+
+    def __init__(self, owned: set[int] | None = None, token: str | None = None) -> None:
+        """
+        :param set owned: the ids of the boards owned by the daemon (all the boards if None).
+        :param str token: the token the workers must give in their `hello` request (none required if None).
+        """
+        self.owned = owned
+        self.token = token
+        # The connected workers.
+        self.workers: set[asyncio.StreamWriter] = set()
+        # The requests the workers can make, by method name.
+        self.methods: dict[str, Callable[..., Any]] = {
+            'hello': self._hello,
+            'action': self._action,
+            'batch': self._batch,
+        }
+
+    def owns(self, board_id: int) -> bool:
+        """Return whether the daemon owns a board."""
+        return self.owned is None or board_id in self.owned
+
+    def boards(self) -> dict[int, Any]:
+        """Return the boards owned by the daemon, by id."""
+        boards: dict[int, Any] = settings.get('boards', {})
+        if self.owned is None:
+            return boards
+        return {board_id: board for board_id, board in boards.items() if board_id in self.owned}
+
+    def _hello(self, _: asyncio.StreamWriter, __: str | None = None) -> dict[int, dict[str, Any]]:
+        """
+        Return the connexion status and device states of the owned boards (for a worker to catch up). The token is
+        checked before (@see serve_worker()).
+        """
+        return {
+            board_id: {
+                'connected': board.connected,
+                'states': {device_id: device.state for device_id, device in board.actions.items()},
+            }
+            for board_id, board in self.boards().items()
+        }
+
+    def _action(self, worker: asyncio.StreamWriter, board_id: int, device_id: int, value: Any) -> str:
+        """Perform a mutation: returns its outcome (@see EnqueueResult) or 'error'."""
+        handle = index.get(board_id, device_id) if self.owns(board_id) else None
+        if handle is None:
+            return 'error'
+        try:
+            result = handle.send(value)
+        except (AttributeError, TypeError, ValueError, OverflowError, HermesError):
+            return 'error'
+        if result is not EnqueueResult.REJECTED:
+            handle.device.state = value
+            statetable.publish([[board_id, device_id, value]])
+            persistence.record([[board_id, device_id, value]])
+            self._push(worker, 'changes', [[board_id, device_id, value]])
+        return str(result.value)
+
+    def _batch(self, worker: asyncio.StreamWriter, mutations: dict[int, list[list[Any]]]) -> list[str]:
+        """
+        Perform mutations validated by the worker, as {board_id: [[device_id, value], ...]}: none of them if a board
+        is busy (@see api.actions()). Returns the errors.
+        """
+        boards = self.boards()
+        busy = [board_id for board_id in mutations if board_id not in boards or boards[board_id].busy()]
+        if busy:
+            return [f'Board {board_id} is busy.' for board_id in busy]
+        commands = {}
+        try:
+            for board_id, board_mutations in mutations.items():
+                actions = boards[board_id].actions
+                commands[board_id] = [
+                    (actions[device_id].as_mutation(value), None) for device_id, value in board_mutations
+                ]
+        except (KeyError, AttributeError, TypeError, ValueError, OverflowError) as error:
+            return [f'Board {board_id}: invalid mutation: {error}.']
+        changes = []
+        errors = []
+        for board_id, board_mutations in mutations.items():
+            board = boards[board_id]
+            # The board can get busy meanwhile (@see api._dispatch()): only its share of the batch is rejected then.
+            if board.send_batch(commands[board_id]) is EnqueueResult.REJECTED:
+                errors.append(f'Board {board_id} is busy.')
+                continue
+            for device_id, value in board_mutations:
+                board.actions[device_id].state = value
+                changes.append([board_id, device_id, value])
+        if changes:
+            statetable.publish(changes)
+            persistence.record(changes)
+            self._push(worker if not errors else None, 'changes', changes)
+        return errors
+
+    def _push(self, origin: asyncio.StreamWriter | None, event: str, args: Any) -> None:
+        """Notify all the workers but the origin one."""
+        for worker in self.workers:
+            if worker is not origin:
+                _write(worker, ['push', event, args])
+
+    async def serve_worker(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Answer the requests of a worker, until it disconnects."""
+        authenticated = self.token is None
+        if authenticated:
+            self.workers.add(writer)
+            logger.info(f' > Hardware: worker connected ({len(self.workers)} in total)')
+        try:
+            while True:
+                kind, call_id, method, args = await _read(reader)
+                if kind != 'call' or method not in self.methods or not isinstance(args, list):
+                    raise HardwareError(f'Hardware: unknown request {kind} {method}.')
+                if not authenticated:
+                    if method != 'hello' or not self._authenticate(args):
+                        raise HardwareError(f'Hardware: worker {writer.get_extra_info("peername")} not authenticated.')
+                    authenticated = True
+                    self.workers.add(writer)
+                    logger.info(f' > Hardware: worker connected ({len(self.workers)} in total)')
+                _CALLS.labels(method).inc()
+                _write(writer, ['reply', call_id, self.methods[method](writer, *args)])
+        except (asyncio.IncompleteReadError, ConnectionError, HermesError, TypeError, ValueError):
+            # Closed, or misbehaving (ex: a call with arguments of the wrong arity): the worker is disconnected.
+            pass
+        finally:
+            writer.close()
+            if writer in self.workers:
+                self.workers.discard(writer)
+                logger.info(f' > Hardware: worker disconnected ({len(self.workers)} left)')
+
+    def _authenticate(self, args: list[Any]) -> bool:
+        token = args[0] if args else None
+        return isinstance(token, str) and hmac.compare_digest(token.encode(), str(self.token).encode())
+
+    async def start(self, address: str) -> asyncio.AbstractServer:
+        """
+        Start serving the workers on a Unix socket path or a TCP address (`host:port`).
+
+        :raise HardwareError: the TCP address is not a loopback one, and the daemon has no token.
+        """
+        tcp = _tcp(address)
+        if tcp is not None:
+            if self.token is None and not _loopback(tcp[0]):
+                raise HardwareError(f'Hardware: a token is required to listen on {address} (--ipc-token).')
+            return await asyncio.start_server(self.serve_worker, *tcp)
+        # A socket file left by a previous run would prevent binding.
+        Path(address).unlink(missing_ok=True)
+        return await asyncio.start_unix_server(self.serve_worker, path=address)
+
+
+async def _serve(daemon: _Daemon, address: str) -> None:
+    server = await daemon.start(address)
+    logger.info(f' > Hardware daemon listening on {address} (boards: {sorted(daemon.boards())})')
+    # The configuration changes are applied between the mutations of the boards.
+    watcher.attach(asyncio.get_running_loop())
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        watcher.attach(None)
+
+
+def serve(address: str, owned: list[int] | None = None, token: str | None = None) -> None:
+    """
+    Run a hardware daemon (blocking): open its boards and serve the web workers.
+
+    :param str address: The path of the Unix socket, or the TCP address (`host:port`) to listen on.
+    :param list owned: The ids of the boards owned by the daemon (ex: the ones wired to this host): all the boards of
+        the configuration if None.
+    :param str token: The token the workers must give (required to listen on a non-loopback TCP address).
+    """
+    daemon = _Daemon(set(owned) if owned else None, token)
+    boards = daemon.boards()
+    for board in boards.values():
+        board.open()
+    try:
+        asyncio.run(_serve(daemon, address))
+    finally:
+        for board in boards.values():
+            board.close()
+
+
+class _Link:
+    """The connexion of a worker to a daemon: requests/replies, and pushed notifications."""
+
+    def __init__(
+            self, address: str, on_changes: Callable[[list[_Change]], Awaitable[None]], token: str | None = None,
+    ) -> None:
+        self.address = address
+        self.on_changes = on_changes
+        self.token = token
+        self.writer: asyncio.StreamWriter | None = None
+        self.calls: dict[int, asyncio.Future[Any]] = {}
+        self.ids = itertools.count(1)
+        self.task: asyncio.Task[None] | None = None
+        self.latency = _LINK_LATENCY.labels(address)
+        self.up = _LINK_UP.labels(address)
+
+    async def call(self, method: str, *args: Any) -> Any:
+        """
+        Make a request to the daemon and return its answer.
+        :raise HardwareError: the daemon is not reachable or did not answer in time.
+        """
+        if self.writer is None:
+            raise HardwareError(f'Hardware: daemon {self.address} is not connected.')
+        call_id = next(self.ids)
+        future: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+        self.calls[call_id] = future
+        start = time.perf_counter()
+        try:
+            _write(self.writer, ['call', call_id, method, list(args)])
+            result = await asyncio.wait_for(future, _CALL_TIMEOUT)
+        except asyncio.TimeoutError as error:
+            raise HardwareError(f'Hardware: daemon {self.address} did not answer to {method}.') from error
+        else:
+            self.latency.observe(time.perf_counter() - start)
+            return result
+        finally:
+            self.calls.pop(call_id, None)
+
+    async def _open(self) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        tcp = _tcp(self.address)
+        if tcp is not None:
+            return await asyncio.open_connection(*tcp)
+        return await asyncio.open_unix_connection(self.address)
+
+    async def run(self) -> None:
+        """Stay connected to the daemon: reconnects whenever the connexion is lost."""
+        while True:
+            try:
+                reader, self.writer = await self._open()
+            except OSError as error:
+                logger.report('HardwareLink', 'Hardware: daemon %s is not reachable: %s', self.address, error)
+                await asyncio.sleep(_RETRY_DELAY)
+                continue
+            logger.info(f' > Hardware: connected to daemon {self.address}')
+            self.up.inc()
+            listener = asyncio.get_running_loop().create_task(self._listen(reader))
+            try:
+                _catch_up(self, await self.call('hello', self.token))
+                await listener
+            except (HermesError, ConnectionError, asyncio.IncompleteReadError):
+                listener.cancel()
+            self.up.dec()
+            self.writer.close()
+            self.writer = None
+            _catch_up(self, {})
+            for future in self.calls.values():
+                if not future.done():
+                    future.set_exception(HardwareError(f'Hardware: connexion to daemon {self.address} lost.'))
+            await asyncio.sleep(_RETRY_DELAY)
+
+    async def _listen(self, reader: asyncio.StreamReader) -> None:
+        while True:
+            message = await _read(reader)
+            if message[0] == 'reply':
+                future = self.calls.get(message[1])
+                if future and not future.done():
+                    future.set_result(message[2])
+            elif message[0] == 'push' and message[1] == 'changes':
+                await self.on_changes(message[2])
+
+
+# The links to the daemons (worker side).
+_LINKS: list[_Link] = []
+# The link to the daemon owning each board, by board id.
+_ROUTES: dict[int, _Link] = {}
+
+
+def _catch_up(link: _Link, status: dict[int, dict[str, Any]]) -> None:
+    """
+    Route the boards announced by a daemon to its link, and update them with the status it gave: the boards
+    previously routed to the link are disconnected if not announced anymore (ex: the link is lost).
+    """
+    boards: dict[int, Any] = settings.get('boards', {})
+    for board_id in [board_id for board_id, route in _ROUTES.items() if route is link and board_id not in status]:
+        del _ROUTES[board_id]
+        if board_id in boards:
+            boards[board_id].connected = False
+    for board_id, board_status in status.items():
+        board = boards.get(board_id)
+        if board is None:
+            logger.warning(f'Hardware: daemon {link.address} owns the unknown board {board_id}.')
+            continue
+        _ROUTES[board_id] = link
+        board.connected = board_status.get('connected', False)
+        for device_id, state in board_status.get('states', {}).items():
+            if device_id in board.actions:
+                board.actions[device_id].state = state
+    snapshot.invalidate()
+
+
+def connect(address: str, on_changes: Callable[[list[_Change]], Awaitable[None]], token: str | None = None) -> None:
+    """
+    Run as a web worker of a daemon (to be called from the event loop): once per daemon when the boards are spread
+    over several ones (agents).
+
+    :param str address: The path of the Unix socket, or the TCP address (`host:port`) of the daemon.
+    :param callable on_changes: Called with the state changes made by the other workers ([[board_id, device_id,
+        value], ...]).
+    :param str token: The token expected by the daemon, if any.
+    """
+    link = _Link(address, on_changes, token)
+    link.task = asyncio.get_running_loop().create_task(link.run())
+    _LINKS.append(link)
+
+
+def remote() -> bool:
+    """Return whether the boards are owned by hardware daemons (this process being one of their web workers)."""
+    return bool(_LINKS)
+
+
+async def action(board_id: int, device_id: int, value: Any) -> EnqueueResult | None:
+    """
+    Forward a mutation of the API to the daemon owning the board, in a web worker.
+
+    :return EnqueueResult: The outcome of the mutation, None if it failed.
+    """
+    link = _ROUTES.get(board_id)
+    if link is None:
+        logger.report('HardwareRoute', 'Hardware: no daemon owns board %s.', board_id)
+        return None
+    try:
+        return EnqueueResult(await link.call('action', board_id, device_id, value))
+    except (HermesError, ValueError):
+        return None
+
+
+async def batch(mutations: dict[int, list[list[Any]]]) -> list[str]:
+    """
+    Forward validated mutations ({board_id: [[device_id, value], ...]}) to the daemons owning the boards: returns the
+    errors.
+
+    Each daemon performs its share of the batch as a whole, but daemons do not coordinate: when the boards are spread
+    over several daemons and one of them fails, the others still perform their share, which is then applied as
+    changes pushed by those daemons (@see connect()).
+    """
+    unrouted = [board_id for board_id in mutations if board_id not in _ROUTES]
+    if unrouted:
+        return [f'Board {board_id}: no daemon owns it.' for board_id in unrouted]
+    shares: dict[_Link, dict[int, list[list[Any]]]] = {}
+    for board_id, board_mutations in mutations.items():
+        shares.setdefault(_ROUTES[board_id], {})[board_id] = board_mutations
+    results = await asyncio.gather(*(link.call('batch', share) for link, share in shares.items()), return_exceptions=True)
+    errors: list[str] = [
+        error for result in results for error in (result if isinstance(result, list) else [str(result)])
+    ]
+    if errors and len(shares) > 1:
+        for (link, share), result in zip(shares.items(), results, strict=True):
+            if result == []:
+                await link.on_changes([
+                    [board_id, device_id, value]
+                    for board_id, board_mutations in share.items()
+                    for device_id, value in board_mutations
+                ])
+    return errors
+
+
+def disconnect() -> None:
+    """Close the links to the daemons."""
+    for link in _LINKS:
+        if link.task is not None:
+            link.task.cancel()
+        if link.writer is not None:
+            link.writer.close()
+    _LINKS.clear()
+    _ROUTES.clear()
+
+
+__ALL__ = ['HardwareError', 'serve', 'connect', 'remote', 'action', 'batch', 'disconnect']
@@ -0,0 +1,74 @@
+"""
+Index module.
+
+Flat index of the devices of all the boards, for the mutation path to reach a device in a single lookup.
+
+Reaching a device through the settings (`settings.get(['boards', board_id, 'actions', device_id])`) walks the
+configuration tree level by level. The index maps each (board_id, device_id) pair to a handle holding direct
+references to the device, its board and its encoder (@see DeviceHandle).
+
+The index follows the boards of the settings: it is rebuilt as a whole when the boards are replaced (ex: a new
+configuration is loaded), and per board when a board is edited in place (@see update()).
+"""
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import Any
+
+from hermes.core.config import settings
+from hermes.core.struct import EnqueueResult
+from hermes.core.tracing import Span
+
+
+class DeviceHandle:
+    """A device of a board, with direct references to what the mutation path needs."""
+
+    __slots__ = ('board_id', 'device_id', 'board', 'device', 'encode')
+
+    def __init__(self, board_id: int, device_id: int, board: Any, device: Any) -> None:
+        self.board_id = board_id
+        self.device_id = device_id
+        self.board = board
+        self.device = device
+        self.encode: Callable[[Any], bytearray] = device.as_mutation
+
+    def send(self, value: Any, span: Span | None = None) -> EnqueueResult:
+        """Send the mutation of the device to the given value, without blocking (@see AbstractBoard.send)."""
+        result: EnqueueResult = self.board.send(self.encode(value), span, self.device_id)
+        return result
+
+
+# The handles, by (board_id, device_id).
+_HANDLES: dict[tuple[int, int], DeviceHandle] = {}
+# The boards the index was built from (the `boards` settings).
+_BOARDS: dict[int, Any] | None = None
+
+
+def get(board_id: int, device_id: int) -> DeviceHandle | None:
+    """Return the handle of a device: None if there is no such device."""
+    if settings.data.get('boards') is not _BOARDS:
+        rebuild()
+    return _HANDLES.get((board_id, device_id))
+
+
+def rebuild() -> None:
+    """Rebuild the index from the boards of the settings."""
+    global _BOARDS  # noqa: PLW0603
+    _BOARDS = settings.data.get('boards')
+    _HANDLES.clear()
+    for board_id in _BOARDS or {}:
+        update(board_id)
+
+
+def update(board_id: int) -> None:
+    """Re-index the devices of a board (ex: after a device was added, removed or replaced): drops a removed board."""
+    for key in [key for key in _HANDLES if key[0] == board_id]:
+        del _HANDLES[key]
+    board = (_BOARDS or {}).get(board_id)
+    if board is None:
+        return
+    for device_id, device in board.actions.items():
+        _HANDLES[(board_id, device_id)] = DeviceHandle(board_id, device_id, board, device)
+
+
+__ALL__ = ['DeviceHandle', 'get', 'rebuild', 'update']
@@ -1,32 +1,269 @@
 """Logger specific functions."""
 
+import atexit
+import copy
+import functools
 import inspect
+import logging
 import pathlib
+import sys
+import threading
 import time
+from collections import deque
+from collections.abc import Callable
 from typing import Any
 
 import logzero
 
 from hermes.core import cli
 from hermes.core.helpers import ROOT_DIR
+from hermes.core.struct import StringEnum
+
+DEBUG = logzero.DEBUG
+INFO = logzero.INFO
+WARNING = logzero.WARNING
+ERROR = logzero.ERROR
+
+
+class TraceChannel(StringEnum):
+    """Defines the subsystems which verbose traces can be switched on/off at runtime."""
+
+    PROTOCOL = 'protocol'  # Bytes exchanged with the boards.
+    COMMAND = 'command'  # Commands received from the boards.
+    API = 'api'  # Messages exchanged with the API clients.
+
+
+# Trace switches per channel: @see trace().
+_TRACES: dict[str, bool] = dict.fromkeys(TraceChannel, False)
+
+
+class _Lazy:
+    """Defer the computation of a log argument until the log record is actually formatted."""
+
+    __slots__ = ('_function', '_args')
+
+    def __init__(self, function: Callable[..., Any], *args: Any) -> None:
+        self._function = function
+        self._args = args
+
+    def __str__(self) -> str:
+        return str(self._function(*self._args))
+
+
+# Maximum time (in seconds) a record waits in the asynchronous queue before being written.
+_FLUSH_INTERVAL = 0.1
+# Formats the tracebacks of the records queued (@see _AsyncHandler).
+_TRACEBACK_FORMATTER = logging.Formatter()
+
+
+class _AsyncWriter(threading.Thread):
+    """
+    Background writer of the asynchronous logging mode.
+
+    Producers (board threads, the asyncio event loop, etc.) only append to a bounded deque, which is atomic and never
+    blocks, and the writer thread performs the actual I/O by batches. When the queue is full, new entries are dropped
+    and counted rather than making the producer wait.
+
+    :param list[logging.Handler] handlers: The handlers actually writing the log records.
+    :param int capacity: The maximum number of entries waiting to be written.
+    """
+
+    def __init__(self, handlers: list[logging.Handler], capacity: int) -> None:
+        super().__init__(name='LogWriterThread', daemon=True)
+        self.handlers = handlers
+        self.capacity = capacity
+        self.dropped = 0
+        self._reported = 0
+        self._queue: deque[str | logging.LogRecord] = deque()
+        self._wakeup = threading.Event()
+        self._running = True
+
+    def put(self, entry: str | logging.LogRecord) -> None:
+        """Queue a console line or a log record: never blocks."""
+        if len(self._queue) >= self.capacity:
+            self.dropped += 1
+            return
+        was_empty = not self._queue
+        self._queue.append(entry)
+        if was_empty:
+            self._wakeup.set()
+
+    def run(self) -> None:
+        while self._running or self._queue:
+            self._wakeup.wait(_FLUSH_INTERVAL)
+            self._wakeup.clear()
+            self._write_batch()
+
+    def _write_batch(self) -> None:
+        """Write all the queued entries: console lines are written with a single write and flush."""
+        lines = []
+        while self._queue:
+            entry = self._queue.popleft()
+            if isinstance(entry, str):
+                lines.append(entry)
+                continue
+            for handler in self.handlers:
+                if entry.levelno >= handler.level:
+                    handler.handle(entry)
+        if self.dropped > self._reported:
+            lines.append(f'\033[93m WARNING: {self.dropped - self._reported} log entries dropped (queue full). \033[0m')
+            self._reported = self.dropped
+        if lines:
+            sys.stdout.write('\n'.join(lines) + '\n')
+            sys.stdout.flush()
+
+    def stop(self) -> None:
+        """Write all pending entries and stop the thread."""
+        self._running = False
+        self._wakeup.set()
+        if self.is_alive():
+            self.join()
+
+
+class _AsyncHandler(logging.Handler):
+    """
+    A logging handler forwarding the records to the asynchronous writer, without locking nor formatting.
+
+    As the stdlib `QueueHandler` does, the message (and traceback) is interpolated before the record is queued: its
+    arguments (ex: a bytearray) may be mutated before the writer formats it.
+    """
+
+    def __init__(self, writer: _AsyncWriter) -> None:
+        super().__init__()
+        self.writer = writer
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _TRACEBACK_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        self.writer.put(record)
+        return True
+
+
+# The asynchronous writer, when the asynchronous logging mode is active: @see init().
+_WRITER: _AsyncWriter | None = None
+
+
+# Error events of a same key are logged at most _ERROR_BURST times per _ERROR_WINDOW seconds: @see report().
+_ERROR_WINDOW = 10.0
+_ERROR_BURST = 5
+
+
+class _ErrorEvent:
+    """Counters of an error event key."""
+
+    __slots__ = ('count', 'logged', 'suppressed', 'window_start', 'window_count')
+
+    def __init__(self, now: float) -> None:
+        self.count = 0
+        self.logged = 0
+        self.suppressed = 0
+        self.window_start = now
+        self.window_count = 0
+
+
+_ERRORS: dict[str, _ErrorEvent] = {}
+_ERRORS_LOCK = threading.Lock()
+# Logs the summary of the suppressed events at the end of the window of the first one (@see summarize_errors()).
+_SUMMARY_TIMER: threading.Timer | None = None
+
+
+def report(key: str, msg: str, *args: Any) -> bool:
+    """
+    Report an error event: rate-limited and deduplicated logging of errors.
+
+    Every event is counted under its key, but only the first _ERROR_BURST events of a key are logged per
+    _ERROR_WINDOW seconds: the others are suppressed (no formatting, no I/O) and summarized by a timer once the window
+    is over, and at shutdown. Meant for errors that can occur in hot loops (ex: noise on a serial line).
+
+    :param str key: The event key, shared by all occurrences of a same error (ex: the exception class name and the
+        board it occurs on).
+    :param str msg: The error message, %-style formatted with args only if logged.
+
+    :return bool: Whether the event was logged.
+    """
+    global _SUMMARY_TIMER  # noqa: PLW0603
+
+    now = time.monotonic()
+    with _ERRORS_LOCK:
+        event = _ERRORS.get(key)
+        if event is None:
+            event = _ERRORS[key] = _ErrorEvent(now)
+        event.count += 1
+        if now - event.window_start >= _ERROR_WINDOW:
+            event.window_start = now
+            event.window_count = 0
+        event.window_count += 1
+        logged = event.window_count <= _ERROR_BURST
+        if logged:
+            event.logged += 1
+        else:
+            event.suppressed += 1
+            if _SUMMARY_TIMER is None:
+                _SUMMARY_TIMER = threading.Timer(_ERROR_WINDOW, summarize_errors)
+                _SUMMARY_TIMER.daemon = True
+                _SUMMARY_TIMER.start()
+
+    if logged and args:
+        error(msg, *args)
+    elif logged:
+        error('%s', msg)
+    return logged
+
+
+def summarize_errors() -> None:
+    """Log a summary line for each error key whose events were suppressed since the last summary."""
+    global _SUMMARY_TIMER  # noqa: PLW0603
+
+    with _ERRORS_LOCK:
+        if _SUMMARY_TIMER is not None:
+            _SUMMARY_TIMER.cancel()
+            _SUMMARY_TIMER = None
+        suppressed = {key: (event.suppressed, event.count) for key, event in _ERRORS.items() if event.suppressed}
+        for key in suppressed:
+            _ERRORS[key].suppressed = 0
+    for key, (count, total) in suppressed.items():
+        warning(f'{count} similar errors suppressed: {key} ({total} in total).')
+
+
+def errors() -> dict[str, dict[str, int]]:
+    """Return the counters of all reported error events, by key."""
+    with _ERRORS_LOCK:
+        return {key: {'count': event.count, 'logged': event.logged} for key, event in _ERRORS.items()}
 
 
 class HermesError(Exception):
-    """Generic exception through the application."""
+    """
+    Generic exception through the application.
+
+    The message is reported as an error event (@see report()), keyed by the exception class unless a key is given
+    (ex: subclasses add the board they relate to): a same error raised in a loop only costs a counter increment once
+    its logging budget is spent, without spending the budget of the same error elsewhere.
+    """
 
-    def __init__(self, message: str | None = None) -> None:
+    def __init__(self, message: str | None = None, key: str | None = None) -> None:
         super().__init__(message)
         if message:
-            error(message)
+            report(key or type(self).__name__, message)
 
 
-def init(logpath: str = f'{ROOT_DIR}/logs/backend.log') -> None:
+def init(logpath: str = f'{ROOT_DIR}/logs/backend.log', asynchronous: bool | None = None, capacity: int = 10000) -> None:
     """
     Initialize logzero for the purpose of this project.
 
+    In asynchronous mode, logs are queued in memory and written by a dedicated background thread: log I/O (terminal
+    or disk) then never delays the caller. At most `capacity` entries can wait in memory: beyond that, entries are
+    dropped and counted (@see dropped()).
+
     :param str logpath: The path the logfile. Defaults to ./logs/backend.log
+    :param bool asynchronous: Whether to use the asynchronous mode. Defaults to the `--async-log` commandline option.
+    :param int capacity: The maximum number of entries waiting to be written in asynchronous mode.
     """
     print(' > Init logger')
+    shutdown()
 
     # Create rotated logfile.
     pathlib.Path(logpath).parent.mkdir(parents=True, exist_ok=True)
@@ -42,6 +279,104 @@ def init(logpath: str = f'{ROOT_DIR}/logs/backend.log') -> None:
     logzero.formatter(formatter)
     # Log level.
     logzero.loglevel(logzero.DEBUG if cli.args['debug'] else logzero.INFO)
+    # Traces are all switched on in debug mode.
+    for channel in TraceChannel:
+        set_trace(channel, cli.args['debug'])
+
+    if cli.args.get('async_log') if asynchronous is None else asynchronous:
+        _start_writer(capacity)
+
+
+def _start_writer(capacity: int) -> None:
+    """Move the logzero handlers behind an asynchronous writer."""
+    global _WRITER  # noqa: PLW0603
+
+    handlers = list(logzero.logger.handlers)
+    for handler in handlers:
+        logzero.logger.removeHandler(handler)
+    _WRITER = _AsyncWriter(handlers, capacity)
+    logzero.logger.addHandler(_AsyncHandler(_WRITER))
+    _WRITER.start()
+
+
+def shutdown() -> None:
+    """
+    Write all pending logs (with the summary of the suppressed errors) and stop the asynchronous writer (if any):
+    logging goes back to synchronous.
+    """
+    global _WRITER
+
+    summarize_errors()
+    if _WRITER is None:
+        return
+    writer, _WRITER = _WRITER, None
+    for handler in list(logzero.logger.handlers):
+        if isinstance(handler, _AsyncHandler):
+            logzero.logger.removeHandler(handler)
+    writer.stop()
+    for handler in writer.handlers:
+        logzero.logger.addHandler(handler)
+
+
+atexit.register(shutdown)
+
+
+def dropped() -> int:
+    """Return the number of log entries dropped because the asynchronous queue was full."""
+    return _WRITER.dropped if _WRITER else 0
+
+
+def _print(line: str) -> None:
+    """Print a line to the console: queued in asynchronous mode."""
+    if _WRITER:
+        _WRITER.put(line)
+    else:
+        print(line)
+
+
+def is_enabled_for(level: int) -> bool:
+    """Check if a log of the given level would be emitted: use it to guard costly log preparations."""
+    return bool(logzero.logger.isEnabledFor(level))
+
+
+def lazy(function: Callable[..., Any], *args: Any) -> Any:
+    """
+    Wrap a costly log argument so that it is only computed if the log is emitted.
+
+    **Example**
+        ```
+        logger.debug('Send %s', logger.lazy(list, data))
+        ```
+    """
+    return _Lazy(function, *args)
+
+
+def set_trace(channel: TraceChannel | str, enabled: bool) -> None:
+    """
+    Switch on/off the traces of a subsystem: can be done at runtime.
+
+    :raise HermesError: the channel does not exist.
+    """
+    if channel not in _TRACES:
+        raise HermesError(f'Trace channel `{channel}` does not exist.')
+    _TRACES[channel] = bool(enabled)
+
+
+def traces() -> dict[str, bool]:
+    """Return the trace switches per channel."""
+    return {TraceChannel(channel).value: enabled for channel, enabled in _TRACES.items()}
+
+
+def trace(channel: TraceChannel, msg: str, *args: Any) -> None:
+    """
+    Log a trace of a subsystem, only if its channel is switched on.
+
+    Meant for hot paths: while the channel is off, this costs a single lookup and the message is never formatted.
+    Arguments are formatted %-style (@see lazy() for costly ones).
+    Traces are written to the logfile regardless of the log level, so they can be switched on in production.
+    """
+    if _TRACES[channel]:
+        logzero.logger.info(f'[{channel.value}] {msg}', *args, stacklevel=2)
 
 
 def debug(msg: Any, *args: Any, **kwargs: Any) -> None:
@@ -51,25 +386,25 @@ def debug(msg: Any, *args: Any, **kwargs: Any) -> None:
 
 def info(msg: Any, *args: Any, **kwargs: Any) -> None:
     """Forward INFO logs to logzero."""
-    print(msg.format(*args, **kwargs))
+    _print(msg.format(*args, **kwargs))
     logzero.logger.info(msg, *args, **kwargs)
 
 
 def warning(msg: Any, *args: Any, **kwargs: Any) -> None:
     """Forward WARNING logs to logzero."""
-    print(f'\033[93m WARNING: {msg.format(*args, **kwargs)} \033[0m')
+    _print(f'\033[93m WARNING: {msg.format(*args, **kwargs)} \033[0m')
     logzero.logger.warning(msg, *args, **kwargs)
 
 
 def error(msg: str, *args: Any, **kwargs: Any) -> None:
     """Forward ERROR logs to logzero."""
-    print(f'\033[91m ERROR: {msg % args} \033[0m')
+    _print(f'\033[91m ERROR: {msg % args} \033[0m')
     logzero.logger.error(msg, *args, **kwargs)
 
 
 def exception(msg: Any, *args: Any, **kwargs: Any) -> None:
     """Forward ERROR logs to logzero."""
-    print(f'\033[91m EXCEPTION: {msg % args} \033[0m')
+    _print(f'\033[91m EXCEPTION: {msg % args} \033[0m')
     logzero.logger.error(msg, *args, **kwargs)
 
 
@@ -92,6 +427,8 @@ def logthis(*args: Any) -> Any:
     """
     Log decorator for a function: the call to this function will be logged and its performance measured.
 
+    Meant for debugging: to measure hot paths, use `profiling.timed()` instead, which feeds the metrics.
+
     **Example**
         Use a decorator on a function to log that function.
             ```
@@ -109,17 +446,19 @@ def logthis(*args: Any) -> Any:
     """
 
     def _log(function: Any) -> Any:
-        def inner(*inner_args: Any, **kwargs: Any) -> None:
+        @functools.wraps(function)
+        def inner(*inner_args: Any, **kwargs: Any) -> Any:
             """Inner method."""
-            func_args_as_string = get_function_call_args(function, *inner_args, **kwargs)
-            log(_loglevel, '> Start function %s', func_args_as_string)
-            time_before = time.time()
-            function(*inner_args, **kwargs)
-            time_after = time.time()
+            if not is_enabled_for(_loglevel):
+                return function(*inner_args, **kwargs)
+            log(_loglevel, '> Start function %s', get_function_call_args(function, *inner_args, **kwargs))
+            time_before = time.perf_counter_ns()
+            result = function(*inner_args, **kwargs)
             log(_loglevel, '> Function %s done (time: %s ms)',
                 function.__name__,
-                round((time_after - time_before) * 1000, 1),
+                round((time.perf_counter_ns() - time_before) / 1e6, 3),
                 )
+            return result
 
         def get_function_call_args(func: Any, *func_args: Any, **kwargs: Any) -> str:
             """Return a string containing function name and list of all argument names/values."""
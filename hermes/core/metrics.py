@@ -0,0 +1,281 @@
+"""
+Metrics module.
+
+A low-overhead registry of operational metrics, exposed in the Prometheus text format on `/metrics`.
+
+Three kinds of metrics are available:
+    - counters:     monotonically increasing values (ex: number of frames sent).
+    - gauges:       values that go up and down (ex: number of socket.io clients).
+    - histograms:   distributions over fixed buckets (ex: round-trip times).
+
+Metrics are meant to be updated from hot paths (board threads, the event loop): each time series accumulates its
+values in per-thread shards, so that an update is a couple of list operations, without any lock. Shards are only
+summed up when the metrics are collected.
+
+Values that are cheaper to read on demand than to maintain (ex: queue depths) are provided via a callback, evaluated
+at collection time only.
+
+Usage:
+    FRAMES = metrics.counter('hermes_frames_total', 'Number of frames.', ['board'])
+    FRAMES.labels(board.id).inc()
+"""
+from __future__ import annotations
+
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+from typing import TYPE_CHECKING, Any
+
+from hermes.core.logger import HermesError
+
+if TYPE_CHECKING:
+    from fastapi import FastAPI
+
+# Default histogram buckets (in seconds): from sub-millisecond serial round-trips to multi-second handshakes.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# A callback returns the values of a metric by label values: {(label_value, ...): value}.
+Callback = Callable[[], dict[tuple[Any, ...], float]]
+
+
+class _Series:
+    """A time series (ie. a metric for a given set of label values), accumulated in per-thread shards."""
+
+    __slots__ = ('labels', '_size', '_local', '_shards', '_lock')
+
+    def __init__(self, labels: tuple[str, ...], size: int) -> None:
+        self.labels = labels
+        self._size = size
+        self._local = threading.local()
+        self._shards: list[list[float]] = []
+        self._lock = threading.Lock()
+
+    def shard(self) -> list[float]:
+        """Return the shard of the current thread: only this thread ever writes to it."""
+        try:
+            return self._local.shard  # type: ignore[no-any-return]
+        except AttributeError:
+            shard = self._local.shard = [0.0] * self._size
+            with self._lock:
+                self._shards.append(shard)
+            return shard
+
+    def values(self) -> list[float]:
+        """Return the sum of all the shards."""
+        with self._lock:
+            shards = list(self._shards)
+        return [sum(values) for values in zip(*shards, strict=True)] if shards else [0.0] * self._size
+
+
+class _Metric(ABC):
+    """Base class of the metrics: a named set of time series, one per set of label values."""
+
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), callback: Callback | None = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        self._series: dict[tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: Any) -> Any:
+        """Return the time series of the given label values (to be kept by the caller for repeated updates)."""
+        key = tuple(str(value) for value in values)
+        series = self._series.get(key)
+        if series is None:
+            if len(key) != len(self.labelnames):
+                raise HermesError(f'Metric {self.name}: expected labels {self.labelnames}, got {key}.')
+            with self._lock:
+                series = self._series.setdefault(key, self._create_series(key))
+        return series
+
+    @abstractmethod
+    def _create_series(self, labels: tuple[str, ...]) -> Any:
+        """Create the time series of the given label values."""
+
+    def _format_labels(self, labels: tuple[str, ...], extra: str = '') -> str:
+        pairs = [f'{name}="{value}"' for name, value in zip(self.labelnames, labels, strict=True)]
+        if extra:
+            pairs.append(extra)
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+
+    def collect(self) -> list[str]:
+        """Return the metric in the Prometheus text format."""
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for labels, series in list(self._series.items()):
+            lines.extend(self._collect_series(labels, series))
+        if self.callback:
+            for labels, value in self.callback().items():
+                key = tuple(str(label) for label in labels)
+                lines.append(f'{self.name}{self._format_labels(key)} {_format(value)}')
+        return lines
+
+    def _collect_series(self, labels: tuple[str, ...], series: Any) -> list[str]:
+        return [f'{self.name}{self._format_labels(labels)} {_format(series.get())}']
+
+
+class _CounterSeries(_Series):
+    """A counter time series."""
+
+    __slots__ = ()
+
+    def inc(self, amount: float = 1) -> None:
+        """Increment the counter by the given (positive) amount."""
+        self.shard()[0] += amount
+
+    def get(self) -> float:
+        """Return the current value."""
+        return self.values()[0]
+
+
+class _GaugeSeries(_CounterSeries):
+    """A gauge time series."""
+
+    __slots__ = ()
+
+    def dec(self, amount: float = 1) -> None:
+        """Decrement the gauge by the given amount."""
+        self.shard()[0] -= amount
+
+
+class _HistogramSeries(_Series):
+    """A histogram time series: one shard slot per bucket, plus the sum and the count of observed values."""
+
+    __slots__ = ('bounds',)
+
+    def __init__(self, labels: tuple[str, ...], bounds: tuple[float, ...]) -> None:
+        super().__init__(labels, len(bounds) + 3)
+        self.bounds = bounds
+
+    def observe(self, value: float) -> None:
+        """Record an observation."""
+        shard = self.shard()
+        shard[bisect_left(self.bounds, value)] += 1
+        shard[-2] += value
+        shard[-1] += 1
+
+
+class Counter(_Metric):
+    """A counter metric."""
+
+    kind = 'counter'
+
+    def _create_series(self, labels: tuple[str, ...]) -> _CounterSeries:
+        return _CounterSeries(labels, 1)
+
+    def inc(self, amount: float = 1) -> None:
+        """Increment the counter of a metric without labels."""
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    """A gauge metric."""
+
+    kind = 'gauge'
+
+    def _create_series(self, labels: tuple[str, ...]) -> _GaugeSeries:
+        return _GaugeSeries(labels, 1)
+
+    def inc(self, amount: float = 1) -> None:
+        """Increment the gauge of a metric without labels."""
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1) -> None:
+        """Decrement the gauge of a metric without labels."""
+        self.labels().dec(amount)
+
+
+class Histogram(_Metric):
+    """A histogram metric, with fixed buckets."""
+
+    kind = 'histogram'
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            labelnames: Iterable[str] = (),
+            buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _create_series(self, labels: tuple[str, ...]) -> _HistogramSeries:
+        return _HistogramSeries(labels, self.buckets)
+
+    def observe(self, value: float) -> None:
+        """Record an observation of a metric without labels."""
+        self.labels().observe(value)
+
+    def _collect_series(self, labels: tuple[str, ...], series: Any) -> list[str]:
+        values = series.values()
+        lines = []
+        cumulative = 0.0
+        for bound, count in zip((*self.buckets, float('inf')), values[:-2], strict=True):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else _format(bound)
+            bucket_labels = self._format_labels(labels, f'le="{le}"')
+            lines.append(f'{self.name}_bucket{bucket_labels} {_format(cumulative)}')
+        lines.append(f'{self.name}_sum{self._format_labels(labels)} {_format(values[-2])}')
+        lines.append(f'{self.name}_count{self._format_labels(labels)} {_format(values[-1])}')
+        return lines
+
+
+_REGISTRY: dict[str, _Metric] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def _register(metric: _Metric) -> Any:
+    """Register a metric: registering twice the same name returns the first metric."""
+    with _REGISTRY_LOCK:
+        return _REGISTRY.setdefault(metric.name, metric)
+
+
+def counter(name: str, documentation: str, labelnames: Iterable[str] = (), callback: Callback | None = None) -> Counter:
+    """Create (or get) a counter metric."""
+    return _register(Counter(name, documentation, labelnames, callback))  # type: ignore[no-any-return]
+
+
+def gauge(name: str, documentation: str, labelnames: Iterable[str] = (), callback: Callback | None = None) -> Gauge:
+    """Create (or get) a gauge metric."""
+    return _register(Gauge(name, documentation, labelnames, callback))  # type: ignore[no-any-return]
+
+
+def histogram(
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+) -> Histogram:
+    """Create (or get) a histogram metric."""
+    return _register(Histogram(name, documentation, labelnames, buckets))  # type: ignore[no-any-return]
+
+
+def _format(value: float) -> str:
+    """Format a metric value: integers without decimals."""
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def exposition() -> str:
+    """Return all the metrics in the Prometheus text format."""
+    with _REGISTRY_LOCK:
+        registered = list(_REGISTRY.values())
+    lines = [line for metric in registered for line in metric.collect()]
+    return '\n'.join(lines) + '\n'
+
+
+def init(app: FastAPI) -> None:
+    """Attach the `/metrics` route to a fastAPI server."""
+    # Only imported along with the server: the metrics are recorded by modules which must not depend on it.
+    from fastapi.responses import PlainTextResponse
+
+    @app.get('/metrics', response_class=PlainTextResponse)
+    def get_metrics() -> str:
+        """Return the metrics in the Prometheus text format."""
+        return exposition()
+
+
+__ALL__ = ['counter', 'gauge', 'histogram', 'exposition', 'init']
@@ -0,0 +1,143 @@
+"""
+Persistence module.
+
+Persists the device states, for a restart to restore them (@see init()) instead of snapping all the devices back to
+their default: the boards then start their devices where they were left (the handshake sends the device states).
+
+The mutation path only records the changed states in memory (@see record()). A background thread writes them:
+    - debounced:    the changes of a `_PERIOD` are written at once, so the file is written at most `1 / _PERIOD` times
+                    per second whatever the mutation rate.
+    - atomically:   to a temporary file then renamed, so a crash never leaves a partial file.
+The file is a JSON list of [board_id, device_id, value] triples.
+"""
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any
+
+from hermes.core import index, logger, metrics, profiling
+from hermes.core.config import settings
+
+# Minimum time (in seconds) between two writes.
+_PERIOD = 0.25
+
+_WRITES = metrics.counter('hermes_state_writes_total', 'Number of writes of the persisted device states.')
+
+_LOCK = threading.Lock()
+# Signals the writer that states changed (or that it should stop).
+_CHANGED = threading.Event()
+_STOP = threading.Event()
+# The last-known device states, by (board_id, device_id).
+_STATES: dict[tuple[int, int], Any] = {}
+_DIRTY = False
+_PATH: Path | None = None
+_THREAD: threading.Thread | None = None
+
+
+def init(path: str) -> int:
+    """
+    Restore the persisted device states (if any) and start persisting their changes: to be called by the process
+    owning the boards, once they are loaded and before they are opened.
+
+    :param str path: The file the states are persisted in.
+
+    :return int: The number of device states restored.
+    """
+    global _PATH, _THREAD  # noqa: PLW0603
+    close()
+    _PATH = Path(path)
+    restored = _restore(_PATH)
+    _STATES.clear()
+    for board_id, board in settings.get('boards', {}).items():
+        for device_id, device in board.actions.items():
+            _STATES[(board_id, device_id)] = device.state
+    _STOP.clear()
+    _THREAD = threading.Thread(target=_run, args=(_PATH,), name='StatePersistence', daemon=True)
+    _THREAD.start()
+    logger.info(f' > State persistence {_PATH}: {restored} device states restored')
+    return restored
+
+
+def _restore(path: Path) -> int:
+    """Set the devices to their persisted states: unknown devices are skipped."""
+    try:
+        changes = json.loads(path.read_text(encoding='utf-8'))
+    except FileNotFoundError:
+        return 0
+    except (OSError, ValueError) as error:
+        logger.warning(f'Device states {path} cannot be restored: {error}.')
+        return 0
+    restored = 0
+    for change in changes if isinstance(changes, list) else []:
+        if not isinstance(change, list) or len(change) != 3:  # noqa: PLR2004 (a [board_id, device_id, value] triple)
+            continue
+        board_id, device_id, value = change
+        handle = index.get(board_id, device_id)
+        if handle is not None:
+            handle.device.state = value
+            restored += 1
+    return restored
+
+
+def record(changes: list[list[Any]]) -> None:
+    """Record device state changes ([board_id, device_id, value] triples), for the writer to persist them."""
+    global _DIRTY  # noqa: PLW0603
+    if _THREAD is None:
+        return
+    with _LOCK:
+        for board_id, device_id, value in changes:
+            _STATES[(board_id, device_id)] = value
+        _DIRTY = True
+    _CHANGED.set()
+
+
+def _run(path: Path) -> None:
+    """Write the states whenever they change, at most once per `_PERIOD`, until stopped (with a last write)."""
+    while True:
+        _CHANGED.wait()
+        # Debounce: the changes made meanwhile are part of the same write.
+        stopping = _STOP.wait(_PERIOD)
+        _write(path)
+        if stopping:
+            return
+
+
+@profiling.timed('state_persistence_write')
+def _write(path: Path) -> None:
+    """Write the states, if changed, to a temporary file then rename it."""
+    global _DIRTY  # noqa: PLW0603
+    with _LOCK:
+        _CHANGED.clear()
+        if not _DIRTY:
+            return
+        _DIRTY = False
+        changes = [[board_id, device_id, value] for (board_id, device_id), value in _STATES.items()]
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        descriptor, temporary = tempfile.mkstemp(dir=path.parent, prefix=path.name)
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+            json.dump(changes, file, default=str)
+            file.flush()
+            os.fsync(file.fileno())
+        Path(temporary).replace(path)
+    except OSError as error:
+        logger.report('StatePersistence', 'Device states %s cannot be written: %s.', path, error)
+        return
+    _WRITES.inc()
+
+
+def close() -> None:
+    """Stop persisting the device states: the pending changes are written first."""
+    global _THREAD  # noqa: PLW0603
+    if _THREAD is not None:
+        _STOP.set()
+        _CHANGED.set()
+        _THREAD.join()
+        _THREAD = None
+
+
+__ALL__ = ['init', 'record', 'close']
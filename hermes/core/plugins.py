@@ -13,22 +13,32 @@ located at either of these locations:
 - hermes.module.xxx.foobar.py
 
 Loading those plugins will - with the help of @see :class:`MetaPluginType` - populate the plugin list via the corresponding
-abstract plugin class (AbstractDevice, AbstractBoard, etc..). The list of all possible devices for instance can be found
-via `AbstractDevice.plugins`.
+abstract plugin class (AbstractDevice, AbstractBoard, etc..). The list of all the devices loaded so far for instance
+can be found via `AbstractDevice.plugins`.
+
+Importing a plugin module is costly (ex: its dependencies), and most plugins are not used by a given robot. The
+discovery hence does not import anything: it reads the plugin files to build a manifest of the plugins (@see
+PluginEntry) - their name, YAML tag and message code - and a plugin module is only imported on the first use of one of
+its plugins (@see load(), by_tag(), by_code()). The import cost of each plugin module is kept (@see imports()).
 """
 from __future__ import annotations
 
+import ast
 import importlib
 import importlib.util
 import itertools
+import sys
+import time
 from enum import Enum
 from pathlib import Path
-from typing import Any, TypeVar
+from types import ModuleType
+from typing import Any, NamedTuple, TypeVar
 
 from ruamel.yaml.constructor import BaseConstructor
 from ruamel.yaml.representer import BaseRepresenter
 
 from hermes.core import logger
+from hermes.core.dictionary import MessageCode
 from hermes.core.helpers import ROOT_DIR
 from hermes.core.logger import HermesError
 
@@ -118,12 +128,14 @@ class AbstractPlugin:
 
         # Extracts the data from the yaml data.
         mapping = constructor.construct_mapping(node, deep=True)
+        return cls.from_mapping(mapping)
 
-        # Analyzes the plugin constructor to determine the needed constructor parameters.
-        arguments = cls.__init__.__code__.co_varnames[1:cls.__init__.__code__.co_argcount]
+    @classmethod
+    def from_mapping(cls, mapping: dict[str, Any]) -> AbstractPlugin:
+        """Instantiate the plugin from its configuration values (@see storage)."""
 
         # Extracts necessary constructor arguments from the mapping.
-        initial_args = {key: mapping[key] for key in arguments if key in mapping}
+        initial_args = {key: mapping[key] for key in _arguments(cls) if key in mapping}
 
         # Instantiates the plugin.
         plugin: AbstractPlugin = cls(**initial_args)
@@ -146,20 +158,172 @@ class AbstractPlugin:
         return AbstractPlugin.__subclasses__()
 
 
+# The names of the constructor parameters, by plugin class.
+_ARGUMENTS: dict[type[AbstractPlugin], tuple[str, ...]] = {}
+
+
+def _arguments(plugin: type[AbstractPlugin]) -> tuple[str, ...]:
+    """Return the names of the constructor parameters of a plugin class (analyzed once per class)."""
+    if plugin not in _ARGUMENTS:
+        code = plugin.__init__.__code__
+        _ARGUMENTS[plugin] = code.co_varnames[1:code.co_argcount]
+    return _ARGUMENTS[plugin]
+
+
+class PluginEntry(NamedTuple):
+    """A plugin as known from the manifest: without importing its module (@see init())."""
+
+    name: str  # The plugin class name.
+    module: str  # The module defining the plugin class.
+    namespace: str  # The plugin namespace (ex: 'devices').
+    tag: str  # The YAML tag of the plugin (@see AbstractPlugin.to_yaml()).
+    code: int | None  # The message code of the plugin, if any (devices, commands).
+
+
+# @todo: let modules extend this list.
+_NAMESPACES = ['protocols', 'commands', 'devices', 'boards', 'gui.pages']
+_SCOPES = ['hermes', 'modules']
+
+# The manifest: plugins by class name.
+_REGISTRY: dict[str, PluginEntry] = {}
+# Import durations (in seconds) of the plugin modules, by module name.
+_IMPORTS: dict[str, float] = {}
+
+
+class _Class(NamedTuple):
+    """A class definition read from a plugin file."""
+
+    module: str
+    namespace: str
+    bases: list[str]
+    tag: str | None
+    code: int | None
+    root: bool  # Whether it is a plugin type (ie. its metaclass is MetaPluginType, @see AbstractDevice).
+
+
+def _read(path: Path, module: str, namespace: str) -> dict[str, _Class]:
+    """Read the class definitions of a plugin file, without importing it."""
+    classes = {}
+    for node in ast.parse(path.read_bytes(), str(path)).body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        tag, code = None, None
+        for statement in node.body:
+            if isinstance(statement, ast.Assign) and isinstance(statement.value, ast.Constant) and any(
+                isinstance(target, ast.Name) and target.id == 'yaml_tag' for target in statement.targets
+            ):
+                tag = str(statement.value.value)
+            if isinstance(statement, ast.FunctionDef) and statement.name == 'code':
+                returned = next((item.value for item in ast.walk(statement) if isinstance(item, ast.Return)), None)
+                if isinstance(returned, ast.Attribute) and returned.attr in MessageCode.__members__:
+                    code = MessageCode[returned.attr].value
+        classes[node.name] = _Class(
+            module,
+            namespace,
+            [base.id if isinstance(base, ast.Name) else getattr(base, 'attr', '') for base in node.bases],
+            tag,
+            code,
+            any(keyword.arg == 'metaclass' and ast.unparse(keyword.value) == 'MetaPluginType' for keyword in node.keywords),
+        )
+    return classes
+
+
 def init() -> None:
     """
-    Load all plugins.
+    Discover all plugins.
 
     Explores the directory structure and search for all .py files within directories corresponding to plugin types
-    to import it. The plugins could be in the hermes or the modules directories.
+    to read the plugins they define (without importing them). The plugins could be in the hermes or the modules
+    directories.
     """
-    logger.info(' > Plugin discovery')
-
-    # @todo: let modules extend this list.
-    namespaces = ['protocols', 'commands', 'devices', 'boards', 'gui.pages']
-    for scope in ['hermes', 'modules']:
-        for namespace in namespaces:
-            loadable_plugins = Path(ROOT_DIR).glob('/'.join([scope, namespace.replace('.', '/'), '[!_]*.py']))
-            for loadable_plugin in loadable_plugins:
+    start = time.perf_counter()
+    classes: dict[str, _Class] = {}
+    for scope in _SCOPES:
+        for namespace in _NAMESPACES:
+            folder = Path(ROOT_DIR, scope, *namespace.split('.'))
+            package = Path(folder, '__init__.py')
+            if package.exists():
+                classes.update(_read(package, f'{scope}.{namespace}', namespace))
+            for loadable_plugin in sorted(folder.glob('[!_]*.py')):
                 modulename = loadable_plugin.name[:-3]
-                importlib.import_module(f'{scope}.{namespace}.{modulename}')
+                classes.update(_read(loadable_plugin, f'{scope}.{namespace}.{modulename}', namespace))
+
+    # Plugins are the classes deriving from a plugin type, directly or not.
+    _REGISTRY.clear()
+    found = True
+    while found:
+        found = False
+        for name, definition in classes.items():
+            if name in _REGISTRY or definition.root:
+                continue
+            parents = [base for base in definition.bases if base in _REGISTRY or getattr(classes.get(base), 'root', False)]
+            if not parents:
+                continue
+            code = definition.code
+            if code is None:
+                code = next((_REGISTRY[base].code for base in parents if base in _REGISTRY), None)
+            _REGISTRY[name] = PluginEntry(name, definition.module, definition.namespace, definition.tag or f'!{name}', code)
+            found = True
+    logger.info(f' > Plugin discovery: {len(_REGISTRY)} plugins ({(time.perf_counter() - start) * 1000:.1f} ms)')
+
+
+def entries(namespace: str | None = None) -> list[PluginEntry]:
+    """Return the discovered plugins (of a namespace, ex: 'devices'), imported or not."""
+    if not _REGISTRY:
+        init()
+    return [entry for entry in _REGISTRY.values() if namespace is None or entry.namespace == namespace]
+
+
+def _import(module: str) -> ModuleType:
+    """Import a plugin module, timed on its first import."""
+    if module in sys.modules:
+        return sys.modules[module]
+    start = time.perf_counter()
+    imported = importlib.import_module(module)
+    _IMPORTS[module] = time.perf_counter() - start
+    logger.debug(f' > Plugin module {module} imported in {_IMPORTS[module] * 1000:.1f} ms')
+    return imported
+
+
+def load(name: str) -> type[AbstractPlugin]:
+    """
+    Return a plugin class, importing its module if needed.
+
+    :param str name: The plugin class name (ex: 'ServoDevice').
+
+    :raise PluginError: there is no such plugin.
+    """
+    entry = next((entry for entry in entries() if entry.name == name), None)
+    if entry is None:
+        raise PluginError(f'No plugin {name}.')
+    plugin: type[AbstractPlugin] = getattr(_import(entry.module), name)
+    return plugin
+
+
+def load_all(namespace: str) -> list[type[AbstractPlugin]]:
+    """Return all the plugin classes of a namespace (ex: 'gui.pages'), importing their modules if needed."""
+    return [load(entry.name) for entry in entries(namespace)]
+
+
+def by_tag(tag: str) -> type[AbstractPlugin] | None:
+    """Return the plugin class of a YAML tag (ex: '!ServoDevice'), importing its module if needed."""
+    entry = next((entry for entry in entries() if entry.tag == tag), None)
+    return load(entry.name) if entry else None
+
+
+def by_code(namespace: str, code: int) -> type[AbstractPlugin] | None:
+    """Return the plugin class of a message code in a namespace (ex: 'commands'), importing its module if needed."""
+    entry = next((entry for entry in entries(namespace) if entry.code == code), None)
+    return load(entry.name) if entry else None
+
+
+def imports() -> dict[str, float]:
+    """
+    Return the import duration (in seconds) of each plugin module imported so far, slowest first: it includes the
+    modules it imported first (ex: its dependencies).
+    """
+    return dict(sorted(_IMPORTS.items(), key=lambda item: item[1], reverse=True))
+
+
+__ALL__ = ['PluginError', 'AbstractPlugin', 'PluginEntry', 'init', 'entries', 'load', 'load_all', 'by_tag', 'by_code',
+           'imports']
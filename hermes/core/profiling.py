@@ -0,0 +1,260 @@
+"""
+Profiling module.
+
+Tools to measure where the time goes while the robot is running:
+    - `timed()`:    a low-overhead timer (decorator or context manager) feeding the `hermes_timing_seconds` histogram
+                    of the metrics (@see metrics).
+    - sampling sessions: a background thread samples the stacks of all the threads at a fixed interval. Sessions can
+                    be started and stopped at runtime (@see admin routes) and their result downloaded as folded
+                    stacks (for flamegraph.pl, speedscope, etc.) or as a pstats file (for pstats, snakeviz, etc.).
+
+Samples measure wall-clock time, not CPU time: a thread blocked in a call (a lock, a serial read, a sleep) is sampled
+in that call as well as a running one. Read the results per thread: the board and server threads spend most of their
+wall-clock time waiting.
+
+Sampling is used rather than cProfile: cProfile only profiles the thread it is enabled in, while the time of HERMES
+is spent in board threads, the server threads and the event loop. Sampling sees all of them, at a cost that does not
+depend on the number of calls.
+"""
+from __future__ import annotations
+
+import functools
+import inspect
+import marshal
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+from types import FrameType, TracebackType
+from typing import Any
+
+from hermes.core import metrics
+from hermes.core.logger import HermesError
+
+_TIMINGS = metrics.histogram('hermes_timing_seconds', 'Duration of the timed code sections.', ['name'])
+
+# A function key, as used by pstats: (filename, first line number, function name).
+_Function = tuple[str, int, str]
+
+
+class _Timer:
+    """A timer feeding the duration of a code section to the timing histogram: @see timed()."""
+
+    __slots__ = ('_series', '_start')
+
+    def __init__(self, name: str) -> None:
+        self._series = _TIMINGS.labels(name)
+        self._start = 0
+
+    def __enter__(self) -> _Timer:
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type: type | None, exc: BaseException | None, traceback: TracebackType | None) -> None:
+        self._series.observe((time.perf_counter_ns() - self._start) / 1e9)
+
+    def __call__(self, function: Callable[..., Any]) -> Callable[..., Any]:
+        series = self._series
+
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_inner(*args: Any, **kwargs: Any) -> Any:
+                start = time.perf_counter_ns()
+                try:
+                    return await function(*args, **kwargs)
+                finally:
+                    series.observe((time.perf_counter_ns() - start) / 1e9)
+
+            return async_inner
+
+        @functools.wraps(function)
+        def inner(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                series.observe((time.perf_counter_ns() - start) / 1e9)
+
+        return inner
+
+
+def timed(name: str) -> _Timer:
+    """
+    Measure the duration of a function or of a code section, in the `hermes_timing_seconds{name=...}` histogram.
+
+    **Example**
+        ```
+        @profiling.timed('handshake')
+        def handshake(self):
+            ...
+
+        with profiling.timed('encode'):
+            ...
+        ```
+    """
+    return _Timer(name)
+
+
+class _Sampler(threading.Thread):
+    """
+    Background thread sampling the stacks of all the other threads.
+
+    :param float interval: Time in seconds between two samples.
+    """
+
+    def __init__(self, interval: float) -> None:
+        super().__init__(name='ProfilerThread', daemon=True)
+        self.interval = interval
+        self.samples = 0
+        self.stacks: Counter[tuple[str, tuple[_Function, ...]]] = Counter()
+        self.started = 0.0
+        self.stopped = 0.0
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        self.started = time.monotonic()
+        while not self._stop_event.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != self.ident:
+                    self.stacks[(names.get(ident, str(ident)), _stack(frame))] += 1
+            self.samples += 1
+        self.stopped = time.monotonic()
+
+    def stop(self) -> None:
+        """Stop sampling."""
+        self._stop_event.set()
+        self.join()
+
+
+def _stack(frame: FrameType | None) -> tuple[_Function, ...]:
+    """Return the stack of the given frame, from the outermost call to the frame itself."""
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+_SESSION: _Sampler | None = None
+_LAST: _Sampler | None = None
+
+
+def start(interval: float = 0.005) -> None:
+    """
+    Start a sampling session.
+
+    :param float interval: Time in seconds between two samples.
+
+    :raise ValueError: the interval is not positive.
+    :raise HermesError: a session is already running.
+    """
+    global _SESSION  # noqa: PLW0603
+    if interval <= 0:
+        raise ValueError(f'Profiling: the sampling interval must be positive, got {interval}.')
+    if _SESSION is not None:
+        raise HermesError('Profiling: a session is already running.')
+    _SESSION = _Sampler(interval)
+    _SESSION.start()
+
+
+def stop() -> dict[str, Any]:
+    """
+    Stop the running sampling session: its result stays available until the next session ends.
+
+    :raise HermesError: no session is running.
+    """
+    global _SESSION, _LAST
+    if _SESSION is None:
+        raise HermesError('Profiling: no session is running.')
+    _SESSION.stop()
+    _SESSION, _LAST = None, _SESSION
+    return status()
+
+
+def running() -> bool:
+    """Return whether a sampling session is running."""
+    return _SESSION is not None
+
+
+def status() -> dict[str, Any]:
+    """
+    Return the state of the profiler and a summary of the last session: the functions most often sampled innermost,
+    in wall-clock time (waits included).
+    """
+    result: dict[str, Any] = {'running': running()}
+    if _LAST:
+        leaves: Counter[str] = Counter()
+        for (_, stack), count in _LAST.stacks.items():
+            if stack:
+                leaves[_label(stack[-1])] += count
+        result.update({
+            'duration': round(_LAST.stopped - _LAST.started, 3),
+            'samples': _LAST.samples,
+            'wall_clock_top': leaves.most_common(20),
+        })
+    return result
+
+
+def _last() -> _Sampler:
+    if _LAST is None:
+        raise HermesError('Profiling: no session recorded yet.')
+    return _LAST
+
+
+def _label(function: _Function) -> str:
+    filename, line, name = function
+    return f'{name} ({filename}:{line})'
+
+
+def folded() -> str:
+    """
+    Return the last session as folded stacks: one `thread;outer;...;inner count` line per distinct stack.
+    This is the input format of flamegraph.pl, speedscope, inferno, etc.
+    """
+    lines = [
+        ';'.join([thread, *(_label(function) for function in stack)]) + f' {count}'
+        for (thread, stack), count in _last().stacks.items()
+    ]
+    return '\n'.join(lines) + '\n'
+
+
+def pstats() -> bytes:
+    """
+    Return the last session as a marshalled pstats dictionary (to be loaded with `pstats.Stats(filename)`).
+
+    Times are wall-clock estimates from the samples: the self time of a function is the time it was sampled as the
+    innermost call, its cumulative time the time it was sampled anywhere in the stack. Call counts are sample counts.
+    """
+    session = _last()
+    # Under load, the sampler gets the GIL less often than its interval: use the actual time between samples.
+    period = (session.stopped - session.started) / max(1, session.samples)
+    stats: dict[_Function, list[Any]] = {}
+    for (_, stack), count in session.stacks.items():
+        elapsed = count * period
+        for index, function in enumerate(stack):
+            entry = stats.setdefault(function, [0, 0, 0.0, 0.0, {}])
+            if function in stack[:index]:
+                continue
+            entry[0] += count
+            entry[1] += count
+            entry[3] += elapsed
+            if index:
+                caller = entry[4].setdefault(stack[index - 1], [0, 0, 0.0, 0.0])
+                caller[0] += count
+                caller[1] += count
+                caller[3] += elapsed
+        if stack:
+            stats[stack[-1]][2] += elapsed
+            if len(stack) > 1:
+                stats[stack[-1]][4].setdefault(stack[-2], [0, 0, 0.0, 0.0])[2] += elapsed
+    return marshal.dumps({
+        function: (cc, nc, tt, ct, {caller: tuple(values) for caller, values in callers.items()})
+        for function, (cc, nc, tt, ct, callers) in stats.items()
+    })
+
+
+__ALL__ = ['timed', 'start', 'stop', 'running', 'status', 'folded', 'pstats']
@@ -1,9 +1,10 @@
 """
 The server section is responsible for :
-    - serves a default GUI (@see `gui` directory)
+    - serves a default GUI (@see `gui` directory), unless headless (`--headless`: the GUI stack is never imported)
     - exposes the socket.io API to help remote UIs to send commands
         @see `https://github.com/dclause/hermes_vuejs` for an example.
 """
+import asyncio
 import contextlib
 import threading
 import time
@@ -20,8 +21,8 @@ from starlette.middleware.trustedhost import TrustedHostMiddleware
 from uvicorn import Config
 from uvicorn.supervisors import ChangeReload
 
-from hermes import __version__, gui
-from hermes.core import api, logger, plugins, storage
+from hermes import __version__
+from hermes.core import admin, api, logger, metrics, plugins, storage, watcher
 from hermes.core.config import settings
 
 server: Any
@@ -114,8 +115,21 @@ def factory() -> FastAPI:
     def healthcheck() -> dict[str, str]:
         return {'status': 'healthy', 'version': __version__}
 
+    # The configuration changes are applied between the mutations of the boards.
+    @app.on_event('startup')
+    async def attach_watcher() -> None:
+        watcher.attach(asyncio.get_running_loop())
+
+    @app.on_event('shutdown')
+    async def detach_watcher() -> None:
+        watcher.attach(None)
+
     api.init(app)
-    gui.init(app)
+    admin.init(app)
+    metrics.init(app)
+    if not settings.get(['server', 'headless'], False):
+        from hermes import gui
+        gui.init(app)
     return app
 
 
@@ -0,0 +1,109 @@
+"""
+Snapshot module.
+
+Keeps a cached, versioned snapshot of the serialized boards for the client handshakes.
+
+Serializing the boards (@see AbstractPlugin.serialize()) walks all the boards and devices: the result is cached per
+board, and kept up to date incrementally when a device state changes (@see record()). Other changes of a board
+(connexion, configuration) drop its cached serialization (@see invalidate()).
+
+Each change bumps the snapshot version. Clients give back the last version they know when (re)connecting: if the
+changes since that version are still known, they only receive those (@see delta()) instead of the whole snapshot.
+
+Versions are opaque strings for the clients: they embed an epoch that changes with each server start, so that a
+version from a previous run is never mistaken for a current one.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Any
+
+from hermes.core.config import settings
+
+# Maximum number of device state changes remembered for delta handshakes.
+_HISTORY_SIZE = 1000
+
+_EPOCH = format(time.time_ns(), 'x')
+_LOCK = threading.Lock()
+_VERSION = 0
+# The version since which all the changes are known (anything older requires a full snapshot).
+_BASE_VERSION = 0
+# The cached serialized boards, by board id.
+_BOARDS: dict[int, dict[str, Any]] = {}
+# The device state changes: (version, board_id, device_id, value), oldest first.
+_CHANGES: deque[tuple[int, int, int, Any]] = deque(maxlen=_HISTORY_SIZE)
+
+
+def version() -> str:
+    """Return the current snapshot version."""
+    return f'{_EPOCH}.{_VERSION}'
+
+
+def _parse(client_version: Any) -> int | None:
+    """Return the version number of a client version string: None if it is not a version of this run."""
+    epoch, _, number = str(client_version).partition('.')
+    if epoch != _EPOCH or not number.isdigit():
+        return None
+    return int(number)
+
+
+def boards() -> dict[int, dict[str, Any]]:
+    """Return the serialized boards, serializing only the ones not cached yet."""
+    with _LOCK:
+        for board_id, board in settings.get('boards', {}).items():
+            if board_id not in _BOARDS:
+                _BOARDS[board_id] = board.serialize()
+        return dict(_BOARDS)
+
+
+def record(board_id: int, device_id: int, value: Any) -> None:
+    """Record the state change of a device: updates the cached snapshot in place."""
+    global _VERSION  # noqa: PLW0603
+    with _LOCK:
+        _VERSION += 1
+        board = _BOARDS.get(board_id)
+        if board is not None and device_id in board.get('actions', {}):
+            board['actions'][device_id]['state'] = value
+        if len(_CHANGES) == _CHANGES.maxlen:
+            _rebase(_CHANGES[0][0])
+        _CHANGES.append((_VERSION, board_id, device_id, value))
+
+
+def invalidate(board_id: int | None = None) -> None:
+    """
+    Drop the cached serialization of a board (or of all boards): to be called on any change other than a device state.
+    Clients older than this change get a full snapshot on their next handshake.
+    """
+    global _VERSION  # noqa: PLW0603
+    with _LOCK:
+        if board_id is None:
+            _BOARDS.clear()
+        else:
+            _BOARDS.pop(board_id, None)
+        _VERSION += 1
+        _rebase(_VERSION)
+        _CHANGES.clear()
+
+
+def _rebase(base: int) -> None:
+    global _BASE_VERSION  # noqa: PLW0603
+    _BASE_VERSION = base
+
+
+def delta(client_version: Any) -> list[list[Any]] | None:
+    """
+    Return the device state changes since the given version, as [board_id, device_id, value] (latest value only).
+
+    :return: None if the changes since that version are not all known: the client needs a full snapshot.
+    """
+    number = _parse(client_version)
+    with _LOCK:
+        if number is None or number < _BASE_VERSION or number > _VERSION:
+            return None
+        changes = {(board_id, device_id): value for (change, board_id, device_id, value) in _CHANGES if change > number}
+    return [[board_id, device_id, value] for (board_id, device_id), value in changes.items()]
+
+
+__ALL__ = ['version', 'boards', 'record', 'invalidate', 'delta']
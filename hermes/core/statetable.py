@@ -0,0 +1,299 @@
+"""
+State table module.
+
+Publishes the device states in a shared memory segment, for other processes (API workers, recorders, exporters, etc.)
+to read them without going through the process owning the boards.
+
+The segment has a fixed layout, computed once from the boards configuration (@see init()):
+    - header (24 bytes):    magic `HRMS`, layout version (u16), reserved (u16), number of slots (u32), padding (4
+                            bytes), sequence (u64).
+    - slots (32 bytes each, sorted by board then device id): board id (u32), device id (u32), version (u64), value
+                            kind (u8), padding (7 bytes), value (8 bytes: i64 or f64 according to the kind).
+All numbers are little-endian.
+
+The table has a single writer (the process owning the boards) and any number of readers. Consistency relies on the
+sequence of the header, used as a seqlock: the writer makes it odd before changing any slot and even again after, so a
+reader retries whenever the sequence was odd or changed during its read (@see StateTable.snapshot()). Each slot
+records the sequence at which it last changed, so a reader can only fetch the changes since its previous read
+(@see StateTable.changes()).
+
+The table holds the actions and the inputs of the boards: the writer publishes the actions on mutation, and the
+inputs on ingest (@see AbstractBoard.ingest()).
+
+Only None, booleans, integers (64 bits) and floats fit in a slot: other states are left out of the table.
+"""
+from __future__ import annotations
+
+import struct
+import threading
+import time
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any
+
+from hermes.core import logger
+from hermes.core.config import settings
+from hermes.core.logger import HermesError
+
+_MAGIC = b'HRMS'
+_LAYOUT_VERSION = 1
+# Maximum number of attempts of a read racing with the writer.
+_MAX_RETRIES = 1000
+
+_HEADER = struct.Struct('<4sHHI4x')
+_SEQUENCE = struct.Struct('<Q')
+_SEQUENCE_OFFSET = 16
+_SLOTS_OFFSET = 24
+_SLOT = struct.Struct('<IIQB7x8x')
+_SLOT_VERSION = struct.Struct('<Q')
+_SLOT_VERSION_OFFSET = 8
+_SLOT_VALUE_OFFSET = 16
+
+# Value kinds: kind => layout of the value.
+_NONE, _BOOL, _INT, _FLOAT = range(4)
+_VALUES = {
+    _NONE: struct.Struct('<B7x8x'),
+    _BOOL: struct.Struct('<B7xq'),
+    _INT: struct.Struct('<B7xq'),
+    _FLOAT: struct.Struct('<B7xd'),
+}
+
+# A state change: [board_id, device_id, value].
+_Change = list[Any]
+
+
+class StateTableError(HermesError):
+    """Error raised when the state table cannot be created, attached or read."""
+
+
+def _kind(value: Any) -> int | None:
+    """Return the kind of a value: None if it does not fit in a slot."""
+    if value is None:
+        return _NONE
+    if isinstance(value, bool):
+        return _BOOL
+    if isinstance(value, int):
+        return _INT if -(1 << 63) <= value < (1 << 63) else None
+    if isinstance(value, float):
+        return _FLOAT
+    return None
+
+
+class StateTable:
+    """A device state table in shared memory: created by its writer (@see create()), attached by its readers."""
+
+    def __init__(self, memory: SharedMemory, owner: bool) -> None:
+        self._memory = memory
+        self._owner = owner
+        self._buffer = memory.buf
+        self._closed = False
+        self._lock = threading.Lock()
+        magic, layout, _, count = _HEADER.unpack_from(self._buffer, 0)
+        if magic != _MAGIC or layout != _LAYOUT_VERSION:
+            raise StateTableError(f'State table {memory.name}: unknown layout ({magic!r}, version {layout}).')
+        # The offset of each slot, by (board_id, device_id).
+        self._slots: dict[tuple[int, int], int] = {}
+        for index in range(count):
+            offset = _SLOTS_OFFSET + index * _SLOT.size
+            board_id, device_id, _, _ = _SLOT.unpack_from(self._buffer, offset)
+            self._slots[(board_id, device_id)] = offset
+
+    @classmethod
+    def create(cls, name: str, states: dict[tuple[int, int], Any]) -> StateTable:
+        """
+        Create the table (a table of the same name left by a previous run is replaced).
+
+        :param str name:        the name of the shared memory segment.
+        :param dict states:     the initial device states, by (board_id, device_id).
+
+        :raise StateTableError: the shared memory segment cannot be created.
+        """
+        keys = sorted(states)
+        size = _SLOTS_OFFSET + len(keys) * _SLOT.size
+        try:
+            try:
+                memory = SharedMemory(name, create=True, size=size)
+            except FileExistsError:
+                stale = SharedMemory(name)
+                stale.close()
+                stale.unlink()
+                memory = SharedMemory(name, create=True, size=size)
+        except OSError as error:
+            raise StateTableError(f'State table {name}: cannot be created: {error}.') from error
+        buffer = memory.buf
+        _SEQUENCE.pack_into(buffer, _SEQUENCE_OFFSET, 0)
+        for index, (board_id, device_id) in enumerate(keys):
+            _SLOT.pack_into(buffer, _SLOTS_OFFSET + index * _SLOT.size, board_id, device_id, 0, _NONE)
+        # The magic comes last: readers never attach a table that is not fully initialized.
+        _HEADER.pack_into(buffer, 0, _MAGIC, _LAYOUT_VERSION, 0, len(keys))
+        table = cls(memory, True)
+        table.write([[board_id, device_id, state] for (board_id, device_id), state in states.items()])
+        return table
+
+    @classmethod
+    def attach(cls, name: str) -> StateTable:
+        """
+        Attach to an existing table, as a reader.
+
+        :raise StateTableError: the table does not exist or has an unknown layout.
+        """
+        # Readers must not destroy the segment of the writer when they exit: it must not be tracked (Python < 3.13
+        # always tracks it).
+        try:
+            try:
+                memory = SharedMemory(name, track=False)  # type: ignore[call-arg]
+            except TypeError:
+                memory = SharedMemory(name)
+                resource_tracker.unregister(memory._name, 'shared_memory')  # type: ignore[attr-defined]
+        except OSError as error:
+            raise StateTableError(f'State table {name}: cannot be attached: {error}.') from error
+        return cls(memory, False)
+
+    @property
+    def name(self) -> str:
+        """Return the name of the shared memory segment."""
+        return self._memory.name
+
+    def _check(self) -> None:
+        """
+        Check the table is still attached.
+
+        :raise StateTableError: the table was closed.
+        """
+        if self._closed:
+            raise StateTableError(f'State table {self.name}: closed.')
+
+    def sequence(self) -> int:
+        """Return the current sequence of the table (odd while a write is in progress)."""
+        self._check()
+        return int(_SEQUENCE.unpack_from(self._buffer, _SEQUENCE_OFFSET)[0])
+
+    def write(self, changes: list[_Change]) -> int:
+        """
+        Write device state changes, all at once for the readers.
+
+        :param list changes: the changes, as [board_id, device_id, value] triples: devices out of the table, and
+            values that do not fit in a slot, are skipped.
+
+        :return int: the number of changes written.
+        """
+        written = 0
+        buffer = self._buffer
+        with self._lock:
+            self._check()
+            sequence = self.sequence() + 1
+            _SEQUENCE.pack_into(buffer, _SEQUENCE_OFFSET, sequence)
+            for board_id, device_id, value in changes:
+                offset = self._slots.get((board_id, device_id))
+                kind = _kind(value)
+                if offset is None or kind is None:
+                    continue
+                if kind == _NONE:
+                    _VALUES[kind].pack_into(buffer, offset + _SLOT_VALUE_OFFSET, kind)
+                else:
+                    _VALUES[kind].pack_into(buffer, offset + _SLOT_VALUE_OFFSET, kind, value)
+                _SLOT_VERSION.pack_into(buffer, offset + _SLOT_VERSION_OFFSET, sequence + 1)
+                written += 1
+            _SEQUENCE.pack_into(buffer, _SEQUENCE_OFFSET, sequence + 1)
+        return written
+
+    def _value(self, offset: int) -> Any:
+        offset += _SLOT_VALUE_OFFSET
+        kind = self._buffer[offset]
+        if kind == _NONE:
+            return None
+        value = _VALUES[kind].unpack_from(self._buffer, offset)[1]
+        return bool(value) if kind == _BOOL else value
+
+    def _consistent(self, read: Any) -> tuple[int, Any]:
+        """Run a read until no write happened meanwhile: returns the sequence it is consistent with, and its result."""
+        for _ in range(_MAX_RETRIES):
+            start = self.sequence()
+            if start % 2 == 0:
+                result = read()
+                if self.sequence() == start:
+                    return start, result
+            # Let the writer go on.
+            time.sleep(0)
+        raise StateTableError(f'State table {self.name}: no consistent read after {_MAX_RETRIES} attempts.')
+
+    def read(self, board_id: int, device_id: int) -> Any:
+        """
+        Return the state of a device.
+
+        :raise StateTableError: the device is not in the table.
+        """
+        offset = self._slots.get((board_id, device_id))
+        if offset is None:
+            raise StateTableError(f'State table {self.name}: no device {device_id} on board {board_id}.')
+        return self._consistent(lambda: self._value(offset))[1]
+
+    def snapshot(self) -> tuple[int, dict[tuple[int, int], Any]]:
+        """Return the sequence and the states of all the devices, by (board_id, device_id), as of that sequence."""
+        return self._consistent(lambda: {key: self._value(offset) for key, offset in self._slots.items()})
+
+    def changes(self, since: int) -> tuple[int, list[_Change]]:
+        """
+        Return the devices changed since a given sequence (ex: as returned by a previous call).
+
+        :return tuple: the current sequence, and the changes as [board_id, device_id, value] triples.
+        """
+
+        def read() -> list[_Change]:
+            return [
+                [board_id, device_id, self._value(offset)]
+                for (board_id, device_id), offset in self._slots.items()
+                if _SLOT_VERSION.unpack_from(self._buffer, offset + _SLOT_VERSION_OFFSET)[0] > since
+            ]
+
+        return self._consistent(read)
+
+    def close(self) -> None:
+        """Detach from the table: the writer also destroys it."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
+
+
+# The table published by this process, if any.
+_TABLE: StateTable | None = None
+
+
+def init(name: str) -> StateTable:
+    """
+    Publish the states of the devices of all the boards in a new state table: to be called by the process owning the
+    boards, once they are loaded.
+
+    :param str name: the name of the shared memory segment.
+    """
+    global _TABLE  # noqa: PLW0603
+    close()
+    states = {
+        (board_id, device_id): device.state
+        for board_id, board in settings.get('boards', {}).items()
+        for device_id, device in {**board.actions, **board.inputs}.items()
+    }
+    _TABLE = StateTable.create(name, states)
+    logger.info(f' > State table {name}: {len(states)} devices')
+    return _TABLE
+
+
+def publish(changes: list[_Change]) -> None:
+    """Write device state changes ([board_id, device_id, value] triples) to the state table, if any."""
+    if _TABLE is not None:
+        _TABLE.write(changes)
+
+
+def close() -> None:
+    """Destroy the state table, if any."""
+    global _TABLE  # noqa: PLW0603
+    if _TABLE is not None:
+        _TABLE.close()
+        _TABLE = None
+
+
+__ALL__ = ['StateTableError', 'StateTable', 'init', 'publish', 'close']
@@ -2,22 +2,61 @@
 Defines the storage interface used to load/dump configs. It currently uses YAML 1.2 via the ruamel.yaml.
 
 The purpose to separate it to its own module is to later be able to swap to a different dumper style if needed.
+
+Parsing YAML is the bulk of the startup time, so the configuration files are compiled once: the documents of each file
+are stored in a cache file (pickle), keyed by the file modification time and content hash, and a warm start only
+parses the files that changed since. Plugins are cached as their tag and configuration values (@see _Compiled) and
+instantiated on load: they hold runtime state (threads, locks, queues) which cannot be stored.
 """
+import hashlib
 import io
+import os
+import pickle
+import tempfile
 from pathlib import Path
-from typing import Any
+from typing import Any, NamedTuple
 
 import ruamel.yaml
 from mergedeep import merge
+from ruamel.yaml.constructor import BaseConstructor, SafeConstructor
 
-from hermes.core import logger
-from hermes.core.helpers import CONFIG_DIR, ROOT_DIR
-from hermes.core.plugins import AbstractPlugin
+from hermes.core import logger, plugins
+from hermes.core.helpers import CONFIG_DIR, PROFILE_DIR, ROOT_DIR
+from hermes.core.plugins import AbstractPlugin, PluginError
 from hermes.core.struct import StringEnum
 
 _storage = ruamel.yaml.YAML(typ='safe')
 _storage.sort_base_mapping_type_on_output = False  # type: ignore[assignment]
 
+# The compiled configuration files, for a fast startup.
+CACHE_FILE = Path(ROOT_DIR, '.cache', 'config.pickle')
+# Bump whenever the format of the cache changes.
+_CACHE_VERSION = 1
+
+
+class _Compiled(NamedTuple):
+    """A plugin as compiled from a configuration file: its YAML tag and its configuration values."""
+
+    tag: str
+    mapping: dict[str, Any]
+
+
+class _Compiler(SafeConstructor):
+    """YAML constructor compiling the plugins to `_Compiled` values instead of instantiating them."""
+
+
+def _compile(constructor: BaseConstructor, node: Any) -> _Compiled:
+    return _Compiled(node.tag, constructor.construct_mapping(node, deep=True))
+
+
+_compiler = ruamel.yaml.YAML(typ='safe')
+_compiler.Constructor = _Compiler
+# The plugin classes registered to the dumper so far.
+_registered: set[type[AbstractPlugin]] = set()
+# The cache: compiled documents (and the modification time, size and hash they were compiled from), by filename.
+_cache: dict[str, tuple[int, int, str, list[Any]]] | None = None
+_cache_changed = False
+
 
 class StorageType(StringEnum):
     """Defines the existing configuration types within the application."""
@@ -32,14 +71,20 @@ def init() -> None:
     """Init the YAML loader/dumper."""
     logger.info(' > Init storage')
 
-    # This is needed for storage to know about the storable classes.
-    # and register them.
-    # The classes should first be imported which is the job of plugin handler.
+    # This is needed for storage to know about the storable classes: their tags are known from the plugin manifest,
+    # their classes are only imported when a configuration uses them (@see _instantiate()).
     # @see plugin.init().
+    for entry in plugins.entries():
+        _Compiler.add_constructor(entry.tag, _compile)
+
+
+def _register() -> None:
+    """Register the plugin classes imported so far to the dumper."""
     for plugin_type in AbstractPlugin.types():
-        if hasattr(plugin_type, 'plugins'):
-            for plugin in plugin_type.plugins:
+        for plugin in getattr(plugin_type, 'plugins', []):
+            if plugin not in _registered:
                 _storage.register_class(plugin)
+                _registered.add(plugin)
 
 
 def load() -> dict[str, Any]:
@@ -49,30 +94,119 @@ def load() -> dict[str, Any]:
        List(str, Any): A list of configurations.
     """
     config: dict[str, Any] = {}
+    for filename in files():
+        _load_file(filename, config)
+    _save_cache()
+    return config
+
+
+def files() -> list[Path]:
+    """Return the configuration files loaded by `load()`, in loading order."""
+    return [
+        filename
+        for scope in ['', 'hermes', 'modules']  # @todo also load properly from modules
+        for filename in Path(ROOT_DIR, scope, 'configs').glob('*.yml')
+    ]
+
+
+def load_profile(name: str) -> dict[str, Any]:
+    """
+    Load the configurations of a shipped profile (ex: 'inmoov'), the same way as `load()` does.
 
-    for scope in ['', 'hermes', 'modules']:  # @todo also load properly from modules
-        loadable_config_files = Path(ROOT_DIR, scope, 'configs').glob('*.yml')
-        for filename in loadable_config_files:
-            plugin_name = filename.name[:-4]
-            with filename.open(encoding='utf-8') as file:
-                if plugin_name not in config:
-                    config[plugin_name] = {}
-                data = _storage.load_all(file)
-                for plugin in data:
-                    if isinstance(plugin, dict):
-                        config[plugin_name] = merge({}, config[plugin_name], plugin)
-                    elif isinstance(plugin, list):
-                        data = {}
-                        for index, item in enumerate(plugin):
-                            key = item['id'] if 'id' in item else index
-                            data[key] = item
-                        config[plugin_name] = {**config[plugin_name], **data}
-                    else:
-                        data = {plugin.id: plugin}
-                        config[plugin_name] = {**config[plugin_name], **data}
+    :param str name: The profile name (its directory name in `hermes/profiles`).
+    """
+    config: dict[str, Any] = {}
+    for filename in Path(PROFILE_DIR, name).glob('*.yml'):
+        _load_file(filename, config)
+    _save_cache()
     return config
 
 
+def _load_file(filename: Path, config: dict[str, Any]) -> None:
+    """Load a configuration file and merge/concatenate it into the given configurations."""
+    plugin_name = filename.name[:-4]
+    if plugin_name not in config:
+        config[plugin_name] = {}
+    for document in _documents(filename):
+        plugin = _instantiate(document)
+        if isinstance(plugin, dict):
+            # The configuration is built by this function: it can be merged in place.
+            merge(config[plugin_name], plugin)
+        elif isinstance(plugin, list):
+            data = {}
+            for index, item in enumerate(plugin):
+                key = item['id'] if 'id' in item else index
+                data[key] = item
+            config[plugin_name] = {**config[plugin_name], **data}
+        else:
+            data = {plugin.id: plugin}
+            config[plugin_name] = {**config[plugin_name], **data}
+
+
+def _documents(filename: Path) -> list[Any]:
+    """Return the compiled documents of a configuration file: from the cache unless the file changed."""
+    global _cache, _cache_changed  # noqa: PLW0603
+    if _cache is None:
+        _cache = _load_cache()
+    key = str(filename)
+    stat = filename.stat()
+    cached = _cache.get(key)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[3]
+
+    # Changed, or only touched: the content tells.
+    content = filename.read_bytes()
+    digest = hashlib.sha256(content).hexdigest()
+    documents = cached[3] if cached is not None and cached[2] == digest else list(_compiler.load_all(content.decode()))
+    _cache[key] = (stat.st_mtime_ns, stat.st_size, digest, documents)
+    _cache_changed = True
+    return documents
+
+
+def _instantiate(value: Any) -> Any:
+    """Instantiate the plugins of a compiled document (innermost first, as the YAML loader does)."""
+    if isinstance(value, _Compiled):
+        plugin = plugins.by_tag(value.tag)
+        if plugin is None:
+            raise PluginError(f'No plugin for the tag {value.tag}.')
+        return plugin.from_mapping(_instantiate(value.mapping))
+    if isinstance(value, dict):
+        return {key: _instantiate(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_instantiate(item) for item in value]
+    return value
+
+
+def _load_cache() -> dict[str, tuple[int, int, str, list[Any]]]:
+    """Read the cache file: a missing, unreadable or outdated cache is an empty one."""
+    try:
+        with CACHE_FILE.open('rb') as file:
+            version, files = pickle.load(file)  # noqa: S301 (written by this module only)
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError, TypeError, AttributeError):
+        return {}
+    cache: dict[str, tuple[int, int, str, list[Any]]] = files if version == _CACHE_VERSION else {}
+    return cache
+
+
+def _save_cache() -> None:
+    """Write the cache file if any configuration file was compiled, at once (temporary file then rename)."""
+    global _cache_changed  # noqa: PLW0603
+    if not _cache_changed or _cache is None:
+        return
+    # Forget the files that no longer exist.
+    files = {key: value for key, value in _cache.items() if Path(key).exists()}
+    try:
+        CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        descriptor, path = tempfile.mkstemp(dir=CACHE_FILE.parent, prefix=CACHE_FILE.name)
+        with os.fdopen(descriptor, 'wb') as file:
+            pickle.dump((_CACHE_VERSION, files), file, protocol=pickle.HIGHEST_PROTOCOL)
+        Path(path).replace(CACHE_FILE)
+    except OSError as error:
+        logger.warning(f'Configuration cache {CACHE_FILE} cannot be written: {error}.')
+        return
+    _cache_changed = False
+
+
 def write(config_type: StorageType, data: Any) -> None:
     """
     Store the given config data to the active profile.
@@ -80,6 +214,7 @@ def write(config_type: StorageType, data: Any) -> None:
     :param StorageType config_type: The configuration type.
     :param Any data: The data to store.
     """
+    _register()
     filename = Path(CONFIG_DIR, f'{config_type}.yml')
     with filename.open(mode='w', encoding='utf-8') as file:
         if config_type is StorageType.GLOBAL:
@@ -95,6 +230,7 @@ def dump(data: Any) -> Any:
 
     :param any data: The data to dump.
     """
+    _register()
     buffer = io.StringIO()
     _storage.dump(data, buffer)
     return buffer.getvalue()
@@ -3,6 +3,7 @@ from __future__ import annotations
 
 import inspect
 from abc import ABCMeta
+from collections import deque
 from enum import Enum
 from pathlib import Path
 from queue import Queue
@@ -22,9 +23,12 @@ class ClearableQueue(Queue[Any]):
                     raise ValueError('task_done() called too many times')
                 self.all_tasks_done.notify_all()
             self.unfinished_tasks = unfinished
-            self.queue.clear()
+            self._clear()
             self.not_full.notify_all()
 
+    def _clear(self) -> None:
+        self.queue.clear()
+
 
 class ReadOnlyDict(dict[Any, Any]):
     """A dictionary subclass where items cannot be updated."""
@@ -63,3 +67,65 @@ class MetaPluginType(type, metaclass=ABCMeta):
 
 class StringEnum(str, Enum):
     """Enum where members are also (and must be) strings."""
+
+
+class EnqueueResult(StringEnum):
+    """The outcome of a non-blocking enqueue (@see CoalescingQueue.offer())."""
+
+    ACCEPTED = 'accepted'  # The item was added to the queue.
+    COALESCED = 'coalesced'  # The item replaced a queued item with the same key.
+    REJECTED = 'rejected'  # The queue is full.
+
+
+class CoalescingQueue(ClearableQueue):
+    """
+    A clearable queue accepting items without blocking: an item with the key of an item still queued replaces it (in
+    place, hence keeping its turn), others are rejected when the queue is full.
+
+    An item without key (ex: a batch) may relate to any key: the items queued before it are never replaced anymore,
+    an item replacing them would otherwise overtake it.
+    """
+
+    def _init(self, maxsize: int) -> None:
+        self.queue: deque[list[Any]] = deque()
+        # The queued entries ([key, item]) by key.
+        self._entries: dict[Any, list[Any]] = {}
+
+    def offer(self, item: Any, key: Any = None) -> EnqueueResult:
+        """
+        Add an item to the queue without blocking.
+
+        :param any item: The item.
+        :param any key: The key of the item: None for an item that cannot be coalesced.
+        """
+        with self.mutex:
+            entry = self._entries.get(key) if key is not None else None
+            if entry is not None:
+                entry[1] = item
+                return EnqueueResult.COALESCED
+            if 0 < self.maxsize <= self._qsize():
+                return EnqueueResult.REJECTED
+            entry = [key, item]
+            if key is not None:
+                self._entries[key] = entry
+            else:
+                self._entries.clear()
+            self.queue.append(entry)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+            return EnqueueResult.ACCEPTED
+
+    def _put(self, item: Any) -> None:
+        self._entries.clear()
+        self.queue.append([None, item])
+
+    def _get(self) -> Any:
+        entry = self.queue.popleft()
+        key, item = entry
+        if key is not None and self._entries.get(key) is entry:
+            del self._entries[key]
+        return item
+
+    def _clear(self) -> None:
+        self.queue.clear()
+        self._entries.clear()
@@ -0,0 +1,146 @@
+"""
+Tracing module.
+
+Opt-in lifecycle tracing of the actions, from the client event to the board acknowledgment.
+
+When enabled, each action gets a span stamped (monotonic clock, in nanoseconds) at every stage of its journey:
+    - received:     `api.action` is called (from a socket.io event or the GUI).
+    - enqueued:     the frame is put in the board command queue.
+    - dequeued:     the board sender takes the frame out of the queue (hence, has a free slot in the ACK window).
+    - written:      the frame has been written to the protocol.
+    - acked:        the board acknowledgment for the frame has been processed.
+
+The intervals between two stages give where the time went:
+    - api:          socket.io handling, device encoding, possibly the opening of the board connexion.
+    - queue:        waiting in the command queue, including waiting for a free slot in the ACK window.
+    - write:        batching and writing to the protocol (serial write, etc.).
+    - board:        wire transfer, firmware processing and acknowledgment reception.
+
+The most recent spans are kept in a bounded in-memory buffer, which can be exported as Chrome trace / Perfetto JSON
+(@see export()) or summarized as per-interval latencies (@see summary()).
+"""
+from __future__ import annotations
+
+import itertools
+import time
+from collections import deque
+from typing import Any
+
+STAGES = ('received', 'enqueued', 'dequeued', 'written', 'acked')
+RECEIVED, ENQUEUED, DEQUEUED, WRITTEN, ACKED = range(len(STAGES))
+INTERVALS = ('api', 'queue', 'write', 'board')
+# Maximum number of spans kept in memory.
+MAX_CAPACITY = 100000
+
+_SPANS: deque[Span] | None = None
+_IDS = itertools.count(1)
+
+
+class Span:
+    """The stage timestamps of an action (0 for stages not reached yet)."""
+
+    __slots__ = ('id', 'board_id', 'device_id', 'times')
+
+    def __init__(self, board_id: int, device_id: int) -> None:
+        self.id = next(_IDS)
+        self.board_id = board_id
+        self.device_id = device_id
+        self.times = [0] * len(STAGES)
+        self.times[RECEIVED] = time.perf_counter_ns()
+
+    def stamp(self, stage: int) -> None:
+        """Stamp the given stage with the current time."""
+        self.times[stage] = time.perf_counter_ns()
+
+    def intervals(self) -> dict[str, float]:
+        """Return the duration (in ms) of each interval between two reached stages."""
+        return {
+            INTERVALS[index]: (self.times[index + 1] - self.times[index]) / 1e6
+            for index in range(len(INTERVALS))
+            if self.times[index] and self.times[index + 1]
+        }
+
+
+def enable(capacity: int = 10000) -> None:
+    """
+    Start tracing the actions, keeping the `capacity` most recent spans.
+
+    :param int capacity: The number of spans kept, up to `MAX_CAPACITY`.
+    :raise ValueError: The capacity is out of bounds.
+    """
+    global _SPANS  # noqa: PLW0603
+    if not 0 < capacity <= MAX_CAPACITY:
+        raise ValueError(f'The tracing capacity must be between 1 and {MAX_CAPACITY}.')
+    _SPANS = deque(maxlen=capacity)
+
+
+def disable() -> None:
+    """Stop tracing the actions and drop the recorded spans."""
+    global _SPANS  # noqa: PLW0603
+    _SPANS = None
+
+
+def enabled() -> bool:
+    """Return whether the actions are traced."""
+    return _SPANS is not None
+
+
+def start(board_id: int, device_id: int) -> Span | None:
+    """Start the span of an action (stamped as received): None when tracing is disabled."""
+    spans = _SPANS
+    if spans is None:
+        return None
+    span = Span(board_id, device_id)
+    spans.append(span)
+    return span
+
+
+def spans() -> list[Span]:
+    """Return the recorded spans, oldest first."""
+    return list(_SPANS or ())
+
+
+def summary() -> dict[str, dict[str, float]]:
+    """Return the latency breakdown (in ms) per interval over the recorded spans: count, p50, p99 and max."""
+    durations: dict[str, list[float]] = {interval: [] for interval in (*INTERVALS, 'total')}
+    for span in spans():
+        for interval, duration in span.intervals().items():
+            durations[interval].append(duration)
+        if span.times[ACKED]:
+            durations['total'].append((span.times[ACKED] - span.times[RECEIVED]) / 1e6)
+
+    result = {}
+    for interval, values in durations.items():
+        values.sort()
+        result[interval] = {
+            'count': len(values),
+            'p50': values[len(values) // 2] if values else 0,
+            'p99': values[min(len(values) - 1, len(values) * 99 // 100)] if values else 0,
+            'max': values[-1] if values else 0,
+        }
+    return result
+
+
+def export() -> dict[str, Any]:
+    """
+    Export the recorded spans in the Chrome trace event format (to be loaded in https://ui.perfetto.dev).
+
+    Each action is an async slice (one track per board), with a nested slice per interval.
+    """
+    events: list[dict[str, Any]] = []
+    for span in spans():
+        reached = [stamp for stamp in span.times if stamp]
+        common = {'cat': 'action', 'id': span.id, 'pid': 1, 'tid': span.board_id}
+        name = f'board {span.board_id} - device {span.device_id}'
+        events.append({**common, 'name': name, 'ph': 'b', 'ts': reached[0] / 1e3})
+        for interval, duration in span.intervals().items():
+            begin = span.times[INTERVALS.index(interval)] / 1e3
+            events.append({**common, 'name': interval, 'ph': 'b', 'ts': begin})
+            events.append({**common, 'name': interval, 'ph': 'e', 'ts': begin + duration * 1e3})
+        events.append({**common, 'name': name, 'ph': 'e', 'ts': reached[-1] / 1e3, 'args': {
+            'acked': bool(span.times[ACKED]),
+        }})
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+__ALL__ = ['Span', 'enable', 'disable', 'enabled', 'start', 'spans', 'summary', 'export']
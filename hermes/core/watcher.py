@@ -0,0 +1,283 @@
+"""
+Watcher module.
+
+Watches the configuration files and applies their changes to the running application (hot-reload): editing a device
+setting in `boards.yml` does not require a restart.
+
+The files are polled (@see start()). On a change, the whole configuration is loaded again (only the changed files are
+parsed: @see storage) and diffed against the live one in the watcher thread, then only what changed is applied, on the
+event loop mutating the boards (@see attach(), reload()):
+    - settings other than the boards:   replaced.
+    - added boards:                     registered, opened on their first mutation (@see AbstractBoard.send()).
+    - removed boards:                   closed and unregistered.
+    - edited devices (or added ones):   updated in place (their state is kept), and sent to their board as a single
+                                        PATCH frame each (the board is reopened if its command queue is full).
+    - other board changes (protocol, model, removed devices, ...): the board is replaced and reopened (with a new
+                                        handshake), its devices keeping their states.
+The device index and the snapshot are updated for the changed boards only (@see index.update(), snapshot.invalidate()).
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from mergedeep import merge
+
+from hermes.core import cli, index, logger, metrics, snapshot, storage
+from hermes.core.config import ConfigError, settings
+from hermes.core.dictionary import MessageCode
+from hermes.core.plugins import AbstractPlugin
+from hermes.core.struct import EnqueueResult
+
+# Plugin attributes which are not settings: the runtime values and the children plugins (diffed one by one).
+_RUNTIME = ('id', 'state', 'connected', 'actions', 'inputs')
+# Board settings applied without reopening the board.
+_LIVE_SETTINGS = ('name',)
+
+# The diff of a board configuration: its changed settings, its added or edited devices (as (kind, id) pairs), and
+# whether it must be reopened (@see _diff()).
+_Diff = tuple[set[str], list[tuple[str, int]], bool]
+
+_RELOAD = metrics.histogram('hermes_config_reload_seconds', 'Duration of the configuration hot-reloads.')
+
+_STOP = threading.Event()
+_THREAD: threading.Thread | None = None
+# The event loop the changes are applied on (@see attach()).
+_LOOP: asyncio.AbstractEventLoop | None = None
+
+
+def _signature() -> dict[Path, tuple[int, int]]:
+    """Return the modification time and size of each configuration file."""
+    signature = {}
+    for filename in storage.files():
+        try:
+            stat = filename.stat()
+        except OSError:
+            continue
+        signature[filename] = (stat.st_mtime_ns, stat.st_size)
+    return signature
+
+
+def _settings(plugin: AbstractPlugin) -> dict[str, Any]:
+    """Return the settings of a plugin: its serialization without the runtime values and children plugins."""
+    values = plugin.serialize(recursive=False)
+    return {
+        key: _settings(value) if isinstance(value, AbstractPlugin) else value
+        for key, value in values.items()
+        if key not in _RUNTIME
+    }
+
+
+def reload() -> None:
+    """
+    Load the configuration files again and apply their changes to the running application: they are diffed in the
+    calling thread, then applied on the event loop mutating the boards, if any (@see attach()).
+    """
+    start = time.perf_counter()
+    config = storage.load()
+    merge(config, cli.args)
+    boards = config.pop('boards', {})
+    live = settings.data.get('boards', {})
+    removed = [board_id for board_id in live if board_id not in boards]
+    diffs = {board_id: _diff(live[board_id], board) for board_id, board in boards.items() if board_id in live}
+
+    loop = _LOOP
+    if loop is None or not loop.is_running():
+        changes = _update(config, boards, removed, diffs)
+    else:
+        async def update() -> int:
+            return _update(config, boards, removed, diffs)
+        changes = asyncio.run_coroutine_threadsafe(update(), loop).result()
+
+    duration = time.perf_counter() - start
+    _RELOAD.observe(duration)
+    logger.info(f' > Configuration reloaded in {duration * 1000:.1f} ms: {changes} board(s) changed')
+
+
+def _update(config: dict[str, Any], boards: dict[int, Any], removed: list[int], diffs: dict[int, _Diff]) -> int:
+    """
+    Apply a new configuration (@see reload()).
+
+    :param dict config: The new settings, but the boards.
+    :param dict boards: The new boards, by id.
+    :param list removed: The ids of the live boards not in the new configuration.
+    :param dict diffs: The diffs of the live boards still in the new configuration (@see _diff()), by id.
+
+    :return int: the number of changed boards.
+    """
+    for key, value in config.items():
+        settings.data[key] = value
+
+    live = settings.data.setdefault('boards', {})
+    for board_id in removed:
+        _remove(board_id)
+    changes = len(removed)
+    for board_id, board in boards.items():
+        if board_id not in live:
+            live[board_id] = board
+            index.update(board_id)
+            snapshot.invalidate(board_id)
+            changes += 1
+        elif _apply(live[board_id], board, diffs[board_id]):
+            changes += 1
+    return changes
+
+
+def _remove(board_id: int) -> None:
+    """Close and unregister a board."""
+    board = settings.data['boards'].pop(board_id)
+    if board.connected:
+        board.close()
+    index.update(board_id)
+    snapshot.invalidate(board_id)
+
+
+def _diff(board: Any, new: Any) -> _Diff:
+    """
+    Diff a board configuration against the live board.
+
+    :param AbstractBoard board: the live board.
+    :param AbstractBoard new: the board as loaded from the new configuration.
+
+    :return tuple: the changed settings, the added or edited devices (as (kind, id) pairs), and whether the board must
+        be reopened.
+    """
+    current = _settings(board)
+    changed = {key for key, value in _settings(new).items() if current.get(key) != value}
+    reopen = bool(changed.difference(_LIVE_SETTINGS))
+    # Devices can only be removed from a board by a new handshake.
+    if reopen or any(set(getattr(board, kind)) - set(getattr(new, kind)) for kind in ('actions', 'inputs')):
+        return changed, [], True
+
+    devices = []
+    for kind in ('actions', 'inputs'):
+        lives = getattr(board, kind)
+        for device_id, device in getattr(new, kind).items():
+            live = lives.get(device_id)
+            if live is None or type(live) is not type(device) or _settings(live) != _settings(device):
+                devices.append((kind, device_id))
+    return changed, devices, False
+
+
+def _apply(board: Any, new: Any, diff: _Diff) -> bool:
+    """
+    Apply the changes of a board configuration to the live board.
+
+    :param AbstractBoard board: the live board.
+    :param AbstractBoard new: the board as loaded from the new configuration.
+    :param tuple diff: the diff of the new configuration against the live board (@see _diff()).
+
+    :return bool: whether anything changed.
+    """
+    changed, devices, reopen = diff
+    if reopen:
+        _reopen(board, new)
+        return True
+
+    patches = []
+    for kind, device_id in devices:
+        lives = getattr(board, kind)
+        live = lives.get(device_id)
+        device = getattr(new, kind)[device_id]
+        if live is None or type(live) is not type(device):
+            lives[device_id] = device
+            patches.append(device)
+        else:
+            values = _settings(device)
+            live.__dict__.update({key: value for key, value in vars(device).items() if key in values})
+            patches.append(live)
+    for key in changed:
+        setattr(board, key, getattr(new, key))
+    if not patches and not changed:
+        return False
+
+    # The devices not connected yet get their settings with the handshake.
+    if board.connected and patches:
+        _patch(board, patches)
+    index.update(board.id)
+    snapshot.invalidate(board.id)
+    return True
+
+
+def _patch(board: Any, devices: list[Any]) -> None:
+    """
+    Send the PATCH frames of edited devices to their board, in a single slot of its command queue: if the queue is
+    full, the board is reopened instead, its handshake sending all its devices.
+    """
+    commands = [(bytearray([MessageCode.PATCH]) + device.as_playload(), None) for device in devices]
+    if board.send_batch(commands) is EnqueueResult.REJECTED:
+        logger.warning(f' > Board {board.name} - command queue full: reopened to patch its devices')
+        board.close()
+        board.connect()
+
+
+def _reopen(board: Any, new: Any) -> None:
+    """Replace a board by its new configuration: the devices keep their states, and the connexion is reopened."""
+    for kind in ('actions', 'inputs'):
+        devices = getattr(board, kind)
+        for device_id, device in getattr(new, kind).items():
+            if type(devices.get(device_id)) is type(device):
+                device.state = devices[device_id].state
+    connected = board.connected
+    if connected:
+        board.close()
+    settings.data['boards'][board.id] = new
+    index.update(board.id)
+    snapshot.invalidate(board.id)
+    if connected:
+        new.connect()
+
+
+def _watch(interval: float) -> None:
+    """Poll the configuration files, and reload them on any change."""
+    signature = _signature()
+    while not _STOP.wait(interval):
+        current = _signature()
+        if current == signature:
+            continue
+        signature = current
+        try:
+            reload()
+        # A configuration being edited can be temporarily broken: the watcher must go on.
+        except Exception as error:
+            ConfigError(f'Configuration reload failed: {error}')
+
+
+def attach(loop: asyncio.AbstractEventLoop | None) -> None:
+    """
+    Apply the configuration changes on the given event loop, the one mutating the boards (ex: the server's): they
+    never interleave with the mutations. Without one, they are applied in the watcher thread.
+
+    :param AbstractEventLoop loop: The event loop, None to detach it.
+    """
+    global _LOOP  # noqa: PLW0603
+    _LOOP = loop
+
+
+def start(interval: float = 1.0) -> None:
+    """
+    Start watching the configuration files in a background thread.
+
+    :param float interval: The polling interval (in seconds).
+    """
+    global _THREAD  # noqa: PLW0603
+    stop()
+    _STOP.clear()
+    _THREAD = threading.Thread(target=_watch, args=(interval,), name='ConfigWatcher', daemon=True)
+    _THREAD.start()
+    logger.info(f' > Watching the configuration files (every {interval}s)')
+
+
+def stop() -> None:
+    """Stop watching the configuration files."""
+    global _THREAD  # noqa: PLW0603
+    if _THREAD is not None:
+        _STOP.set()
+        _THREAD.join()
+        _THREAD = None
+
+
+__ALL__ = ['attach', 'reload', 'start', 'stop']
@@ -19,17 +19,14 @@ from __future__ import annotations
 
 from abc import abstractmethod
 from collections.abc import Callable
-from typing import Any
+from typing import Any, cast
 
-from nicegui import ui
-
-from hermes import gui
-from hermes.core import logger
-from hermes.core.config import settings
+from hermes.core import index, plugins
 from hermes.core.dictionary import MessageCode
 from hermes.core.logger import HermesError
 from hermes.core.plugins import AbstractPlugin
-from hermes.core.struct import MetaPluginType, MetaSingleton
+from hermes.core.struct import EnqueueResult, MetaPluginType, MetaSingleton
+from hermes.core.tracing import Span
 
 
 class DeviceError(HermesError):
@@ -56,6 +53,14 @@ class AbstractDevice(AbstractPlugin, metaclass=MetaPluginType):
         self.default: Any = default
         self.state = default
 
+    @classmethod
+    def from_mapping(cls, mapping: dict[str, Any]) -> AbstractDevice:
+        """Instantiate the device from its configuration values: it starts in its default state (unless restored)."""
+        device: Any = super().from_mapping(mapping)
+        if 'state' not in mapping:
+            device.state = device.default
+        return cast(AbstractDevice, device)
+
     @property
     @abstractmethod
     def code(self) -> MessageCode:
@@ -66,6 +71,7 @@ class AbstractDevice(AbstractPlugin, metaclass=MetaPluginType):
         Render a device using nicegui.io syntax.
         This method _can_ be overriden but is not meant to.
         """
+        from hermes import gui
         with gui.container().classes('device-icon'):
             icon = self.render_icon()
             if icon:
@@ -84,6 +90,7 @@ class AbstractDevice(AbstractPlugin, metaclass=MetaPluginType):
 
     def render_name(self) -> None:
         """Render the board name."""
+        from nicegui import ui
         ui.label().bind_text(self, 'name')
 
     def render_info(self) -> None:
@@ -94,6 +101,7 @@ class AbstractDevice(AbstractPlugin, metaclass=MetaPluginType):
 
     def render_action(self, mutator: Callable[[int, Any], None]) -> None:
         """Render an actionable input to bind with the board action."""
+        from nicegui import ui
         ui.label('No action here.').classes('text-italic')
 
     @abstractmethod
@@ -117,16 +125,19 @@ class AbstractDevice(AbstractPlugin, metaclass=MetaPluginType):
         data = self._encode_data()
         return bytearray([len(data) + 2]) + header + data
 
-    def set_value(self, board_id: int, value: Any) -> None:
-        """Send the command."""
-        board: Any = settings.get(['boards', board_id])
+    def as_mutation(self, value: Any) -> bytearray:
+        """Return the MUTATION command changing the device to the given value, as a bytearray."""
+        return bytearray([MessageCode.MUTATION, self.id]) + self._encode_value(value)
 
-        if not board.connected and not board.open():
-            raise DeviceError(f'Board {board.id} ({board.name}) is not connected.')
-
-        header = bytearray([MessageCode.MUTATION, self.id])
-        data = self._encode_value(value)
-        board.send(header + data)
+    def set_value(self, board_id: int, value: Any, span: Span | None = None) -> EnqueueResult:
+        """
+        Send the command (traced by the given span, if any: @see tracing), without blocking: a command of this device
+        still waiting to be sent is replaced (@see AbstractBoard.send()).
+        """
+        handle = index.get(board_id, self.id)
+        if handle is None or handle.device is not self:
+            raise DeviceError(f'{self} is not a device of board {board_id}.')
+        return handle.send(value, span)
 
     def __str__(self) -> str:
         return f'Device {self.name}'
@@ -136,12 +147,9 @@ class DeviceFactory(metaclass=MetaSingleton):
     """Device factory class: instantiates a Device of a given type."""
 
     def __init__(self) -> None:
+        # The devices by code, instantiated on first use: their plugin module is only imported then (@see plugins).
         self.__devices: dict[MessageCode, AbstractDevice] = {}
 
-        # Self registers all AbstractDevice defined plugins.
-        for device in AbstractDevice.plugins:
-            self.__devices[device().code] = device()
-
     def get_by_code(self, code: MessageCode) -> AbstractDevice:
         """
         Instantiate a AbstractDevice based on a given MessageCode.
@@ -154,11 +162,12 @@ class DeviceFactory(metaclass=MetaSingleton):
 
         **See also:** :class:`MessageCode`
         """
-        device = self.__devices.get(code)
-        if device is None:
-            logger.error(f'Device {code} do not exists.')
-            raise DeviceError(f'Device with code `{code}` do not exists.')
-        return device
+        if code not in self.__devices:
+            plugin = plugins.by_code('devices', code)
+            if plugin is None:
+                raise DeviceError(f'Device with code `{code}` do not exists.')
+            self.__devices[code] = cast(AbstractDevice, plugin())
+        return self.__devices[code]
 
     def get_by_name(self, name: str) -> AbstractDevice:
         """
@@ -172,9 +181,11 @@ class DeviceFactory(metaclass=MetaSingleton):
 
         **See Also:** :class:`MessageCode`
         """
+        for entry in plugins.entries('devices'):
+            if entry.code is not None:
+                self.get_by_code(MessageCode(entry.code))
         device = next((device for device in self.__devices.values() if device.name == name), None)
         if device is None:
-            logger.error(f'Device {name} do not exists.')
             raise DeviceError(f'Device with name `{name}` do not exists.')
         return device
 
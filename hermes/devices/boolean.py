@@ -6,8 +6,6 @@ code: MessageCode::BOOLEAN_OUTPUT
 from collections.abc import Callable
 from typing import Any
 
-from nicegui import ui
-
 from hermes.core.dictionary import MessageCode
 from hermes.devices import AbstractDevice
 
@@ -24,15 +22,17 @@ class BooleanOutputDevice(AbstractDevice):
         return MessageCode.BOOLEAN_OUTPUT
 
     def _encode_data(self) -> bytearray:
-        return bytearray([self.pin, self.default])
+        return bytearray([self.pin, self.state])
 
     def _encode_value(self, value: Any) -> bytearray:
         return bytearray([value])
 
     def render_info(self) -> None:  # noqa: D102
+        from nicegui import ui
         ui.label(f'(pin: {self.pin})')
 
     def render_action(self, mutator: Callable[[int, Any], None]) -> None:  # noqa: D102
+        from nicegui import ui
         ui.switch(on_change=lambda: mutator(self.id, self.state)) \
             .props('dense keep-color color="primary" size="xl"') \
             .bind_value(self, 'state')
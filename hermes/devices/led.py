@@ -3,7 +3,6 @@ LED device: this device represents a simple LED.
 https://en.wikipedia.org/wiki/Light-emitting_diode.
 """
 
-from hermes import gui
 from hermes.devices.boolean import BooleanOutputDevice
 
 
@@ -12,5 +11,6 @@ class LedDevice(BooleanOutputDevice):
 
     @classmethod
     def render_icon(cls) -> str:  # noqa: D102
+        from hermes import gui
         gui.icon('led', 30, 30)
         return ''
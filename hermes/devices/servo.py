@@ -6,9 +6,6 @@ code: MessageCode::SERVO
 from collections.abc import Callable
 from typing import Any
 
-from nicegui import ui
-
-from hermes import gui
 from hermes.core.dictionary import MessageCode
 from hermes.devices import AbstractDevice
 
@@ -31,13 +28,16 @@ class ServoDevice(AbstractDevice):
         return MessageCode.SERVO
 
     def render_icon(self) -> str:  # noqa: D102
+        from hermes import gui
         gui.icon('servo', 30, 40)
         return ''
 
     def render_info(self) -> None:  # noqa: D102
+        from nicegui import ui
         ui.label(f'(pin: {self.pin})')
 
     def render_action(self, mutator: Callable[[int, Any], None]) -> None:  # noqa: D102
+        from nicegui import ui
         # with ui.column():
         ui.slider(min=self.min, max=self.max, value=self.state) \
             .on('change', lambda value: mutator(self.id, value['args'])) \
@@ -48,7 +48,7 @@ class ServoDevice(AbstractDevice):
 
     def _encode_data(self) -> bytearray:
         return bytearray([self.pin]) + \
-            self._encode_value(self.default) + \
+            self._encode_value(self.state) + \
             self._encode_value(self.tmin) + \
             self._encode_value(self.tmax) + \
             self._encode_value(self.min) + \
@@ -1,26 +1,71 @@
-"""Contain all definition and GUI specific implementation."""
+"""
+Contain all definition and GUI specific implementation.
+
+The GUI is a presentation layer on top of the engine: it is only imported when served (@see server, `--headless`).
+It mutates the devices through the API (@see mutator()), and follows their state changes as an API observer.
+"""
+import asyncio
+from collections.abc import Callable
 from typing import Any
 
 from fastapi import FastAPI
-from nicegui import ui
+from nicegui import background_tasks, ui
 
 from hermes import __app__, __tagline__
+from hermes.boards import AbstractBoard, BoardError
+from hermes.core import api, plugins
 from hermes.gui.components.container import Container as container  # noqa: N813, F401
 from hermes.gui.components.icon import Icon as icon  # noqa: N813, F401
 from hermes.gui.components.tag import Tag as tag  # noqa: N813, F401
-from hermes.gui.pages import AbstractPage
+from hermes.gui.pages import AbstractPage  # noqa: F401
 
 CLIENT_ID = __app__
 
+# Maximum duration (in seconds) of a mutation from the GUI.
+_MUTATION_TIMEOUT = 5
+
+
+def mutator(board: AbstractBoard) -> Callable[[int, Any], None]:
+    """
+    GUI Helper: return the function for the devices of a board to mutate their state via UI inputs.
+
+    Each mutation runs as a task of the event loop (capped to `_MUTATION_TIMEOUT` seconds): the UI handler returns
+    right away.
+
+    @see hermes.gui.pages.BoardPage.
+
+    :param AbstractBoard board: the board of the devices.
+    """
+
+    def mutate(device_id: int, state: Any) -> None:
+        background_tasks.create(_mutation(board, device_id, state), name='gui_mutator')
+
+    return mutate
+
+
+async def _mutation(board: AbstractBoard, device_id: int, state: Any) -> None:
+    try:
+        await asyncio.wait_for(api.action(CLIENT_ID, board.id, device_id, state), _MUTATION_TIMEOUT)
+    except asyncio.TimeoutError:
+        BoardError(board, f'GUI mutation of device {device_id} timed out.')
+
+
+def _refresh(devices: list[Any]) -> None:
+    """Refresh the widgets of the changed devices rendered in the GUI (@see api.observe())."""
+    widgets = [device.gui_actions for device in devices if device.gui_actions]
+    if widgets:
+        ui.update(*widgets)
+
 
 def init(app: FastAPI) -> None:
     """Define and attach the GUI routes associated with a fastAPI server."""
 
     page: Any
-    for page in AbstractPage.plugins:
+    for page in plugins.load_all('gui.pages'):
         ui.page(page.path)(page().create)
+    api.observe(_refresh)
 
     ui.run_with(app, title=f'{__app__} - {__tagline__}')
 
 
-__ALL__ = ['CLIENT_ID', 'init', 'container', 'icon', 'tag']
+__ALL__ = ['CLIENT_ID', 'init', 'mutator', 'container', 'icon', 'tag']
@@ -18,7 +18,8 @@ class ProtocolError(HermesError):
     """Base class for protocol related exceptions."""
 
     def __init__(self, protocol: AbstractProtocol, message: str):
-        super().__init__(f'{protocol.__class__.__name__}: {message}')
+        name = protocol.__class__.__name__
+        super().__init__(f'{name}: {message}', key=f'{type(self).__name__} {name}({protocol.id})')
 
 
 class AbstractProtocol(AbstractPlugin, metaclass=MetaPluginType):
@@ -46,6 +47,16 @@ class AbstractProtocol(AbstractPlugin, metaclass=MetaPluginType):
         :return int: The 8bit next byte in queue.
         """
 
+    def poll(self, timeout: float) -> bool:
+        """
+        Wait (up to the timeout) for incoming data, so that callers with a deadline do not block in `read_byte()`.
+        Protocols that cannot tell never wait and return True: reading may then block.
+
+        :param float timeout: The maximum time to wait (in seconds).
+        :return bool: True if a byte can be read.
+        """
+        return True
+
     @abstractmethod
     def send(self, data: bytearray) -> None:
         """
@@ -53,6 +64,13 @@ class AbstractProtocol(AbstractPlugin, metaclass=MetaPluginType):
         :param bytearray data:  An array of byte to send.
         """
 
+    def stats(self) -> dict[str, int]:
+        """
+        Return the I/O counters of the connexion (bytes read, driver calls, wakeups, etc.).
+        :return dict[str, int]: The counters, by name. Empty if the protocol does not count anything.
+        """
+        return {}
+
     @abstractmethod
     # @func_set_timeout(1)
     def read_line(self) -> str:
@@ -4,10 +4,11 @@ Ethernet communication handling.
 Used by boards connected via an RJ45, usually through an appropriate ethernet shield.
 """
 import contextlib
+import select
 import socket
 
 from hermes.core import logger
-from hermes.core.logger import HermesError
+from hermes.core.logger import HermesError, TraceChannel
 from hermes.protocols import AbstractProtocol
 
 
@@ -38,16 +39,23 @@ class EthernetProtocol(AbstractProtocol):
     def is_open(self) -> bool:  # noqa: D102
         return self._is_open
 
+    def poll(self, timeout: float) -> bool:  # noqa: D102
+        try:
+            readable, _, _ = select.select([self._socket], [], [], timeout)
+        except (OSError, ValueError):
+            return False
+        return bool(readable)
+
     def read_byte(self) -> int:  # noqa: D102
         bytes_array = None
         while not bytes_array:
             with contextlib.suppress(socket.error):
                 bytes_array = bytearray(self._socket.recv(1))
-        logger.debug(f'Serial protocol: Received command code {str(bytes_array[0])}')
+        logger.trace(TraceChannel.PROTOCOL, 'Ethernet protocol: Received command code %s', bytes_array[0])
         return bytes_array[0]
 
     def send(self, data: bytearray) -> None:  # noqa: D102
-        logger.debug(f'Ethernet protocol: Send command {data} - {list(data)}')
+        logger.trace(TraceChannel.PROTOCOL, 'Ethernet protocol: Send command %s - %s', data, logger.lazy(list, data))
         try:
             self._socket.send(data)
         except socket.error as error:  # noqa: UP024
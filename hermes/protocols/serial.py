@@ -4,24 +4,28 @@ Serial communication handling.
 Used by boards connected to the server via a USB serial cable.
 """
 
-import glob
 import sys
+import time
+from pathlib import Path
 
 from serial import Serial, SerialException
 
 from hermes.core import logger
+from hermes.core.logger import TraceChannel
 from hermes.protocols import AbstractProtocol, ProtocolError
 
 
 class SerialProtocol(AbstractProtocol):
     """Implements an :class:AbstractProtocol class using the serial port."""
 
-    def __init__(self, port: str, baudrate: int = 115200, timeout: int = 0) -> None:
+    def __init__(self, port: str, baudrate: int = 115200, timeout: float = 0.1) -> None:
         super().__init__()
         self.port: str = port
         self.baudrate: int = baudrate
-        self._timeout: int = timeout
+        self._timeout: float = timeout
         self._serial: Serial = Serial()
+        self._buffer = bytearray()
+        self._stats: dict[str, int] = dict.fromkeys(['bytes_read', 'driver_calls', 'wakeups', 'idle_wakeups'], 0)
 
     def open(self) -> None:  # noqa: D102
         try:
@@ -35,22 +39,61 @@ class SerialProtocol(AbstractProtocol):
         except SerialException as error:
             logger.exception(f'Available ports are {self.get_serial_ports()}')
             raise ProtocolError(self, f'Port {self.port} could not be opened: {error}') from error
+        self._buffer.clear()
 
     def close(self) -> None:  # noqa: D102
         self._serial.close()
+        logger.debug('Serial protocol: Port %s closed with stats %s', self.port, self._stats)
 
     def is_open(self) -> bool:  # noqa: D102
         return bool(self._serial.isOpen())
 
+    def stats(self) -> dict[str, int]:  # noqa: D102
+        return self._stats.copy()
+
+    def _fill(self) -> None:
+        """
+        Wait for incoming data and drain all of it into the internal buffer.
+
+        Rather than polling the port byte per byte, this blocks (up to the timeout) until data is available,
+        then reads all the bytes already waiting in the driver in a single call.
+
+        The `driver_calls` stat counts the calls to the serial driver (pyserial) as they are made: each one costs one
+        or more system calls, depending on the platform.
+
+        :raise ProtocolError: the port cannot be read (ie. closed or disconnected).
+        """
+        try:
+            self._stats['driver_calls'] += 1
+            waiting = self._serial.in_waiting
+            self._stats['driver_calls'] += 1
+            data = self._serial.read(waiting or 1)
+        except (OSError, SerialException) as error:
+            raise ProtocolError(self, f'Port {self.port} could not be read: {error}') from error
+
+        self._stats['wakeups'] += 1
+        if data:
+            self._stats['bytes_read'] += len(data)
+            self._buffer += data
+        else:
+            self._stats['idle_wakeups'] += 1
+
+    def poll(self, timeout: float) -> bool:  # noqa: D102
+        deadline = time.monotonic() + timeout
+        while not self._buffer and time.monotonic() < deadline:
+            self._fill()
+        return bool(self._buffer)
+
     def read_byte(self) -> int:  # noqa: D102
-        bytes_array = None
-        while not bytes_array:
-            bytes_array = bytearray(self._serial.read(1))
-        logger.debug(f'Serial protocol: Received command code {str(bytes_array[0])}')
-        return bytes_array[0]
+        while not self._buffer:
+            self._fill()
+        byte = self._buffer[0]
+        del self._buffer[0]
+        logger.trace(TraceChannel.PROTOCOL, 'Serial protocol: Received command code %s', byte)
+        return byte
 
     def send(self, data: bytearray) -> None:  # noqa: D102
-        logger.debug(f'Serial protocol: Send command {data} - {list(data)}')
+        logger.trace(TraceChannel.PROTOCOL, 'Serial protocol: Send command %s - %s', data, logger.lazy(list, data))
         try:
             self._serial.write(data)
         except SerialException:
@@ -58,12 +101,8 @@ class SerialProtocol(AbstractProtocol):
 
     def read_line(self) -> str:  # noqa: D102
         response = ''
-        while True:
-            bytes_array = bytearray(self._serial.read(1))
-            if bytes_array:
-                response += chr(bytes_array[0])
-            if '\r\n' in response:
-                break
+        while '\r\n' not in response:
+            response += chr(self.read_byte())
         return response.rstrip()
 
     @staticmethod
@@ -78,9 +117,9 @@ class SerialProtocol(AbstractProtocol):
             ports = [f'COM{(i + 1)}' for i in range(256)]
         elif sys.platform.startswith('linux') or sys.platform.startswith('cygwin'):
             # Exclude your current terminal "/dev/tty".
-            ports = glob.glob('/dev/tty[A-Za-z]*')
+            ports = [str(path) for path in Path('/dev').glob('tty[A-Za-z]*')]
         elif sys.platform.startswith('darwin'):
-            ports = glob.glob('/dev/tty.*')
+            ports = [str(path) for path in Path('/dev').glob('tty.*')]
         else:
             raise OSError('Unsupported platform')
 
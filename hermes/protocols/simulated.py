@@ -0,0 +1,358 @@
+"""
+Simulated communication handling.
+
+Used to run HERMES without any physical board plugged in: each protocol instance embeds a virtual board emulating
+the behavior of the arduino firmware (see the `arduino` folder). It is meant for load testing, benchmarks and CI.
+
+The virtual board understands the same byte frames as the firmware:
+ - HANDSHAKE [n]: followed by n PATCH frames, acknowledged once all of them are received.
+ - PATCH [size, device_code, device_id, data...]: creates (or updates) a device.
+ - MUTATION [device_id, value...]: mutates a device; the value length depends on the device type.
+Any top-level command is acknowledged by an ACK byte, unknown commands are silently dropped (as the firmware does).
+
+The wire between this server and the virtual board can be:
+ - an in-memory pipe (default),
+ - a pseudo-terminal pair (`pty: true`, POSIX only) so that the actual serial stack is exercised.
+In both cases, latency, jitter and baud-rate throttling are applied to the bytes transmitted on the wire.
+"""
+from __future__ import annotations
+
+import os
+import random
+import threading
+import time
+from collections import deque
+
+from hermes.boards.arduino import ArduinoBoard, ArduinoBoardType
+from hermes.core.dictionary import MessageCode
+from hermes.devices.servo import ServoDevice
+from hermes.protocols import AbstractProtocol, ProtocolError
+from hermes.protocols.serial import SerialProtocol
+
+# Number of bits needed to transmit a byte on a serial line (1 start bit, 8 data bits, 1 stop bit).
+_BITS_PER_BYTE = 10
+
+# Length of the PATCH payload header: the device code, then the device id (followed by the device settings).
+_PATCH_HEADER_SIZE = 2
+
+# Length of the MUTATION value depending on the device type (@see arduino/devices).
+_VALUE_SIZES: dict[int, int] = {
+    MessageCode.BOOLEAN_OUTPUT: 1,
+    MessageCode.SERVO: 2,
+}
+
+
+class _Wire:
+    """
+    A one-way in-memory byte pipe emulating a physical link.
+
+    Each chunk of bytes written is delivered to the reader once it has been "transmitted": the wire can only carry
+    `baudrate` bits per second and each chunk is delayed by the latency (plus or minus the jitter).
+    Bytes are never reordered.
+    """
+
+    def __init__(self, latency: float = 0, jitter: float = 0, baudrate: int = 0) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.baudrate = baudrate
+        self.closed = False
+        self._chunks: deque[tuple[float, bytes]] = deque()
+        self._buffer = bytearray()
+        self._busy_until = 0.0
+        self._last_ready = 0.0
+        self._condition = threading.Condition()
+
+    def write(self, data: bytes) -> None:
+        """Put data on the wire."""
+        now = time.monotonic()
+        with self._condition:
+            ready_at = now
+            if self.baudrate:
+                self._busy_until = max(now, self._busy_until) + len(data) * _BITS_PER_BYTE / self.baudrate
+                ready_at = self._busy_until
+            if self.latency or self.jitter:
+                ready_at += max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))  # noqa: S311
+            self._last_ready = max(ready_at, self._last_ready)
+            self._chunks.append((self._last_ready, bytes(data)))
+            self._condition.notify_all()
+
+    def read(self, size: int = 1, timeout: float | None = None) -> bytes:
+        """
+        Read at most `size` bytes from the wire.
+        Blocks until at least one byte is delivered, the timeout expires or the wire is closed.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                while self._chunks and self._chunks[0][0] <= now:
+                    self._buffer += self._chunks.popleft()[1]
+                if self._buffer or self.closed:
+                    data = bytes(self._buffer[:size])
+                    del self._buffer[:size]
+                    return data
+                wait = None if deadline is None else deadline - now
+                if self._chunks:
+                    wait = self._chunks[0][0] - now if wait is None else min(wait, self._chunks[0][0] - now)
+                if wait is not None and wait <= 0:
+                    if deadline is not None and now >= deadline:
+                        return b''
+                    continue
+                self._condition.wait(wait)
+
+    def close(self) -> None:
+        """Close the wire: wakes up any pending reader."""
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+
+class VirtualDevice:
+    """A device as known by the virtual board."""
+
+    def __init__(self, code: int, device_id: int, settings: bytes) -> None:
+        self.code = code
+        self.id = device_id
+        self.settings = settings
+        self.value: bytes = b''
+        self.mutations = 0
+
+
+class VirtualBoard(threading.Thread):
+    """
+    Thread emulating the arduino firmware main loop: receive a command, process it, acknowledge it.
+
+    :param _Wire rx: the wire the board receives data from.
+    :param _Wire tx: the wire the board sends data to.
+    """
+
+    def __init__(self, rx: _Wire, tx: _Wire) -> None:
+        super().__init__(daemon=True)
+        self.rx = rx
+        self.tx = tx
+        self.devices: dict[int, VirtualDevice] = {}
+        self.received = 0
+        self.acknowledged = 0
+
+    def run(self) -> None:  # noqa: D102
+        while not self.rx.closed:
+            code = self._read(1)
+            if code is None:
+                continue
+            self.received += 1
+            if self._process(code[0]):
+                self.tx.write(bytes([MessageCode.ACK]))
+                self.acknowledged += 1
+
+    def _read(self, size: int) -> bytes | None:
+        """Read exactly `size` bytes, or return None if the wire gets closed."""
+        data = b''
+        while len(data) < size:
+            chunk = self.rx.read(size - len(data), timeout=0.1)
+            if self.rx.closed and not chunk:
+                return None
+            data += chunk
+        return data
+
+    def _process(self, code: int) -> bool:
+        """Process a top-level command: returns whether it should be acknowledged."""
+        match code:
+            case MessageCode.HANDSHAKE:
+                payload = self._read(1)
+                if payload is None:
+                    return False
+                for _ in range(payload[0]):
+                    patch = self._read(1)
+                    if patch is None or patch[0] != MessageCode.PATCH:
+                        break
+                    self._patch()
+                return True
+            case MessageCode.PATCH:
+                self._patch()
+                return True
+            case MessageCode.MUTATION:
+                self._mutate()
+                return True
+            case MessageCode.VOID:
+                return True
+        return False
+
+    def _patch(self) -> None:
+        size = self._read(1)
+        if size is None:
+            return
+        payload = self._read(size[0])
+        if payload is None or len(payload) < _PATCH_HEADER_SIZE:
+            return
+        device = self.devices.get(payload[1])
+        if device is None:
+            self.devices[payload[1]] = VirtualDevice(payload[0], payload[1], payload[_PATCH_HEADER_SIZE:])
+        else:
+            device.settings = payload[_PATCH_HEADER_SIZE:]
+
+    def _mutate(self) -> None:
+        device_id = self._read(1)
+        if device_id is None:
+            return
+        device = self.devices.get(device_id[0])
+        if device is None:
+            # The firmware does not consume the value of unknown devices.
+            return
+        value = self._read(_VALUE_SIZES.get(device.code, 0))
+        if value is not None:
+            device.value = value
+            device.mutations += 1
+
+
+class SimulatedProtocol(AbstractProtocol):
+    """
+    Implements an :class:AbstractProtocol class talking to an in-process virtual board.
+
+    :param float latency:   one-way latency of the wire (in seconds).
+    :param float jitter:    maximum random deviation applied to the latency (in seconds).
+    :param int baudrate:    maximum throughput of the wire in bauds (0 means unlimited).
+    :param bool pty:        whether to use a pseudo-terminal pair (and the serial stack) instead of an in-memory pipe.
+    """
+
+    def __init__(self, latency: float = 0, jitter: float = 0, baudrate: int = 0, pty: bool = False) -> None:
+        super().__init__()
+        self.latency: float = latency
+        self.jitter: float = jitter
+        self.baudrate: int = baudrate
+        self.pty: bool = pty
+        self._rx: _Wire = _Wire()
+        self._tx: _Wire = _Wire()
+        self._board: VirtualBoard | None = None
+        self._serial: SerialProtocol | None = None
+        self._pumps: list[threading.Thread] = []
+        self._is_open = False
+        self._buffer = bytearray()
+        self._stats: dict[str, int] = dict.fromkeys(['bytes_read', 'wakeups', 'idle_wakeups'], 0)
+
+    @property
+    def board(self) -> VirtualBoard | None:
+        """The virtual board at the other end of the wire."""
+        return self._board
+
+    def open(self) -> None:  # noqa: D102
+        self._rx = _Wire(self.latency, self.jitter, self.baudrate)
+        self._tx = _Wire(self.latency, self.jitter, self.baudrate)
+        self._board = VirtualBoard(self._rx, self._tx)
+        if self.pty:
+            self._open_pty()
+        self._board.start()
+        self._is_open = True
+
+    def _open_pty(self) -> None:
+        """Bind the wires to the master side of a pseudo-terminal and open the slave side as a serial port."""
+        try:
+            import tty
+            master, slave = os.openpty()
+            tty.setraw(master)
+            tty.setraw(slave)
+            port = os.ttyname(slave)
+        except (AttributeError, ImportError, OSError) as error:
+            raise ProtocolError(self, f'Pseudo-terminal could not be created: {error}') from error
+
+        def _upstream() -> None:
+            while not self._rx.closed:
+                try:
+                    self._rx.write(os.read(master, 1024))
+                except OSError:
+                    break
+
+        def _downstream() -> None:
+            while not self._tx.closed:
+                data = self._tx.read(1024, timeout=0.1)
+                if data:
+                    os.write(master, data)
+            os.close(master)
+
+        self._pumps = [threading.Thread(target=_upstream, daemon=True), threading.Thread(target=_downstream, daemon=True)]
+        for pump in self._pumps:
+            pump.start()
+        self._serial = SerialProtocol(port, self.baudrate or 115200)
+        self._serial.open()
+        os.close(slave)
+
+    def close(self) -> None:  # noqa: D102
+        self._is_open = False
+        if self._serial:
+            self._serial.close()
+            self._serial = None
+        self._rx.close()
+        self._tx.close()
+        if self._board and self._board.is_alive():
+            self._board.join()
+
+    def is_open(self) -> bool:  # noqa: D102
+        return self._is_open
+
+    def stats(self) -> dict[str, int]:  # noqa: D102
+        if self._serial:
+            return self._serial.stats()
+        return self._stats.copy()
+
+    def poll(self, timeout: float) -> bool:  # noqa: D102
+        if self._serial:
+            return self._serial.poll(timeout)
+        if not self._buffer and self._is_open:
+            self._receive(timeout)
+        return bool(self._buffer)
+
+    def read_byte(self) -> int:  # noqa: D102
+        if self._serial:
+            return self._serial.read_byte()
+        while not self._buffer:
+            if not self._is_open:
+                raise ProtocolError(self, 'Cannot read from a closed connexion.')
+            self._receive(0.1)
+        byte = self._buffer[0]
+        del self._buffer[0]
+        return byte
+
+    def _receive(self, timeout: float) -> None:
+        """Move the bytes delivered by the wire (waiting up to the timeout) into the internal buffer."""
+        data = self._tx.read(1024, timeout=timeout)
+        self._stats['wakeups'] += 1
+        self._stats['bytes_read'] += len(data)
+        if not data:
+            self._stats['idle_wakeups'] += 1
+        self._buffer += data
+
+    def send(self, data: bytearray) -> None:  # noqa: D102
+        if self._serial:
+            self._serial.send(data)
+            return
+        if not self._is_open:
+            ProtocolError(self, f'Error sending command {data} - {list(data)}')
+            return
+        self._rx.write(bytes(data))
+
+    def read_line(self) -> str:  # noqa: D102
+        response = ''
+        while '\r\n' not in response:
+            response += chr(self.read_byte())
+        return response.rstrip()
+
+
+def simulated_board(board_id: int, servos: int = 2, protocol: SimulatedProtocol | None = None) -> ArduinoBoard:
+    """
+    Create an arduino board talking to a virtual board, with servos (ids 1 to `servos`, on pins 2 and up): the board
+    of the tests and benchmarks. It is not opened.
+
+    :param int board_id:                the id of the board.
+    :param int servos:                  the number of servos of the board.
+    :param SimulatedProtocol protocol:  the protocol of the board (default: an in-memory wire without latency).
+
+    :return ArduinoBoard: The board.
+    """
+    board = ArduinoBoard(protocol or SimulatedProtocol(), ArduinoBoardType.MEGA)
+    board.id = board_id
+    board.name = f'Simulated board #{board_id}'
+    for device_id in range(1, servos + 1):
+        servo = ServoDevice()
+        servo.id = device_id
+        servo.pin = device_id + 1
+        board.actions[device_id] = servo
+    return board
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+"""Tests for the simulated protocol module."""
+
+import time
+import unittest
+
+from hermes.core.dictionary import MessageCode
+from hermes.protocols.simulated import SimulatedProtocol
+
+
+class SimulatedProtocolTest(unittest.TestCase):
+    """Implements tests for the SimulatedProtocol class."""
+
+    def setUp(self):
+        """Open a simulated protocol with a handshake of two devices."""
+        self._protocol = SimulatedProtocol()
+        self._protocol.open()
+        self._protocol.send(bytearray([MessageCode.HANDSHAKE, 2]))
+        self._protocol.send(bytearray([MessageCode.PATCH, 4, MessageCode.BOOLEAN_OUTPUT, 1, 13, 0]))
+        self._protocol.send(bytearray([MessageCode.PATCH, 5, MessageCode.SERVO, 2, 9, 0, 0]))
+
+    def tearDown(self):
+        """Close the simulated protocol."""
+        self._protocol.close()
+
+    def test_handshake(self):
+        """The handshake is acknowledged once, after all devices are patched."""
+        self.assertEqual(MessageCode.ACK, self._protocol.read_byte())
+        self.assertEqual([1, 2], sorted(self._protocol.board.devices))
+        self.assertEqual(MessageCode.SERVO, self._protocol.board.devices[2].code)
+
+    def test_mutation(self):
+        """A mutation is applied to the virtual device and acknowledged."""
+        self._protocol.send(bytearray([MessageCode.MUTATION, 2, 0, 90]))
+        self._protocol.send(bytearray([MessageCode.MUTATION, 1, 1]))
+        for _ in range(3):
+            self.assertEqual(MessageCode.ACK, self._protocol.read_byte())
+        self.assertEqual(b'\x00\x5a', self._protocol.board.devices[2].value)
+        self.assertEqual(b'\x01', self._protocol.board.devices[1].value)
+
+    def test_poll(self):
+        """Polling waits for incoming data up to the timeout."""
+        self.assertTrue(self._protocol.poll(1))
+        self.assertEqual(MessageCode.ACK, self._protocol.read_byte())
+        start = time.monotonic()
+        self.assertFalse(self._protocol.poll(0.05))
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
+
+    def test_unknown_command(self):
+        """Unknown commands are dropped without acknowledgment."""
+        self._protocol.send(bytearray([200]))
+        self._protocol.send(bytearray([MessageCode.VOID]))
+        self.assertEqual(MessageCode.ACK, self._protocol.read_byte())
+        self.assertEqual(MessageCode.ACK, self._protocol.read_byte())
+        self.assertEqual(2, self._protocol.board.acknowledged)
+        self.assertEqual(3, self._protocol.board.received)
+
+    def test_latency(self):
+        """Latency and baud-rate throttling delay the acknowledgment."""
+        protocol = SimulatedProtocol(latency=0.02, baudrate=9600)
+        protocol.open()
+        start = time.monotonic()
+        protocol.send(bytearray([MessageCode.VOID]))
+        self.assertEqual(MessageCode.ACK, protocol.read_byte())
+        self.assertGreaterEqual(time.monotonic() - start, 0.04)
+        protocol.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,7 +3,7 @@
 """Tests for the usbserial module."""
 
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, PropertyMock
 
 import serial
 
@@ -20,6 +20,7 @@ class SerialProtocolTest(unittest.TestCase):
         serial.Serial.open = MagicMock(name='serial.Serial.open')
         serial.Serial.close = MagicMock(name='serial.Serial.close')
         serial.Serial.inWaiting = MagicMock(name='serial.Serial.inWaiting')
+        serial.Serial.in_waiting = PropertyMock(name='serial.Serial.in_waiting', return_value=0)
         serial.Serial.read = MagicMock(name='serial.Serial.read')
         serial.Serial.isOpen = MagicMock(name='serial.Serial.isOpen')
         serial.Serial.write = MagicMock(name='serial.Serial.write')
@@ -66,6 +67,21 @@ class SerialProtocolTest(unittest.TestCase):
         serial.Serial.read = MagicMock(name='serial.Serial.read', return_value=b'#')
         self.assertEqual(MessageCode.DEBUG, self._serial_protocol.read_byte())
 
+    def test_read_byte_drains_waiting_bytes(self):
+        """Tests serial protocol read_byte reads all waiting bytes at once and counts it."""
+        serial.Serial.in_waiting = PropertyMock(name='serial.Serial.in_waiting', return_value=3)
+        serial.Serial.read = MagicMock(name='serial.Serial.read', side_effect=[b'', b'#\x0b\x0c'])
+        self.assertEqual(MessageCode.DEBUG, self._serial_protocol.read_byte())
+        self.assertEqual(MessageCode.ACK, self._serial_protocol.read_byte())
+        self.assertEqual(MessageCode.HANDSHAKE, self._serial_protocol.read_byte())
+        # pylint: disable-next=no-member
+        serial.Serial.read.assert_called_with(3)
+        stats = self._serial_protocol.stats()
+        self.assertEqual(3, stats['bytes_read'])
+        self.assertEqual(4, stats['driver_calls'])
+        self.assertEqual(2, stats['wakeups'])
+        self.assertEqual(1, stats['idle_wakeups'])
+
     def test_send(self):
         """Tests serial protocol send_command."""
         self._serial_protocol.send(bytearray([MessageCode.DEBUG]))
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+"""Tests for the `core.api` module."""
+
+import asyncio
+import time
+import unittest
+from unittest.mock import AsyncMock, Mock, patch
+
+from hermes.commands import ack  # noqa: F401 - registers the ACK command.
+from hermes.core import api, codec
+from hermes.core.config import settings
+from hermes.core.struct import EnqueueResult
+from hermes.protocols.simulated import simulated_board
+
+
+class ActionsTest(unittest.TestCase):
+    """Tests for the batched actions."""
+
+    def setUp(self):
+        """Connect a simulated board with three servos."""
+        self._board = simulated_board(1, servos=3)
+        settings.set('boards', {1: self._board})
+        api._SOCKET = AsyncMock()
+        with patch('hermes.boards.time.sleep'):
+            self._board.open()
+
+    def tearDown(self):
+        """Disconnect the board."""
+        self._board.close()
+
+    def test_actions(self):
+        """A valid batch should be sent to the board and broadcast once."""
+        errors = asyncio.run(api.actions('test', [(1, 1, 10), (1, 2, 20), (1, 3, 30)]))
+        self.assertEqual([], errors)
+        devices = self._board.protocol.board.devices
+        deadline = time.monotonic() + 2
+        while devices[3].value != b'\x00\x1e' and time.monotonic() < deadline:
+            time.sleep(1e-3)
+        self.assertEqual([b'\x00\x0a', b'\x00\x14', b'\x00\x1e'], [devices[index].value for index in (1, 2, 3)])
+        self.assertEqual(30, self._board.actions[3].state)
+        api._SOCKET.emit.assert_awaited_once_with('actions', [[1, 1, 10], [1, 2, 20], [1, 3, 30]], skip_sid='test')
+
+    def test_binary_clients(self):
+        """The clients that negotiated MessagePack should receive the mutations in binary."""
+        codec.negotiate('binary', 'msgpack')
+        self.addCleanup(codec.forget, 'binary')
+        asyncio.run(api.action('test', 1, 1, 10))
+        api._SOCKET.emit.assert_any_await('action', (1, 1, 10), skip_sid=['test', 'binary'])
+        api._SOCKET.emit.assert_any_await('action', codec.packb([1, 1, 10]), to='binary')
+
+    def test_invalid_actions(self):
+        """A batch with an invalid mutation should be rejected as a whole."""
+        state = self._board.actions[1].state
+        errors = asyncio.run(api.actions('test', [(1, 1, 10), (1, 9, 20), (2, 1, 30), (1, 2, 'foo'), (1,)]))
+        self.assertEqual(4, len(errors))
+        self.assertEqual(state, self._board.actions[1].state)
+        self.assertEqual(1, self._board.protocol.board.received)  # The handshake only.
+        api._SOCKET.emit.assert_not_awaited()
+
+    def test_malformed_actions(self):
+        """A batch of the wrong shape should be rejected with errors, not raise."""
+        self.assertEqual(1, len(asyncio.run(api.actions('test', {'board_id': 1}))))
+        self.assertEqual(1, len(asyncio.run(api.actions('test', 'abc'))))
+        errors = asyncio.run(api.actions('test', ['abc', [1, 1, 10, 0], [[1], 1, 10], None]))
+        self.assertEqual(4, len(errors))
+        api._SOCKET.emit.assert_not_awaited()
+
+    def test_invalid_action(self):
+        """An action with an invalid value should be rejected, not raise."""
+        state = self._board.actions[1].state
+        self.assertIsNone(asyncio.run(api.action('test', 1, 1, 'foo')))
+        self.assertEqual(state, self._board.actions[1].state)
+        api._SOCKET.emit.assert_not_awaited()
+
+    def test_rejected_batch(self):
+        """A batch rejected by a board getting busy meanwhile should not be applied."""
+        state = self._board.actions[1].state
+        with patch.object(self._board, 'send_batch', return_value=EnqueueResult.REJECTED):
+            self.assertEqual(['Board 1 is busy.'], asyncio.run(api.actions('test', [(1, 1, 10), (1, 2, 20)])))
+        self.assertEqual(state, self._board.actions[1].state)
+        api._SOCKET.emit.assert_not_awaited()
+
+    def test_backpressure(self):
+        """Actions should never block: they are coalesced per device, or rejected when the board is busy."""
+        self._board.close()
+        with patch.object(self._board, 'connect') as connect:
+            self.assertEqual(EnqueueResult.ACCEPTED, asyncio.run(api.action('test', 1, 1, 10)))
+            self.assertEqual(EnqueueResult.COALESCED, asyncio.run(api.action('test', 1, 1, 20)))
+            connect.assert_called()
+            while not self._board.busy():
+                self._board.send_batch([(bytearray([0]), None)])
+            self.assertEqual(EnqueueResult.REJECTED, asyncio.run(api.action('test', 1, 2, 30)))
+            self.assertEqual(['Board 1 is busy.'], asyncio.run(api.actions('test', [(1, 3, 40)])))
+        self.assertEqual(20, self._board.actions[1].state)
+        self.assertNotEqual(30, self._board.actions[2].state)
+
+    def test_observers(self):
+        """The observers (ex: the GUI) should be notified of the changed devices."""
+        observer = Mock()
+        with patch.object(api, '_OBSERVERS', []):
+            api.observe(observer)
+            api.observe(observer)
+            asyncio.run(api.actions('test', [(1, 1, 10), (1, 2, 20)]))
+            asyncio.run(api.changed([[1, 3, 30], [1, 9, 40]]))
+        self.assertEqual(2, observer.call_count)
+        observer.assert_any_call([self._board.actions[1], self._board.actions[2]])
+        observer.assert_called_with([self._board.actions[3]])
+
+
+if __name__ == '__main__':
+    unittest.main()
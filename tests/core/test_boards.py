@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+"""Tests for the `boards` module."""
+
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from hermes.commands import ack  # noqa: F401 - registers the ACK command.
+from hermes.protocols.simulated import simulated_board
+
+
+class BoardTest(unittest.TestCase):
+    """Tests for the connexion of a board."""
+
+    def setUp(self):
+        """Open a simulated board."""
+        self._board = simulated_board(1)
+        with patch('hermes.boards.time.sleep'):
+            self._board.open()
+
+    def tearDown(self):
+        """Close the board."""
+        self._board.close()
+
+    def test_connexion_lost(self):
+        """A connexion that cannot be read anymore should be closed, without spinning on the failed reads."""
+        protocol = self._board.protocol
+        listener = self._board._threads[1]
+        start = time.monotonic()
+        with patch('hermes.boards._IDLE_TIMEOUT', 0.01), \
+                patch.object(protocol, 'read_byte', wraps=protocol.read_byte) as read:
+            protocol.close()
+            listener.join(2)
+        # The failed reads are retried after a pause, up to the limit.
+        self.assertGreaterEqual(time.monotonic() - start, 0.08)
+        self.assertFalse(listener.is_alive())
+        self.assertFalse(self._board.connected)
+        self.assertLessEqual(read.call_count, 11)
+    def test_concurrent_open(self):
+        """A command sent while the board is being opened should not open it a second time."""
+        self._board.close()
+        opening = threading.Event()
+        resume = threading.Event()
+
+        def wait(_):
+            opening.set()
+            resume.wait(2)
+
+        protocol = self._board.protocol
+        with patch('hermes.boards.time.sleep', side_effect=wait), \
+                patch.object(protocol, 'open', wraps=protocol.open) as protocol_open:
+            opener = threading.Thread(target=self._board.open)
+            opener.start()
+            opening.wait(2)
+            self._board.send(bytearray([0]))
+            resume.set()
+            opener.join(2)
+            self._board._connector.join(2)
+        self.assertTrue(self._board.connected)
+        self.assertEqual(1, protocol_open.call_count)
+        self.assertEqual(2, len(self._board._threads))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+
+"""Tests for the `core.broadcast` module."""
+
+import asyncio
+import unittest
+from unittest.mock import ANY, AsyncMock
+
+from hermes.core import broadcast
+
+
+class BroadcastTest(unittest.TestCase):
+    """Tests for the broadcast scheduler."""
+
+    def setUp(self):
+        """Initialize the scheduler with a mocked socket.io server (and a rate slow enough to flush by hand)."""
+        self._socket = AsyncMock()
+        broadcast.init(self._socket, 0.01)
+
+    def tearDown(self):
+        """Disable the scheduler."""
+        broadcast.init(None, 0)
+
+    def test_coalesce(self):
+        """Clients should receive the latest value of each changed device, except for their own changes."""
+
+        async def scenario():
+            broadcast.connect('a')
+            broadcast.connect('b')
+            for value in range(10):
+                broadcast.publish(1, 1, value, 'a')
+            broadcast.publish(1, 2, 42, 'b')
+            broadcast.flush()
+            await asyncio.sleep(0)
+            broadcast.disconnect('a')
+            broadcast.disconnect('b')
+
+        asyncio.run(scenario())
+        self.assertEqual(2, self._socket.emit.await_count)
+        self._socket.emit.assert_any_await('actions', [[1, 2, 42]], to='a', callback=ANY)
+        self._socket.emit.assert_any_await('actions', [[1, 1, 9]], to='b', callback=ANY)
+
+    def test_backpressure(self):
+        """A busy client should be skipped, then receive only the latest values."""
+        sent = asyncio.Event()
+
+        async def slow_emit(*args, **kwargs):
+            await sent.wait()
+
+        async def scenario():
+            self._socket.emit.side_effect = slow_emit
+            broadcast.connect('a')
+            broadcast.publish(1, 1, 0, 'gui')
+            broadcast.flush()
+            await asyncio.sleep(0)
+            for value in range(1, 10):
+                broadcast.publish(1, 1, value, 'gui')
+                broadcast.flush()
+                await asyncio.sleep(0)
+            sent.set()
+            await asyncio.sleep(0)
+            broadcast.flush()
+            await asyncio.sleep(0)
+            broadcast.disconnect('a')
+
+        asyncio.run(scenario())
+        self.assertEqual(2, self._socket.emit.await_count)
+        self._socket.emit.assert_awaited_with('actions', [[1, 1, 9]], to='a', callback=ANY)
+
+    def test_acknowledgement(self):
+        """A client not acknowledging its messages should be skipped until it does."""
+
+        async def scenario():
+            broadcast.connect('a')
+            for value in range(3):
+                broadcast.publish(1, 1, value, 'gui')
+                broadcast.flush()
+                await asyncio.sleep(0)
+            self.assertEqual(2, self._socket.emit.await_count)
+            self._socket.emit.call_args.kwargs['callback']()
+            broadcast.flush()
+            await asyncio.sleep(0)
+            broadcast.disconnect('a')
+
+        asyncio.run(scenario())
+        self.assertEqual(3, self._socket.emit.await_count)
+        self._socket.emit.assert_awaited_with('actions', [[1, 1, 2]], to='a', callback=ANY)
+
+
+if __name__ == '__main__':
+    unittest.main()
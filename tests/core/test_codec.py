@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+"""Tests for the `core.codec` module."""
+
+import unittest
+
+import msgpack
+
+from hermes.core import codec
+from hermes.core.codec import CodecError, Encoding
+
+
+class CodecTest(unittest.TestCase):
+    """Tests for the MessagePack encoding of the realtime API."""
+
+    def test_roundtrip(self):
+        """Supported values should be decoded as they were encoded."""
+        values = [
+            None, True, False, 0, 127, 128, -1, -32, -33, 255, 65536, -70000, 2 ** 63, -(2 ** 63), 1.5,
+            '', 'servo', 'é' * 40, 'x' * 300, b'\x00\x01', list(range(20)), {1: 'a', 'b': [None, 2.5]},
+            {str(key): key for key in range(20)},
+        ]
+        for value in values:
+            self.assertEqual(value, codec.unpackb(codec.packb(value)))
+        self.assertEqual([1, 2], codec.unpackb(codec.packb((1, 2))))
+
+    def test_format(self):
+        """Encoded payloads should follow the MessagePack specification."""
+        self.assertEqual(b'\x93\x01\x02\xcc\xb4', codec.packb([1, 2, 180]))
+        self.assertEqual(b'\x81\xa2id\xd0\xce', codec.packb({'id': -50}))
+        self.assertEqual(b'\xcb\x3f\xf8\x00\x00\x00\x00\x00\x00', codec.packb(1.5))
+
+    def test_errors(self):
+        """Unsupported or malformed payloads should raise a CodecError."""
+        self.assertRaises(CodecError, codec.packb, object())
+        self.assertRaises(CodecError, codec.packb, 2 ** 64)
+        self.assertRaises(CodecError, codec.unpackb, b'\x93\x01')
+        self.assertRaises(CodecError, codec.unpackb, b'\x01\x02')
+        self.assertRaises(CodecError, codec.unpackb, b'\xc1')
+
+        # Extension types are rejected at any depth, timestamps included.
+        for extension in (msgpack.ExtType(5, b'x'), msgpack.Timestamp(1)):
+            self.assertRaises(CodecError, codec.decode, msgpack.packb(extension))
+            self.assertRaises(CodecError, codec.decode, msgpack.packb([1, {'a': [extension]}]))
+            self.assertRaises(CodecError, codec.decode, msgpack.packb({extension: 1}))
+        self.assertRaises(CodecError, codec.unpackb, msgpack.packb([msgpack.ExtType(5, b'x')]))
+
+    def test_depth(self):
+        """Payloads nested deeper than the limit should raise a CodecError, whatever their encoding."""
+        value = 0
+        for _ in range(codec.MAX_DEPTH):
+            value = [value]
+        self.assertEqual(value, codec.decode(codec.packb(value)))
+        self.assertRaises(CodecError, codec.decode, [value])
+        self.assertRaises(CodecError, codec.decode, codec.packb({'a': value}))
+
+    def test_negotiate(self):
+        """Clients should receive the encoding they negotiated, JSON by default."""
+        self.assertIs(Encoding.MSGPACK, codec.negotiate('a', 'msgpack'))
+        self.assertIs(Encoding.JSON, codec.negotiate('b', 'unknown'))
+        self.assertEqual(codec.packb([1, 2, 3]), codec.encode('a', [1, 2, 3]))
+        self.assertEqual((1, [2]), codec.encode('b', (1, [2])))
+        self.assertEqual([1, 2, 3], codec.decode(codec.encode('a', [1, 2, 3])))
+        codec.forget('a')
+        self.assertIs(Encoding.JSON, codec.encoding('a'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+
+"""Tests for the `core.hardware` module."""
+
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from hermes.commands import ack  # noqa: F401 - registers the ACK command.
+from hermes.core import hardware
+from hermes.core.config import settings
+from hermes.core.struct import EnqueueResult
+from hermes.protocols.simulated import simulated_board
+
+
+class HardwareTest(unittest.TestCase):
+    """Tests for the hardware daemons and their web workers, over local sockets."""
+
+    def setUp(self):
+        """Connect two simulated boards with two servos each."""
+        self._boards = {board_id: simulated_board(board_id) for board_id in (1, 2)}
+        settings.set('boards', self._boards)
+        with patch('hermes.boards.time.sleep'):
+            for board in self._boards.values():
+                board.open()
+        self._directory = tempfile.TemporaryDirectory()
+        self._pushed = []
+
+    def tearDown(self):
+        """Disconnect the boards."""
+        for board in self._boards.values():
+            board.close()
+        hardware._LINKS.clear()
+        hardware._ROUTES.clear()
+        self._directory.cleanup()
+
+    async def _on_changes(self, changes):
+        self._pushed.extend(changes)
+
+    @staticmethod
+    async def _until(condition):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+    async def _worker_scenario(self):
+        path = str(Path(self._directory.name, 'hermes.sock'))
+        daemon = hardware._Daemon()
+        server = await daemon.start(path)
+        hardware.connect(path, self._on_changes)
+        other = hardware._Link(path, self._on_changes)
+        other.task = asyncio.get_running_loop().create_task(other.run())
+        await self._until(lambda: 1 in hardware._ROUTES and other.writer is not None and len(daemon.workers) == 2)
+
+        self.assertTrue(hardware.remote())
+        self.assertEqual(EnqueueResult.ACCEPTED, await hardware.action(1, 1, 42))
+        self.assertIsNone(await hardware.action(1, 9, 42))
+        self.assertEqual([], await hardware.batch({1: [[1, 50], [2, 60]]}))
+        self.assertEqual(['Board 3: no daemon owns it.'], await hardware.batch({3: [[1, 50]]}))
+        await self._until(lambda: len(self._pushed) >= 3)
+
+        other.task.cancel()
+        other.writer.close()
+        hardware.disconnect()
+        server.close()
+        await server.wait_closed()
+
+    def test_worker(self):
+        """Mutations of a worker should be performed by the daemon and pushed to the other workers."""
+        asyncio.run(self._worker_scenario())
+        self.assertEqual([[1, 1, 42], [1, 1, 50], [1, 2, 60]], self._pushed)
+        self.assertEqual(50, self._boards[1].actions[1].state)
+        self.assertEqual(60, self._boards[1].actions[2].state)
+
+    async def _agents_scenario(self):
+        agents = [hardware._Daemon({1}, 'secret'), hardware._Daemon({2}, 'secret')]
+        servers = [await agent.start(':0') for agent in agents]
+        for server in servers:
+            host, port = server.sockets[0].getsockname()[:2]
+            self.assertEqual('127.0.0.1', host)
+            hardware.connect(f'{host}:{port}', self._on_changes, 'secret')
+        await self._until(lambda: len(hardware._ROUTES) == 2)
+        self.assertIsNot(hardware._ROUTES[1], hardware._ROUTES[2])
+
+        # Each board is driven by its agent only.
+        self.assertEqual(EnqueueResult.ACCEPTED, await hardware.action(2, 1, 42))
+        self.assertEqual('error', agents[0]._action(None, 2, 1, 42))
+        self.assertEqual([], await hardware.batch({1: [[1, 10]], 2: [[2, 20]]}))
+
+        # A batch failing on an agent is still performed by the others, and applied as pushed changes.
+        with patch.object(self._boards[2], 'busy', return_value=True):
+            self.assertEqual(['Board 2 is busy.'], await hardware.batch({1: [[2, 30]], 2: [[2, 30]]}))
+        self.assertEqual([[1, 2, 30]], self._pushed)
+        self.assertEqual(30, self._boards[1].actions[2].state)
+        self.assertEqual(20, self._boards[2].actions[2].state)
+
+        # The routes of a lost agent are dropped.
+        servers[1].close()
+        for writer in list(agents[1].workers):
+            writer.close()
+        await self._until(lambda: 2 not in hardware._ROUTES)
+        self.assertFalse(self._boards[2].connected)
+        self.assertIsNone(await hardware.action(2, 1, 42))
+        hardware.disconnect()
+        servers[0].close()
+
+    def test_agents(self):
+        """A coordinator should route the mutations of each board to the agent owning it."""
+        asyncio.run(self._agents_scenario())
+        self.assertEqual(42, self._boards[2].actions[1].state)
+        self.assertEqual(10, self._boards[1].actions[1].state)
+
+    async def _token_scenario(self):
+        with self.assertRaises(hardware.HardwareError):
+            await hardware._Daemon().start('0.0.0.0:0')
+        agent = hardware._Daemon(None, 'secret')
+        server = await agent.start('127.0.0.1:0')
+        host, port = server.sockets[0].getsockname()[:2]
+        reader, writer = await asyncio.open_connection(host, port)
+        hardware._write(writer, ['call', 1, 'action', [1, 1, 42]])
+        with self.assertRaises(asyncio.IncompleteReadError):
+            await hardware._read(reader)
+        reader, writer = await asyncio.open_connection(host, port)
+        hardware._write(writer, ['call', 1, 'hello', ['wrong']])
+        with self.assertRaises(asyncio.IncompleteReadError):
+            await hardware._read(reader)
+        self.assertEqual(set(), agent.workers)
+        server.close()
+
+    def test_token(self):
+        """TCP daemons should only serve the workers giving their token, and only listen on loopback without one."""
+        asyncio.run(self._token_scenario())
+        self.assertEqual(0, self._boards[1].actions[1].state)
+
+    async def _malformed_scenario(self):
+        daemon = hardware._Daemon()
+        server = await daemon.start('127.0.0.1:0')
+        host, port = server.sockets[0].getsockname()[:2]
+        for args in ([1], 42):
+            reader, writer = await asyncio.open_connection(host, port)
+            hardware._write(writer, ['call', 1, 'action', args])
+            with self.assertRaises(asyncio.IncompleteReadError):
+                await hardware._read(reader)
+        reader, writer = await asyncio.open_connection(host, port)
+        hardware._write(writer, ['call', 2, 'action', [1, 1, 42]])
+        self.assertEqual(['reply', 2, 'accepted'], await hardware._read(reader))
+        writer.close()
+        server.close()
+
+    def test_malformed(self):
+        """A worker making a call with malformed arguments should be disconnected, without affecting the others."""
+        asyncio.run(self._malformed_scenario())
+        self.assertEqual(42, self._boards[1].actions[1].state)
+
+
+if __name__ == '__main__':
+    unittest.main()
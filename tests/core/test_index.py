@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+"""Tests for the `core.index` module."""
+
+import unittest
+
+from hermes.boards.arduino import ArduinoBoard, ArduinoBoardType
+from hermes.core import index
+from hermes.core.config import settings
+from hermes.devices.servo import ServoDevice
+from hermes.protocols.simulated import SimulatedProtocol
+
+
+class IndexTest(unittest.TestCase):
+    """Tests for the device index."""
+
+    def setUp(self):
+        """Register a board with a servo."""
+        self.board = ArduinoBoard(SimulatedProtocol(), ArduinoBoardType.UNO)
+        self.board.id = 1
+        servo = ServoDevice()
+        servo.id = 1
+        self.board.actions[1] = servo
+        settings.set('boards', {1: self.board})
+
+    def test_get(self):
+        """Devices should be reached with a single lookup, and the index should follow the boards of the settings."""
+        handle = index.get(1, 1)
+        self.assertIs(self.board, handle.board)
+        self.assertIs(self.board.actions[1], handle.device)
+        self.assertIsNone(index.get(1, 2))
+        self.assertIsNone(index.get(2, 1))
+
+        # Boards replaced as a whole.
+        settings.set('boards', {})
+        self.assertIsNone(index.get(1, 1))
+
+    def test_update(self):
+        """Boards edited in place should be re-indexed on demand."""
+        index.get(1, 1)
+        servo = ServoDevice()
+        servo.id = 2
+        self.board.actions[2] = servo
+        self.assertIsNone(index.get(1, 2))
+        index.update(1)
+        self.assertIs(servo, index.get(1, 2).device)
+
+        del settings.data['boards'][1]
+        index.update(1)
+        self.assertIsNone(index.get(1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
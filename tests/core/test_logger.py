@@ -4,10 +4,12 @@
 """ Tests for the `core.logger` module. """
 
 import os
+import time
 import unittest
+from unittest.mock import patch
 
-from hermes.core import logger
-from hermes.core.logger import logthis
+from hermes.core import cli, logger
+from hermes.core.logger import HermesError, logthis
 
 # Init logs to custom file.
 _LOGPATH = './logs/testing.log'
@@ -17,6 +19,14 @@ logger.init(_LOGPATH)
 class LoggerTest(unittest.TestCase):
     """ Tests for the logger file functions. """
 
+    def setUp(self):
+        """ Log at all levels, as in debug mode. """
+        debug = patch.dict(cli.args, {'debug': True})
+        debug.start()
+        self.addCleanup(logger.init, _LOGPATH)
+        self.addCleanup(debug.stop)
+        logger.init(_LOGPATH)
+
     @logthis
     def _decorated_debug(self):
         pass
@@ -100,3 +110,62 @@ class LoggerTest(unittest.TestCase):
         last_line = self._get_last_log()
         self.assertIn('WARNING', last_line)
         self.assertIn('_decorated_warning', last_line)
+
+    def test_trace(self):
+        """ Traces should only be logged when their channel is switched on, and formatted lazily. """
+        logger.set_trace(logger.TraceChannel.PROTOCOL, False)
+        logger.trace(logger.TraceChannel.PROTOCOL, 'Trace test %s', 'off')
+        self.assertNotIn('Trace test off', self._get_last_log())
+        self.assertFalse(logger.traces()['protocol'])
+
+        logger.set_trace('protocol', True)
+        logger.trace(logger.TraceChannel.PROTOCOL, 'Trace test %s', logger.lazy(str.upper, 'on'))
+        self.assertIn('[protocol] Trace test ON', self._get_last_log())
+        self.assertTrue(logger.traces()['protocol'])
+        logger.set_trace('protocol', False)
+
+        # Undefined channel exception.
+        self.assertRaises(HermesError, logger.set_trace, 'foo', True)
+
+    def test_asynchronous(self):
+        """ Asynchronous logs should be written by the background writer, at the latest on shutdown. """
+        logger.init(_LOGPATH, asynchronous=True)
+        logger.warning('Async test %s', 'warning')
+        logger.shutdown()
+        self.assertIn('Async test warning', self._get_last_log())
+        self.assertEqual(0, logger.dropped())
+
+        # Full queue: entries are dropped instead of blocking.
+        logger.init(_LOGPATH, asynchronous=True, capacity=0)
+        logger.warning('Async test %s', 'dropped')
+        self.assertGreater(logger.dropped(), 0)
+        logger.init(_LOGPATH)
+        self.assertNotIn('Async test dropped', self._get_last_log())
+
+        # Mutable arguments are logged with their value at the time of the call.
+        logger.init(_LOGPATH, asynchronous=True)
+        data = bytearray(b'before')
+        logger.warning('Async test %s', data)
+        data[:] = b'after'
+        logger.shutdown()
+        self.assertIn("Async test bytearray(b'before')", self._get_last_log())
+
+    def test_report(self):
+        """ Error events should be counted, but only logged up to the burst limit per window. """
+        for index in range(20):
+            HermesError(f'Report test {index}', key='test_report')
+        self.assertEqual({'count': 20, 'logged': 5}, logger.errors()['test_report'])
+        self.assertIn('Report test 4', self._get_last_log())
+
+    def test_report_summary(self):
+        """ Suppressed error events should be summarized by a timer, per key. """
+        with patch('hermes.core.logger._ERROR_WINDOW', 0.05):
+            for index in range(10):
+                HermesError(f'Board 1 test {index}', key='test_summary board 1')
+            HermesError('Board 2 test', key='test_summary board 2')
+            self.assertIn('Board 2 test', self._get_last_log())
+            deadline = time.monotonic() + 2
+            while 'suppressed' not in self._get_last_log() and time.monotonic() < deadline:
+                time.sleep(0.01)
+        self.assertIn('5 similar errors suppressed: test_summary board 1 (10 in total).', self._get_last_log())
+        self.assertEqual({'count': 1, 'logged': 1}, logger.errors()['test_summary board 2'])
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+
+"""Tests for the `core.metrics` module."""
+
+import threading
+import unittest
+
+from hermes.core import metrics
+from hermes.core.logger import HermesError
+
+
+class MetricsTest(unittest.TestCase):
+    """Tests for the metrics registry."""
+
+    def test_counter(self):
+        """Counters should sum up the increments of all threads."""
+        counter = metrics.counter('test_counter_total', 'Test counter.', ['thread'])
+        series = counter.labels('any')
+
+        def work():
+            for _ in range(1000):
+                series.inc()
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(4000, series.get())
+        self.assertIs(counter, metrics.counter('test_counter_total', 'Test counter.', ['thread']))
+        self.assertIn('test_counter_total{thread="any"} 4000', metrics.exposition())
+        self.assertRaises(HermesError, counter.labels)
+
+    def test_gauge(self):
+        """Gauges should go up and down, and support callbacks."""
+        gauge = metrics.gauge('test_gauge', 'Test gauge.')
+        gauge.inc(3)
+        gauge.dec()
+        metrics.gauge('test_callback', 'Test callback.', ['board'], callback=lambda: {(1,): 7})
+        exposition = metrics.exposition()
+        self.assertIn('# TYPE test_gauge gauge\ntest_gauge 2', exposition)
+        self.assertIn('test_callback{board="1"} 7', exposition)
+
+    def test_histogram(self):
+        """Histograms should count observations in cumulative buckets."""
+        histogram = metrics.histogram('test_histogram_seconds', 'Test histogram.', buckets=[0.1, 1])
+        for value in (0.05, 0.1, 0.5, 5):
+            histogram.observe(value)
+        exposition = metrics.exposition()
+        self.assertIn('test_histogram_seconds_bucket{le="0.1"} 2', exposition)
+        self.assertIn('test_histogram_seconds_bucket{le="1"} 3', exposition)
+        self.assertIn('test_histogram_seconds_bucket{le="+Inf"} 4', exposition)
+        self.assertIn('test_histogram_seconds_sum 5.65', exposition)
+        self.assertIn('test_histogram_seconds_count 4', exposition)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+"""Tests for the `core.persistence` module."""
+
+import json
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from hermes.boards.arduino import ArduinoBoard, ArduinoBoardType
+from hermes.core import persistence
+from hermes.core.config import settings
+from hermes.devices.servo import ServoDevice
+from hermes.protocols.simulated import SimulatedProtocol
+
+
+class PersistenceTest(unittest.TestCase):
+    """Tests for the device state persistence."""
+
+    def setUp(self):
+        """Register a board with two servos, and persist their states in a temporary file."""
+        board = ArduinoBoard(SimulatedProtocol(), ArduinoBoardType.UNO)
+        board.id = 1
+        for device_id in (1, 2):
+            servo = ServoDevice()
+            servo.id = device_id
+            board.actions[device_id] = servo
+        settings.set('boards', {1: board})
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name, 'states.json')
+        self.addCleanup(persistence.close)
+
+    def test_persist(self):
+        """Changes should be written at a bounded rate, and all of them once closed."""
+        self.assertEqual(0, persistence.init(str(self.path)))
+        with mock.patch('hermes.core.persistence.Path.replace', autospec=True, side_effect=Path.replace) as replace:
+            start = time.perf_counter()
+            for value in range(500):
+                persistence.record([[1, 1, value]])
+                time.sleep(0.001)
+            persistence.close()
+            elapsed = time.perf_counter() - start
+        self.assertLessEqual(replace.call_count, elapsed / persistence._PERIOD + 2)
+        self.assertEqual([[1, 1, 499], [1, 2, 0]], json.loads(self.path.read_text()))
+
+    def test_restore(self):
+        """Persisted states should be restored on the devices, unknown ones skipped."""
+        self.path.write_text(json.dumps([[1, 1, 120], [1, 3, 10], [2, 1, 10], 'foo']))
+        self.assertEqual(1, persistence.init(str(self.path)))
+        self.assertEqual(120, settings.get(['boards', 1]).actions[1].state)
+
+        # A corrupted file is ignored.
+        self.path.write_text('[[1, 1')
+        self.assertEqual(0, persistence.init(str(self.path)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+
+"""Tests for the `core.plugins` module."""
+
+import unittest
+
+from hermes.core import plugins
+from hermes.core.dictionary import MessageCode
+from hermes.core.plugins import AbstractPlugin, PluginError
+
+
+class PluginsTest(unittest.TestCase):
+    """Tests for the plugin discovery."""
+
+    def test_manifest(self):
+        """The manifest should know every plugin class, its tag and code, as they are once imported."""
+        plugins.init()
+        for entry in plugins.entries():
+            plugin = plugins.load(entry.name)
+            self.assertEqual(entry.module, plugin.__module__)
+            self.assertEqual(entry.tag, getattr(plugin, 'yaml_tag', f'!{plugin.__name__}'))
+            if entry.code is not None:
+                self.assertEqual(entry.code, plugin().code)
+        imported = {
+            plugin.__name__
+            for plugin_type in AbstractPlugin.types()
+            for plugin in getattr(plugin_type, 'plugins', [])
+            if plugin.__module__.startswith('hermes.')
+        }
+        self.assertEqual(imported, {entry.name for entry in plugins.entries()})
+
+    def test_lookup(self):
+        """Plugins should be found by tag and code."""
+        self.assertEqual('ServoDevice', plugins.by_tag('!ServoDevice').__name__)
+        self.assertEqual('AckCommand', plugins.by_code('commands', MessageCode.ACK).__name__)
+        self.assertIsNone(plugins.by_tag('!Foo'))
+        self.assertIsNone(plugins.by_code('commands', MessageCode.SERVO))
+        with self.assertRaises(PluginError):
+            plugins.load('Foo')
+
+
+if __name__ == '__main__':
+    unittest.main()
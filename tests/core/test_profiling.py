@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+
+"""Tests for the `core.profiling` module."""
+
+import asyncio
+import marshal
+import time
+import unittest
+
+from hermes.core import metrics, profiling
+from hermes.core.logger import HermesError
+
+
+class ProfilingTest(unittest.TestCase):
+    """Tests for the profiling tools."""
+
+    def test_timed(self):
+        """Timed functions and sections should feed the timing histogram, and keep the return values."""
+
+        @profiling.timed('test_function')
+        def function():
+            return 42
+
+        @profiling.timed('test_coroutine')
+        async def coroutine():
+            return 43
+
+        self.assertEqual(42, function())
+        self.assertEqual(43, asyncio.run(coroutine()))
+        with profiling.timed('test_section'):
+            pass
+        exposition = metrics.exposition()
+        for name in ('test_function', 'test_coroutine', 'test_section'):
+            self.assertIn(f'hermes_timing_seconds_count{{name="{name}"}} 1', exposition)
+
+    def test_session(self):
+        """Sampling sessions should record the stacks of the running threads."""
+        self.assertRaises(HermesError, profiling.stop)
+        self.assertRaises(ValueError, profiling.start, 0)
+        self.assertFalse(profiling.running())
+        profiling.start(0.001)
+        self.assertRaises(HermesError, profiling.start)
+        time.sleep(0.05)
+        status = profiling.stop()
+        self.assertFalse(status['running'])
+        self.assertGreater(status['samples'], 0)
+        self.assertIn('test_session', profiling.folded())
+        self.assertTrue(any(name == 'test_session' for _, _, name in marshal.loads(profiling.pstats())))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+
+"""Tests for the `core.snapshot` module."""
+
+import unittest
+
+from hermes.core import snapshot
+from hermes.core.config import settings
+from hermes.protocols.simulated import simulated_board
+
+
+class SnapshotTest(unittest.TestCase):
+    """Tests for the versioned snapshots."""
+
+    def setUp(self):
+        """Register a board with a servo."""
+        settings.set('boards', {1: simulated_board(1, servos=1)})
+        snapshot.invalidate()
+
+    def test_record(self):
+        """Device changes should update the cached snapshot in place and bump the version."""
+        self.assertIn(1, snapshot.boards()[1]['actions'])
+        version = snapshot.version()
+        snapshot.record(1, 1, 42)
+        self.assertNotEqual(version, snapshot.version())
+        self.assertEqual(42, snapshot.boards()[1]['actions'][1]['state'])
+
+    def test_delta(self):
+        """Clients should only get the latest changes since their version, when those are known."""
+        version = snapshot.version()
+        snapshot.record(1, 1, 10)
+        snapshot.record(1, 1, 20)
+        snapshot.record(1, 2, 30)
+        self.assertEqual([[1, 1, 20], [1, 2, 30]], snapshot.delta(version))
+        self.assertEqual([], snapshot.delta(snapshot.version()))
+
+        # Unknown versions, or versions older than an invalidation, require a full snapshot.
+        self.assertIsNone(snapshot.delta('foo.1'))
+        self.assertIsNone(snapshot.delta(None))
+        snapshot.invalidate(1)
+        self.assertIsNone(snapshot.delta(version))
+
+
+if __name__ == '__main__':
+    unittest.main()
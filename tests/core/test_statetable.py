@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+"""Tests for the `core.statetable` module."""
+
+import os
+import unittest
+from unittest.mock import patch
+
+from hermes.core import statetable
+from hermes.core.config import settings
+from hermes.core.statetable import StateTable, StateTableError
+from hermes.devices.boolean import BooleanInputDevice
+from hermes.protocols.simulated import simulated_board
+
+
+class StateTableTest(unittest.TestCase):
+    """Tests for the shared memory state table."""
+
+    def setUp(self):
+        """Register a board with two servos and a button, and publish their states."""
+        board = simulated_board(1)
+        board.actions[2].state = 90
+        button = BooleanInputDevice()
+        button.id = 3
+        board.inputs[3] = button
+        self._board = board
+        settings.set('boards', {1: board})
+        self._name = f'hermes_test_{os.getpid()}'
+        self._table = statetable.init(self._name)
+        # The reader lives in the writer process here: it must not untrack the segment of the writer.
+        with patch('hermes.core.statetable.resource_tracker.unregister'):
+            self._reader = StateTable.attach(self._name)
+
+    def tearDown(self):
+        """Destroy the state table."""
+        self._reader.close()
+        statetable.close()
+
+    def test_read(self):
+        """Readers should see the initial states, then the published ones."""
+        _, states = self._reader.snapshot()
+        self.assertEqual({(1, 1): 0, (1, 2): 90, (1, 3): None}, states)
+
+        statetable.publish([[1, 1, 42], [1, 2, 1.5], [1, 4, 10], [2, 1, 10]])
+        self.assertEqual(42, self._reader.read(1, 1))
+        self.assertEqual(1.5, self._reader.read(1, 2))
+        with self.assertRaises(StateTableError):
+            self._reader.read(1, 4)
+
+        statetable.publish([[1, 2, True], [1, 1, 'not a number']])
+        self.assertIs(True, self._reader.read(1, 2))
+        self.assertEqual(42, self._reader.read(1, 1))
+        statetable.publish([[1, 1, None]])
+        self.assertIsNone(self._reader.read(1, 1))
+
+    def test_changes(self):
+        """Readers should only get the devices changed since a given sequence."""
+        sequence = self._reader.sequence()
+        self.assertEqual((sequence, []), self._reader.changes(sequence))
+        statetable.publish([[1, 2, 10], [1, 2, 20]])
+        self.assertEqual((sequence + 2, [[1, 2, 20]]), self._reader.changes(sequence))
+
+    def test_seqlock(self):
+        """Reads racing with a write should be retried."""
+        sequence = self._reader.sequence()
+        statetable._TABLE._buffer[16] += 1  # A write in progress.
+        with patch('hermes.core.statetable._MAX_RETRIES', 3), self.assertRaises(StateTableError):
+            self._reader.snapshot()
+        statetable._TABLE._buffer[16] -= 1
+        self.assertEqual(sequence, self._reader.snapshot()[0])
+
+    def test_ingest(self):
+        """The input values read from the boards should be published."""
+        self._board.ingest(3, True)
+        self.assertIs(True, self._board.inputs[3].state)
+        self.assertIs(True, self._reader.read(1, 3))
+        self._board.ingest(4, True)
+        self.assertEqual(3, len(self._reader.snapshot()[1]))
+
+    def test_close(self):
+        """A closed table should not be read anymore."""
+        self._reader.close()
+        with self.assertRaises(StateTableError):
+            self._reader.read(1, 1)
+        self._reader.close()
+
+    def test_attach(self):
+        """Attaching a missing table should fail."""
+        with self.assertRaises(StateTableError):
+            StateTable.attach(f'{self._name}_missing')
+
+
+if __name__ == '__main__':
+    unittest.main()
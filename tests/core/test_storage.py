@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+"""Tests for the `core.storage` module."""
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from hermes.core import plugins, storage
+
+_BOARD = """
+!ArduinoBoard
+id: 1
+model: 'UNO'
+protocol: !SimulatedProtocol {}
+actions:
+  - !ServoDevice
+    id: 1
+    pin: 2
+    max: %d
+"""
+
+
+class StorageTest(unittest.TestCase):
+    """Tests for the configuration loading."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Register the plugins."""
+        plugins.init()
+        storage.init()
+
+    def setUp(self):
+        """Use a temporary configuration file and cache."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.filename = Path(directory.name, 'boards.yml')
+        self.filename.write_text(_BOARD % 180)
+        patcher = mock.patch.multiple(storage, CACHE_FILE=Path(directory.name, 'config.pickle'), _cache=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _load(self):
+        """Load the configuration file as a newly started process would."""
+        storage._cache = None
+        config = {}
+        storage._load_file(self.filename, config)
+        storage._save_cache()
+        return config
+
+    def test_cache(self):
+        """A warm start should not parse the unchanged files, and should instantiate the same plugins."""
+        board = self._load()['boards'][1]
+        self.assertTrue(storage.CACHE_FILE.exists())
+        with mock.patch.object(storage._compiler, 'load_all') as load_all:
+            cached = self._load()['boards'][1]
+
+            # Touched but unchanged.
+            stat = self.filename.stat()
+            os.utime(self.filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+            self._load()
+            load_all.assert_not_called()
+        self.assertIsNot(board, cached)
+        self.assertEqual(type(board.protocol), type(cached.protocol))
+        self.assertEqual(board.actions[1].serialize(), cached.actions[1].serialize())
+        self.assertEqual(180, cached.actions[1].max)
+
+    def test_change(self):
+        """Changed files should be parsed again."""
+        self._load()
+        self.filename.write_text(_BOARD % 90)
+        self.assertEqual(90, self._load()['boards'][1].actions[1].max)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,8 +5,7 @@
 
 import unittest
 
-from hermes.core.struct import MetaPluginType
-from hermes.core.struct import MetaSingleton
+from hermes.core.struct import CoalescingQueue, EnqueueResult, MetaPluginType, MetaSingleton
 
 
 class StructTest(unittest.TestCase):
@@ -35,3 +34,25 @@ class StructTest(unittest.TestCase):
             """ A testing purpose plugin of type PluginTestType. """
 
         self.assertEqual(len(PluginTestType.plugins), 2)
+
+    def test_coalescing_queue(self):
+        """ Tests that a coalescing queue replaces items by key and rejects items when full. """
+        queue = CoalescingQueue(2)
+        self.assertEqual(EnqueueResult.ACCEPTED, queue.offer('a1', 'a'))
+        self.assertEqual(EnqueueResult.ACCEPTED, queue.offer('b1', 'b'))
+        self.assertEqual(EnqueueResult.COALESCED, queue.offer('a2', 'a'))
+        self.assertEqual(EnqueueResult.REJECTED, queue.offer('c1', 'c'))
+        self.assertEqual('a2', queue.get_nowait())
+        self.assertEqual(EnqueueResult.ACCEPTED, queue.offer('a3', 'a'))
+        queue.clear()
+        self.assertEqual(EnqueueResult.ACCEPTED, queue.offer('a4', 'a'))
+        self.assertEqual(['a4'], [queue.get_nowait() for _ in range(queue.qsize())])
+
+    def test_coalescing_queue_order(self):
+        """ Tests that an item without key is never overtaken by the replacement of an item queued before it. """
+        queue = CoalescingQueue(4)
+        self.assertEqual(EnqueueResult.ACCEPTED, queue.offer('a10', 'a'))
+        self.assertEqual(EnqueueResult.ACCEPTED, queue.offer(['a20', 'b20']))
+        self.assertEqual(EnqueueResult.ACCEPTED, queue.offer('a30', 'a'))
+        self.assertEqual(EnqueueResult.COALESCED, queue.offer('a40', 'a'))
+        self.assertEqual(['a10', ['a20', 'b20'], 'a40'], [queue.get_nowait() for _ in range(queue.qsize())])
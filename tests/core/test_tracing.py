@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+
+"""Tests for the `core.tracing` module."""
+
+import unittest
+
+from hermes.core import tracing
+
+
+class TracingTest(unittest.TestCase):
+    """Tests for the action tracing."""
+
+    def tearDown(self):
+        """Switch tracing back off."""
+        tracing.disable()
+
+    def test_disabled(self):
+        """No span should be created when tracing is off."""
+        self.assertIsNone(tracing.start(1, 2))
+        self.assertEqual([], tracing.spans())
+
+    def test_spans(self):
+        """Spans should be kept in a bounded buffer, summarized and exported per stage."""
+        tracing.enable(capacity=2)
+        for _ in range(3):
+            span = tracing.start(1, 2)
+            for stage in (tracing.ENQUEUED, tracing.DEQUEUED, tracing.WRITTEN, tracing.ACKED):
+                span.stamp(stage)
+        unfinished = tracing.start(1, 3)
+        self.assertEqual([span, unfinished], tracing.spans())
+        self.assertEqual(['api', 'queue', 'write', 'board'], list(span.intervals()))
+        self.assertEqual([], list(unfinished.intervals()))
+
+        summary = tracing.summary()
+        self.assertEqual(1, summary['board']['count'])
+        self.assertEqual(1, summary['total']['count'])
+
+        events = tracing.export()['traceEvents']
+        self.assertEqual(12, len(events))
+        self.assertEqual({'b', 'e'}, {event['ph'] for event in events})
+
+    def test_capacity(self):
+        """The capacity of the span buffer should be bounded."""
+        self.assertRaises(ValueError, tracing.enable, 0)
+        self.assertRaises(ValueError, tracing.enable, tracing.MAX_CAPACITY + 1)
+        self.assertFalse(tracing.enabled())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+"""Tests for the `core.watcher` module."""
+
+import asyncio
+import threading
+import unittest
+from unittest import mock
+
+from hermes.boards.arduino import ArduinoBoard, ArduinoBoardType
+from hermes.core import index, snapshot, watcher
+from hermes.core.config import settings
+from hermes.core.dictionary import MessageCode
+from hermes.core.struct import EnqueueResult
+from hermes.devices.servo import ServoDevice
+from hermes.protocols.simulated import SimulatedProtocol
+
+
+def _board(maximum=180, latency=0):
+    """Create a board with a servo, as loaded from the configuration files."""
+    board = ArduinoBoard(SimulatedProtocol(latency=latency), ArduinoBoardType.UNO)
+    board.id = 1
+    servo = ServoDevice()
+    servo.id = 1
+    servo.max = maximum
+    board.actions[1] = servo
+    return board
+
+
+class WatcherTest(unittest.TestCase):
+    """Tests for the configuration hot-reload."""
+
+    def setUp(self):
+        """Register a board with a servo."""
+        self.board = _board()
+        self.board.actions[1].state = 42
+        settings.set('boards', {1: self.board})
+
+    def _reload(self, *boards):
+        """Reload a configuration with the given boards."""
+        with mock.patch('hermes.core.storage.load', return_value={'boards': {board.id: board for board in boards}}):
+            watcher.reload()
+
+    def test_device(self):
+        """Edited devices should be updated in place and patched, without reopening their board."""
+        servo = self.board.actions[1]
+        self.board.connected = True
+        version = snapshot.version()
+        with mock.patch.object(self.board, 'send_batch', return_value=EnqueueResult.ACCEPTED) as send:
+            self._reload(_board(maximum=90))
+        self.assertIs(self.board, settings.get(['boards', 1]))
+        self.assertIs(servo, index.get(1, 1).device)
+        self.assertEqual((90, 42), (servo.max, servo.state))
+        send.assert_called_once_with([(bytearray([MessageCode.PATCH]) + servo.as_playload(), None)])
+        self.assertNotEqual(version, snapshot.version())
+
+        # Unchanged.
+        version = snapshot.version()
+        with mock.patch.object(self.board, 'send_batch') as send:
+            self._reload(_board(maximum=90))
+        send.assert_not_called()
+        self.assertEqual(version, snapshot.version())
+
+    def test_rejected_patch(self):
+        """Boards with a full command queue should be reopened to get their edited devices."""
+        self.board.connected = True
+        with mock.patch.object(self.board, 'send_batch', return_value=EnqueueResult.REJECTED), \
+                mock.patch.object(self.board, 'close') as close, mock.patch.object(self.board, 'connect') as connect:
+            self._reload(_board(maximum=90))
+        close.assert_called_once_with()
+        connect.assert_called_once_with()
+        self.assertEqual(90, self.board.actions[1].max)
+
+    def test_loop(self):
+        """The changes should be applied on the attached event loop, not in the watcher thread."""
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever)
+        thread.start()
+        threads = []
+        watcher.attach(loop)
+        try:
+            with mock.patch('hermes.core.index.update', side_effect=lambda _: threads.append(threading.get_ident())):
+                self._reload(_board(latency=0.1))
+        finally:
+            watcher.attach(None)
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+        self.assertEqual([thread.ident], threads)
+
+    def test_board(self):
+        """Boards with new protocol settings should be replaced, their devices keeping their states."""
+        board = _board(latency=0.1)
+        self._reload(board)
+        self.assertIs(board, settings.get(['boards', 1]))
+        self.assertIs(board.actions[1], index.get(1, 1).device)
+        self.assertEqual(42, board.actions[1].state)
+
+        # Removed.
+        self._reload()
+        self.assertNotIn(1, settings.get('boards'))
+        self.assertIsNone(index.get(1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()